@@ -0,0 +1,875 @@
+#	----------------------------------------------------------------------------------------------------------------------------
+#	Ubergen Operating System Information Class Benchmarks
+#	----------------------------------------------------------------------------------------------------------------------------
+#	Description:
+#
+#		Micro benchmarks for the OsInfo class.  Run all benchmarks, or only those named on the command line.
+#
+#		    python3 bench-osinfo.py [name ...]
+#
+#	Copyrignt: (c) 2023, MHG Squint
+#
+#	---------- ----- -------------- --------------------------------------------------------------------------------------------
+#
+
+import asyncio
+import contextlib
+import gc
+import io
+import json
+import os
+import pickle
+import re
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import osinfo
+from osinfo import *
+from osinfo import _optional, _versionNumber
+
+def _timeit(label, func, count):
+    """
+    Time It
+
+        Runs func count times and prints the mean cost per call.
+
+    Returns:
+    float: mean seconds per call
+    """
+    start       = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed     = (time.perf_counter() - start) / count
+    print("{0:40} {1:>12.2f} us/call  ({2} calls)".format(label, elapsed * 1e6, count))
+    return elapsed
+
+def benchCurrent():
+    """
+    Cold construction vs shared, cached OsInfo.current()
+    """
+    cold        = _timeit('OsInfo().detect() cold detection', lambda: OsInfo().detect(), 200)
+    OsInfo.refresh()
+    warm        = _timeit('OsInfo.current() cached', OsInfo.current, 20000)
+    print("{0:40} {1:>12.1f}x".format('speedup', cold / warm))
+
+def benchLazy():
+    """
+    Lazy construction: cost of reading one field vs full detection
+    """
+    _timeit('OsInfo() construction', OsInfo, 20000)
+    _timeit('OsInfo().isWindows()', lambda: OsInfo().isWindows(), 20000)
+    _timeit('OsInfo().desktop()', lambda: OsInfo().desktop(), 20000)
+    _timeit('OsInfo().flavor()', lambda: OsInfo().flavor(), 2000)
+    _timeit('OsInfo().detect()', lambda: OsInfo().detect(), 2000)
+
+_OS_RELEASE = b'''NAME="Ubuntu"
+VERSION="20.04.6 LTS (Focal Fossa)"
+ID=ubuntu
+ID_LIKE=debian
+PRETTY_NAME="Ubuntu 20.04.6 LTS"
+VERSION_ID="20.04"
+HOME_URL="https://www.ubuntu.com/"
+SUPPORT_URL="https://help.ubuntu.com/"
+BUG_REPORT_URL="https://bugs.launchpad.net/ubuntu/"
+PRIVACY_POLICY_URL="https://www.ubuntu.com/legal/terms-and-policies/privacy-policy"
+VERSION_CODENAME=focal
+UBUNTU_CODENAME=focal
+'''
+
+def _splitOsRelease(text):
+    """
+    Original line-by-line str.split os-release loop, for comparison
+    """
+    lDict       = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        key, value = line.split('=',1)
+        lDict[key]  = value.replace('"','')
+    return lDict
+
+def benchOsRelease():
+    """
+    os-release parsing: bytes scanner vs original str.split loop
+    """
+    text        = _OS_RELEASE.decode()
+    assert OsInfo._parseOsRelease(_OS_RELEASE) == _splitOsRelease(text)
+    old         = _timeit('str.split loop (decode + parse)', lambda: _splitOsRelease(_OS_RELEASE.decode()), 20000)
+    new         = _timeit('OsInfo._parseOsRelease', lambda: OsInfo._parseOsRelease(_OS_RELEASE), 20000)
+    print("{0:40} {1:>12.1f}x".format('speedup', old / new))
+
+    # Per detection: the old fallthrough path opened and parsed the file 3 times, 4 with DumpDebugVars
+    def readOld():
+        for _ in range(3):
+            with open('/etc/os-release','r') as fh:
+                _splitOsRelease(fh.read())
+    old         = _timeit('per detection, original (3 reads)', readOld, 5000)
+    new         = _timeit('per detection, OsInfo (1 read)', OsInfo()._readOsRelease, 5000)
+    print("{0:40} {1:>12.1f}x".format('speedup', old / new))
+
+def benchCache():
+    """
+    Persistent cache: cold detection vs warm load from disk
+    """
+    folder      = tempfile.mkdtemp(prefix='osinfo-bench-')
+    try:
+        cold    = _timeit('OsInfo().detect() cold detection', lambda: OsInfo().detect(), 500)
+        OsInfo.fromCache(folder)
+        warm    = _timeit('OsInfo.fromCache() warm load', lambda: OsInfo.fromCache(folder), 500)
+        print("{0:40} {1:>12.1f}x".format('speedup', cold / warm))
+    finally:
+        shutil.rmtree(folder)
+
+def benchKernelCaps():
+    """
+    kernelCaps(): probing every start vs the per-boot cache
+    """
+    folder      = tempfile.mkdtemp(prefix='osinfo-bench-')
+    try:
+        osi     = OsInfo()
+        osi.detect()
+        def probe():
+            osi._kernelCaps = None
+            return osi.kernelCaps(persist=False)
+        def cached():
+            osi._kernelCaps = None
+            return osi.kernelCaps(folder=folder)
+        cold    = _timeit('kernelCaps() probed', probe, 500)
+        cached()
+        warm    = _timeit('kernelCaps() from cache', cached, 500)
+        print("{0:40} {1:>12.1f}x".format('speedup', cold / warm))
+        print(', '.join(cap for cap, ok in sorted(cached().items()) if ok))
+    finally:
+        shutil.rmtree(folder)
+
+def benchResources():
+    """
+    resources(): reading cgroups, affinity, and NUMA vs the per-process copy
+    """
+    osi     = OsInfo()
+    _timeit('resources(refresh=True)', lambda: osi.resources(refresh=True), 2000)
+    _timeit('resources() cached', osi.resources, 100000)
+    _timeit('recommendedWorkers()', osi.recommendedWorkers, 100000)
+    print('os.cpu_count() {}, recommendedWorkers() cpu {} io {}; {}'.format(
+          os.cpu_count(), osi.recommendedWorkers('cpu'), osi.recommendedWorkers('io'), osi.resources()))
+
+class _HungInfo(OsInfo):
+    def _readOsRelease(self):
+        time.sleep(2.0)
+        return OsInfo._readOsRelease(self)
+
+def benchTimeout():
+    """
+    OsInfo(timeout=...): cost on a healthy host, and time to a partial snapshot with a hung os-release
+    """
+    _timeit('OsInfo().snapshot()', lambda: OsInfo().snapshot(), 500)
+    _timeit('OsInfo(timeout=1.0).snapshot()', lambda: OsInfo(timeout=1.0).snapshot(), 500)
+    for timeout in (0.05, 0.25):
+        start   = time.perf_counter()
+        osi     = _HungInfo(timeout=timeout)
+        osi.snapshot()
+        print("{0:40} {1:>12.1f} ms  ({2} fields timed out)".format('hung os-release, timeout={}'.format(timeout),
+              (time.perf_counter() - start) * 1e3, sum(status == 'timeout' for status in osi.fieldStatus().values())))
+
+#
+# Distro fixtures: (uname version, os-release, debian_version)
+#
+
+_FIXTURES = {
+    'Debian'    : ('#1 SMP Debian 5.10.92-1 (2022-01-18)',
+                   b'PRETTY_NAME="Debian GNU/Linux 11 (bullseye)"\nNAME="Debian GNU/Linux"\nVERSION_ID="11"\n'
+                   b'VERSION="11 (bullseye)"\nVERSION_CODENAME=bullseye\nID=debian\n', '11.6'),
+    'Ubuntu'    : ('#150-Ubuntu SMP Sat Apr 12 06:00:09 UTC 2023', _OS_RELEASE, 'bullseye/sid'),
+    'OpenSUSE'  : ('#1 SMP PREEMPT_DYNAMIC Wed Apr  5 13:23:42 UTC 2023 (c4b5a64)',
+                   b'NAME="openSUSE Tumbleweed"\nID="opensuse-tumbleweed"\nID_LIKE="opensuse suse"\n'
+                   b'VERSION_ID="20230411"\nPRETTY_NAME="openSUSE Tumbleweed"\n', None),
+    'CentOS'    : ('#1 SMP Mon Jul 18 17:42:52 UTC 2022',
+                   b'NAME="CentOS Stream"\nVERSION="8"\nID="centos"\nID_LIKE="rhel fedora"\nVERSION_ID="8"\n'
+                   b'PRETTY_NAME="CentOS Stream 8"\n', None),
+    'Fedora'    : ('#1 SMP PREEMPT_DYNAMIC Thu Sep 14 17:08:46 UTC 2023',
+                   b'NAME="Fedora Linux"\nVERSION="38 (Container Image)"\nID=fedora\nVERSION_ID=38\n'
+                   b'PRETTY_NAME="Fedora Linux 38 (Container Image)"\n', None),
+    'Rocky'     : ('#1 SMP PREEMPT_DYNAMIC Thu Sep 14 17:08:46 UTC 2023',
+                   b'NAME="Rocky Linux"\nVERSION="9.2 (Blue Onyx)"\nID="rocky"\nID_LIKE="rhel centos fedora"\n'
+                   b'VERSION_ID="9.2"\nPRETTY_NAME="Rocky Linux 9.2 (Blue Onyx)"\n', None),
+    'Alpine'    : ('#1-Alpine SMP PREEMPT_DYNAMIC Mon, 28 Aug 2023 07:52:42 +0000',
+                   b'NAME="Alpine Linux"\nID=alpine\nVERSION_ID=3.18.4\nPRETTY_NAME="Alpine Linux v3.18"\n', None),
+    'Arch'      : ('#1 SMP PREEMPT_DYNAMIC Sat, 14 Oct 2023 08:12:59 +0000',
+                   b'NAME="Arch Linux"\nPRETTY_NAME="Arch Linux"\nID=arch\nBUILD_ID=rolling\n', None),
+}
+
+_LEGACY_FIXTURES = {
+    'CentOS 7 (redhat-release)'     : {'etc/redhat-release': b'CentOS Linux release 7.9.2009 (Core)\n'},
+    'Ubuntu 14.04 (lsb-release)'    : {'etc/lsb-release': b'DISTRIB_ID=Ubuntu\nDISTRIB_RELEASE=14.04\nDISTRIB_CODENAME=trusty\n'
+                                                          b'DISTRIB_DESCRIPTION="Ubuntu 14.04.6 LTS"\n',
+                                       'etc/debian_version': b'jessie/sid\n'},
+    'Alpine (alpine-release)'       : {'etc/alpine-release': b'3.18.4\n'},
+    'openSUSE 13.2 (SuSE-release)'  : {'etc/SuSE-release': b'openSUSE 13.2 (x86_64)\nVERSION = 13.2\nCODENAME = Harlequin\n'},
+    'Debian (debian_version)'       : {'etc/debian_version': b'11.6\n'},
+}
+
+class _CountingOsInfo(OsInfo):
+    reads   = 0
+
+    def _readBytes(self, fileName):
+        _CountingOsInfo.reads += 1
+        return OsInfo._readBytes(self, fileName)
+
+def benchReleaseChain():
+    """
+    Release source chain over a root filesystem corpus: release files tried, and time to read release data
+    """
+    folder      = tempfile.mkdtemp(prefix='osinfo-bench-')
+    try:
+        corpus  = {name: dict({'etc/os-release': fixture[1]}, **({'etc/debian_version': fixture[2].encode()} if fixture[2] else {}))
+                   for name, fixture in _FIXTURES.items()}
+        corpus.update(_LEGACY_FIXTURES)
+        for name, files in corpus.items():
+            root    = os.path.join(folder, re.sub(r'\W+', '-', name))
+            for path, data in files.items():
+                os.makedirs(os.path.dirname(os.path.join(root, path)), exist_ok=True)
+                with open(os.path.join(root, path), 'wb') as fh:
+                    fh.write(data)
+            _CountingOsInfo.reads = 0
+            osi     = _CountingOsInfo(root=root)
+            osi.detect()
+            reads   = _CountingOsInfo.reads
+            start   = time.perf_counter()
+            for _ in range(200):
+                OsInfo(root=root)._need('osrelease')
+            print("{0:40} {1:>8.1f} us/call  {2} files tried  {3}".format(name, (time.perf_counter() - start) / 200 * 1e6, reads, osi.flavverflav()))
+    finally:
+        shutil.rmtree(folder)
+
+def _fixtureParsed(osRelease, _parsed={}):
+    if osRelease not in _parsed:
+        _parsed[osRelease]  = OsInfo._parseOsRelease(osRelease)
+    return dict(_parsed[osRelease])
+
+def _fixtureInfo(cls, flavor):
+    """
+    OsInfo with the raw probes preloaded from a fixture, so only mapping is timed
+    """
+    unameVersion, osRelease, debianVersion = _FIXTURES[flavor]
+    osi                 = cls()
+    osi._uname_sysname  = 'linux'
+    osi._uname_release  = '5.10.0'
+    osi._uname_version  = unameVersion
+    osi._uname_machine  = 'x86_64'
+    osi._osRelease      = _fixtureParsed(osRelease)
+    osi._debianVersion  = debianVersion
+    osi._probed.update(('uname','platform','osrelease','debian'))
+    return osi
+
+class _CascadeOsInfo(OsInfo):
+    """
+    OsInfo with the original if/elif distro cascade, for comparison
+    """
+    def _probeVersion(self):
+        pass
+
+    def _probeDistro(self):
+        lOsRelease  = self._osRelease
+        matched     = False
+        if re.match(r'.*Debian.*',self._uname_version):
+            self._isDebian      = True
+            self._machine       = self._uname_machine
+            self._prettyname    = self._qnul(lOsRelease['PRETTY_NAME'])
+            self._name          = self._qnul(lOsRelease['NAME'])
+            self._flavor        = 'Debian'
+            self._release       = self._qnul(lOsRelease['VERSION_ID'])
+            self._version       = self._qnul(self._debianVersion)
+            self._revision      = self._version
+            self._codename      = self._qnul(lOsRelease['VERSION_CODENAME'])
+            self._distrobase    = 'Debian'
+            self._flavverflav   = '{0}{1}'.format(self._flavor,self._version)
+            matched             = True
+        if not matched and re.match(r'.*Ubuntu.*',self._uname_version):
+            self._isUbuntu      = True
+            self._machine       = self._uname_machine
+            self._prettyname    = self._qnul(lOsRelease['PRETTY_NAME'])
+            self._name          = self._qnul(lOsRelease['NAME'])
+            self._flavor        = 'Ubuntu'
+            self._release       = self._qnul(lOsRelease['VERSION_ID'])
+            self._version       = self._qnul(self._debianVersion)
+            self._revision      = self._qnul(lOsRelease['VERSION'])
+            self._codename      = self._qnul(lOsRelease['VERSION_CODENAME'])
+            self._distrobase    = 'Debian'
+            self._flavverflav   = '{0}{1}'.format(self._name,self._release)
+            matched             = True
+        if not matched and lOsRelease['NAME'].startswith('openSUSE'):
+            self._isOpenSuse    = True
+            self._machine       = self._uname_machine
+            self._distrobase    = 'OpenSUSE'
+            self._codename      = 'n/a'
+            self._name          = self._qnul(lOsRelease['NAME'])
+            self._flavor        = 'OpenSUSE'
+            match = re.match(r'^openSUSE ([A-Za-z]+)$',self._name)
+            if match:
+                self._release   = match.group(1)
+            self._version       = self._qnul(lOsRelease['VERSION_ID'])
+            self._revision      = self._qnul(lOsRelease['VERSION_ID'])
+            self._flavverflav   = '{0}{1}'.format(self._flavor,self._release)
+            self._prettyname    = '{0} {1}'.format(self._qnul(lOsRelease['PRETTY_NAME']),self._version)
+            matched             = True
+        if not matched and self._qnul(lOsRelease['ID']) == 'centos':
+            self._isCentOS      = True
+            self._machine       = self._uname_machine
+            self._prettyname    = self._qnul(lOsRelease['PRETTY_NAME'])
+            self._name          = self._qnul(lOsRelease['NAME'])
+            self._flavor        = 'CentOS'
+            self._release       = self._qnul(lOsRelease['VERSION_ID'])
+            self._version       = self._qnul(lOsRelease['VERSION'])
+            self._revision      = self._qnul(lOsRelease['VERSION'])
+            self._codename      = 'n/a'
+            self._distrobase    = 'Redhat'
+            self._flavverflav   = '{0}{1}'.format(self._flavor,self._release)
+            matched             = True
+
+def benchRules():
+    """
+    Distro mapping per fixture: rule table vs original cascade
+    """
+    for flavor in _FIXTURES:
+        new     = _timeit('{} rule table'.format(flavor), lambda: _fixtureInfo(OsInfo, flavor)._need('distro','version'), 20000)
+        if flavor in ('Debian','Ubuntu','OpenSUSE','CentOS'):
+            old = _timeit('{} cascade'.format(flavor), lambda: _fixtureInfo(_CascadeOsInfo, flavor)._need('distro','version'), 20000)
+            print("{0:40} {1:>12.1f}x".format('speedup', old / new))
+        else:
+            print("{0:40} {1:>12}".format('cascade', 'unsupported'))
+
+def _fixtureRoots(folder, count):
+    """
+    Creates count root filesystems from the distro fixtures
+    """
+    roots       = []
+    flavors     = list(_FIXTURES)
+    for i in range(count):
+        unameVersion, osRelease, debianVersion = _FIXTURES[flavors[i % len(flavors)]]
+        root    = os.path.join(folder, 'root{:05}'.format(i))
+        os.makedirs(os.path.join(root, 'etc'))
+        with open(os.path.join(root, 'etc', 'os-release'), 'wb') as fh:
+            fh.write(osRelease)
+        if debianVersion:
+            with open(os.path.join(root, 'etc', 'debian_version'), 'w') as fh:
+                fh.write(debianVersion + '\n')
+        roots.append(root)
+    return roots
+
+def benchScanRoots():
+    """
+    Root filesystem scanning throughput, roots per second
+    """
+    folder      = tempfile.mkdtemp(prefix='osinfo-bench-')
+    try:
+        roots   = _fixtureRoots(folder, 2000)
+        for workers, processes in ((1, False), (4, False), (16, False), (4, True), (16, True)):
+            start   = time.perf_counter()
+            count   = sum(1 for _ in OsInfo.scanRoots(roots, workers=workers, processes=processes))
+            elapsed = time.perf_counter() - start
+            label   = 'scanRoots {} {}'.format(workers, 'processes' if processes else 'threads')
+            print("{0:40} {1:>12.0f} roots/s  ({2} roots)".format(label, count / elapsed, count))
+    finally:
+        shutil.rmtree(folder)
+
+def _imageTar(path, layers):
+    """
+    Writes a docker save style tarball of layers, base layer first.  layers: lists of (name, bytes)
+    """
+    def add(tar, name, data):
+        info        = tarfile.TarInfo(name)
+        info.size   = len(data)
+        tar.addfile(info, io.BytesIO(data))
+    names   = []
+    with tarfile.open(path, 'w') as image:
+        for i, entries in enumerate(layers):
+            buf     = io.BytesIO()
+            with tarfile.open(fileobj=buf, mode='w:gz') as tar:
+                for name, data in entries:
+                    add(tar, name, data)
+            names.append('l{}/layer.tar'.format(i))
+            add(image, names[-1], buf.getvalue())
+        add(image, 'manifest.json', json.dumps([{'Layers': names}]).encode())
+
+def benchImage():
+    """
+    Image OS detection: release files in the top layer (short circuit) vs under a 20 MB filler layer
+    """
+    unameVersion, osRelease, debianVersion = _FIXTURES['Debian']
+    release     = [('etc/os-release', osRelease), ('etc/debian_version', debianVersion.encode())]
+    filler      = [('usr/share/filler/{:05}'.format(i), os.urandom(2048)) for i in range(10000)]
+    folder      = tempfile.mkdtemp(prefix='osinfo-bench-')
+    try:
+        top     = os.path.join(folder, 'top.tar')
+        bottom  = os.path.join(folder, 'bottom.tar')
+        _imageTar(top, [filler, release])
+        _imageTar(bottom, [release, filler])
+        assert OsInfo.fromImage(top).flavor() == OsInfo.fromImage(bottom).flavor() == 'Debian'
+        _timeit('fromImage, release files in top layer', lambda: OsInfo.fromImage(top).detect(), 50)
+        _timeit('fromImage, release files under filler', lambda: OsInfo.fromImage(bottom).detect(), 5)
+    finally:
+        shutil.rmtree(folder)
+
+def benchAsync():
+    """
+    Event loop latency while detecting 2000 roots: detectManyAsync vs OsInfo() on the loop
+    """
+    async def ticker(lags, stop):
+        while not stop.is_set():
+            start   = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    async def measure(label, detect):
+        lags, stop  = [], asyncio.Event()
+        tick        = asyncio.ensure_future(ticker(lags, stop))
+        await asyncio.sleep(0.01)
+        start       = time.perf_counter()
+        await detect()
+        elapsed     = time.perf_counter() - start
+        stop.set()
+        await tick
+        lags.sort()
+        print("{0:40} {1:>9.2f} ms p50  {2:>9.2f} ms max lag  ({3:.2f} s)".format(label, lags[len(lags) // 2] * 1e3, lags[-1] * 1e3, elapsed))
+
+    async def blocking(roots):
+        for root in roots:
+            OsInfo(root=root).detect()
+        await asyncio.sleep(0)
+
+    folder      = tempfile.mkdtemp(prefix='osinfo-bench-')
+    try:
+        roots   = _fixtureRoots(folder, 2000)
+        asyncio.run(measure('OsInfo(root).detect() on the loop', lambda: blocking(roots)))
+        asyncio.run(measure('detectManyAsync(limit=8)', lambda: OsInfo.detectManyAsync(roots, limit=8)))
+    finally:
+        shutil.rmtree(folder)
+
+def benchSnapshot():
+    """
+    Memory per record: detected OsInfo vs OsInfoSnapshot, 20000 records
+    """
+    flavors     = list(_FIXTURES)
+    def build(count):
+        return [_fixtureInfo(OsInfo, flavors[i % len(flavors)]).detect() for i in range(count)]
+
+    def measure(label, make):
+        gc.collect()
+        tracemalloc.start()
+        records = make()
+        size    = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print("{0:40} {1:>12.0f} bytes/record".format(label, size / len(records)))
+        return records
+
+    measure('OsInfo, detected', lambda: build(20000))
+    snaps       = measure('OsInfoSnapshot', lambda: [osi.snapshot() for osi in build(20000)])
+    _timeit('snapshot == snapshot', lambda: snaps[0] == snaps[len(flavors)], 200000)
+    _timeit('hash(snapshot)', lambda: hash(snaps[0]), 200000)
+    _timeit('pickle round trip', lambda: pickle.loads(pickle.dumps(snaps[0])), 20000)
+    _timeit('JSON round trip', lambda: OsInfoSnapshot.fromJson(snaps[0].toJson()), 20000)
+
+def benchVersions():
+    """
+    'is at least Debian 11' over 10^6 snapshots: re-parsing version strings vs matches()
+    """
+    count       = 1000000
+    flavors     = list(_FIXTURES)
+    snaps       = [_fixtureInfo(OsInfo, flavors[i % len(flavors)]).snapshot() for i in range(count)]
+    pattern     = re.compile(r'([0-9]+)(?:\.([0-9]+))?')
+
+    def parsed():
+        hits    = 0
+        for snap in snaps:
+            match   = pattern.match(snap.version())
+            if snap.flavor() == 'Debian' and match and (int(match.group(1)), int(match.group(2) or 0)) >= (11, 0):
+                hits += 1
+        return hits
+    def spec():
+        hits    = 0
+        for snap in snaps:
+            if snap.matches('Debian>=11'):
+                hits += 1
+        return hits
+    assert parsed() == spec()
+    for label, func in (('regex parse per host', parsed), ('snapshot.matches(spec)', spec)):
+        start   = time.perf_counter()
+        func()
+        print("{0:40} {1:>12.0f} hosts/s".format(label, count / (time.perf_counter() - start)))
+
+def benchNdjson():
+    """
+    Serialization throughput: 100000 snapshots to NDJSON, vs the Dump() text
+    """
+    count       = 100000
+    flavors     = list(_FIXTURES)
+    infos       = [_fixtureInfo(OsInfo, flavor).detect() for flavor in flavors]
+    snaps       = [infos[i % len(infos)].snapshot() for i in range(count)]
+    print('JSON backend: {}'.format('orjson' if _optional('orjson') is not None else 'json'))
+
+    def measure(label, func, records):
+        out     = io.StringIO()
+        start   = time.perf_counter()
+        func(out)
+        elapsed = time.perf_counter() - start
+        print("{0:40} {1:>12.0f} records/s {2:>8.1f} MB/s".format(label, records / elapsed, len(out.getvalue()) / elapsed / 1e6))
+
+    measure('json.dumps per record', lambda out: [out.write(json.dumps(snap.toDict()) + '\n') for snap in snaps], count)
+    measure('OsInfo.writeNdjson(snapshots)', lambda out: OsInfo.writeNdjson(out, snaps), count)
+    if _optional('orjson') is not None:
+        osinfo._optional = lambda name: None
+        try:
+            measure('OsInfo.writeNdjson(snapshots), json', lambda out: OsInfo.writeNdjson(out, snaps), count)
+        finally:
+            osinfo._optional = _optional
+    measure('OsInfo.writeNdjson(OsInfo,debug)', lambda out: OsInfo.writeNdjson(out, (infos[i % len(infos)] for i in range(count // 10)), debug=True), count // 10)
+    def dump(out):
+        with contextlib.redirect_stdout(out):
+            for i in range(count // 100):
+                infos[i % len(infos)].Dump()
+    measure('Dump() text', dump, count // 100)
+    for name in os.listdir('.'):
+        if name.startswith('osinfo-testout-'):
+            os.unlink(name)
+
+def benchDump():
+    """
+    Reports for 500 hosts to a line buffered file: Dump() each vs one dumpMany()
+    """
+    count       = 500
+    flavors     = list(_FIXTURES)
+    infos       = [_fixtureInfo(OsInfo, flavors[i % len(flavors)]).detect() for i in range(count)]
+    folder      = tempfile.mkdtemp(prefix='osinfo-bench-')
+    try:
+        def lines():
+            # One print per line, as Dump() used to
+            for osi in infos:
+                for line in OsInfo._renderDump(osi.toDict(), osi.title(), 'text').split('\n'):
+                    print(line)
+        def dumps():
+            for osi in infos:
+                osi._logFile    = os.path.join(folder, 'log.txt')
+                osi.Dump()
+        def many():
+            OsInfo.dumpMany(infos, os.path.join(folder, 'many.txt'))
+
+        for label, func in (('print per line', lines), ('Dump() per host, with log', dumps)):
+            with open(os.path.join(folder, 'out.txt'), 'w', buffering=1) as out:
+                start   = time.perf_counter()
+                with contextlib.redirect_stdout(out):
+                    func()
+                print("{0:40} {1:>12.0f} hosts/s".format(label, count / (time.perf_counter() - start)))
+        start   = time.perf_counter()
+        many()
+        print("{0:40} {1:>12.0f} hosts/s".format('dumpMany() to one file', count / (time.perf_counter() - start)))
+    finally:
+        shutil.rmtree(folder)
+
+class _UntimedOsInfo(OsInfo):
+    """
+    OsInfo running probes without timing, for measuring its overhead
+    """
+    def _need(self, *probes):
+        for probe in probes:
+            if probe in self._probed:
+                continue
+            method, prereqs = self._probes[probe]
+            self._need(*prereqs)
+            getattr(self, method)()
+            self._probed.add(probe)
+
+def benchHooks():
+    """
+    Probe timing and trace hook overhead on fixture detection
+    """
+    _timeit('untimed probes', lambda: _fixtureInfo(_UntimedOsInfo, 'Ubuntu').detect(), 20000)
+    _timeit('timed probes, no hooks', lambda: _fixtureInfo(OsInfo, 'Ubuntu').detect(), 20000)
+    hooks   = (('no-op hook', lambda event, osi, stage, value: None),
+               ('OsInfoLogHook, logging off', OsInfoLogHook(level=5)))
+    for label, hook in hooks:
+        OsInfo.addHook(hook)
+        try:
+            _timeit(label, lambda: _fixtureInfo(OsInfo, 'Ubuntu').detect(), 20000)
+        finally:
+            OsInfo.removeHook(hook)
+
+def benchAgent():
+    """
+    Agent (python -m osinfo serve) latency and throughput, vs in-process detection
+    """
+    folder  = tempfile.mkdtemp(prefix='osinfo-bench-')
+    path    = os.path.join(folder, 'osinfo.sock')
+    agent   = subprocess.Popen([sys.executable, '-m', 'osinfo', 'serve', '--socket', path],
+                               cwd=os.path.dirname(os.path.abspath(osinfo.__file__)), stdout=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            if os.path.exists(path):
+                break
+            time.sleep(0.05)
+        _timeit('OsInfo().detect()', lambda: OsInfo().detect(), 2000)
+        _timeit('OsInfo.fromCache()', lambda: OsInfo.fromCache(folder), 2000)
+        _timeit('OsInfo.fromAgent()', lambda: OsInfo.fromAgent(path), 2000)
+        _timeit('OsInfo.queryAgent([flavor])', lambda: OsInfo.queryAgent(['flavor'], path), 2000)
+
+        clients, requests = 64, 500
+        async def client():
+            reader, writer = await asyncio.open_unix_connection(path)
+            for _ in range(requests):
+                writer.write(b'{}\n')
+                await reader.readline()
+            writer.close()
+        async def run():
+            await asyncio.gather(*(client() for _ in range(clients)))
+        start   = time.perf_counter()
+        asyncio.run(run())
+        print("{0:40} {1:>12.0f} requests/s".format('{} concurrent clients'.format(clients), clients * requests / (time.perf_counter() - start)))
+    finally:
+        agent.terminate()
+        agent.wait()
+        shutil.rmtree(folder)
+
+def benchWatch():
+    """
+    Keeping a root's OsInfo current: rebuilding it every second vs a watcher; CPU while idle, and change latency
+    """
+    folder  = tempfile.mkdtemp(prefix='osinfo-bench-')
+    try:
+        root    = _fixtureRoots(folder, 1)[0]
+        release = os.path.join(root, 'etc', 'os-release')
+        seconds = 3.0
+
+        def idle(label, func):
+            cpu     = time.process_time()
+            start   = time.perf_counter()
+            func()
+            print("{0:40} {1:>12.2f} ms CPU/s".format(label, (time.process_time() - cpu) * 1e3 / (time.perf_counter() - start)))
+        def rebuild():
+            end     = time.perf_counter() + seconds
+            while time.perf_counter() < end:
+                OsInfo(root=root).detect()
+                time.sleep(1.0)
+        idle('rebuild OsInfo every 1s', rebuild)
+
+        for inotify in (True, False):
+            osi     = OsInfo(root=root).detect()
+            changed = threading.Event()
+            watcher = osi.watch(lambda osi, fields: changed.set(), interval=1.0, inotify=inotify)
+            label   = 'watch(), {}'.format(watcher.mode())
+            try:
+                idle(label + ', idle', lambda: time.sleep(seconds))
+                with open(release, 'rb') as fh:
+                    data    = fh.read()
+                start   = time.perf_counter()
+                with open(release, 'wb') as fh:
+                    fh.write(data.replace(b'VERSION_ID=', b'VERSION_ID=9', 1))
+                changed.wait(5)
+                print("{0:40} {1:>12.1f} ms".format(label + ', change to callback', (time.perf_counter() - start) * 1e3))
+                with open(release, 'wb') as fh:
+                    fh.write(data)
+            finally:
+                watcher.stop()
+    finally:
+        shutil.rmtree(folder)
+
+def benchThreads():
+    """
+    Contention at 64 threads: rounds of first use of a shared OsInfo, then reads; best of 3
+    """
+    threads     = 64
+    rounds      = 200
+
+    def race(make, reads):
+        barrier = threading.Barrier(threads + 1)
+        shared  = []
+        def work():
+            for _ in range(rounds):
+                barrier.wait()
+                osi     = shared[-1]
+                for _ in range(reads):
+                    osi.flavor()
+                    osi.version()
+                barrier.wait()
+        pool    = [threading.Thread(target=work) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        start   = time.perf_counter()
+        for _ in range(rounds):
+            shared.append(make())
+            barrier.wait()
+            barrier.wait()
+        for thread in pool:
+            thread.join()
+        return (time.perf_counter() - start) / rounds
+
+    _timeit('detect, one thread', lambda: _fixtureInfo(OsInfo, 'Ubuntu').detect(), 2000)
+    for reads in (1, 100):
+        for label, cls in (('unlocked', _UntimedOsInfo), ('locked', OsInfo)):
+            best    = min(race(lambda: _fixtureInfo(cls, 'Ubuntu'), reads) for _ in range(3))
+            print("{0:40} {1:>12.1f} us/round".format('{} threads, {} reads, {}'.format(threads, reads, label), best * 1e6))
+
+def benchFleet():
+    """
+    FleetTable at 10^6 rows: ingest, filter, and group by, vs a list of snapshots
+    """
+    count       = 1000000
+    flavors     = list(_FIXTURES)
+    snaps       = [_fixtureInfo(OsInfo, flavor).snapshot() for flavor in flavors]
+    datacenters = ['dc{}'.format(i) for i in range(16)]
+    rows        = [(snaps[i % len(snaps)], datacenters[(i * 7) % len(datacenters)]) for i in range(count)]
+
+    def ingest():
+        table   = FleetTable(tags=('datacenter',))
+        for snap, datacenter in rows:
+            table.append(snap, datacenter=datacenter)
+        return table
+    start   = time.perf_counter()
+    table   = ingest()
+    print("{0:40} {1:>12.0f} rows/s".format('FleetTable.append', count / (time.perf_counter() - start)))
+
+    def scan():
+        counts  = {}
+        for snap, datacenter in rows:
+            if snap.flavor() == 'Debian' and _versionNumber(snap.release()) < 12e6:
+                counts[datacenter] = counts.get(datacenter, 0) + 1
+        return counts
+    def grouped():
+        return table.groupCount('datacenter', table.where(flavor='Debian', release=('<', '12')))
+    assert scan() == grouped()
+    print('numpy: {}'.format('yes' if _optional('numpy') is not None else 'no (array fallback)'))
+    for label, func in (('snapshot list, filter + group by', scan),
+                        ('FleetTable, filter + group by', grouped),
+                        ('FleetTable, group by 2 columns', lambda: table.groupCount(('flavor', 'datacenter')))):
+        start   = time.perf_counter()
+        func()
+        print("{0:40} {1:>12.0f} rows/s".format(label, count / (time.perf_counter() - start)))
+
+def _workerDetect(_):
+    start   = time.perf_counter()
+    OsInfo.current().flavor()
+    return time.perf_counter() - start
+
+def benchWorkers():
+    """
+    Pool of 8 workers: detection in each worker, fork vs spawn vs spawn with poolArgs(); import time
+    """
+    import concurrent.futures
+    import multiprocessing
+    workers     = 8
+    OsInfo.current().detect()
+    for label, method, kwargs in (('fork', 'fork', {}),
+                                  ('spawn', 'spawn', {}),
+                                  ('spawn, poolArgs()', 'spawn', OsInfo.poolArgs())):
+        start   = time.perf_counter()
+        with concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(method), **kwargs) as pool:
+            taken   = list(pool.map(_workerDetect, range(workers)))
+        elapsed = time.perf_counter() - start
+        print("{0:40} {1:>12.1f} us/worker {2:>8.0f} ms pool".format(label, sum(taken) / len(taken) * 1e6, elapsed * 1e3))
+
+    env     = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    with tempfile.TemporaryDirectory() as folder:
+        env['PYTHONPYCACHEPREFIX'] = folder
+        for label, code in (('import osinfo', 'import osinfo'),
+                            ('import osinfo + eager deps', 'import osinfo, argparse, asyncio, concurrent.futures, tarfile, json')):
+            script  = 'import time; t = time.perf_counter(); {}; print(time.perf_counter() - t)'.format(code)
+            run     = lambda: float(subprocess.run([sys.executable, '-c', script], env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                                                   capture_output=True, text=True, check=True).stdout)
+            run()
+            print("{0:40} {1:>12.1f} ms".format(label, min(run() for _ in range(5)) * 1e3))
+
+def benchProfiles():
+    """
+    Collapsing 10^6 host records into OS profiles: hashing every record vs groupProfiles()
+    """
+    import hashlib
+    count       = 1000000
+    snaps       = [_fixtureInfo(OsInfo, flavor).snapshot() for flavor in _FIXTURES]
+    dicts       = [snap.toDict() for snap in snaps]
+    for label, records in (('snapshots', [snaps[i % len(snaps)] for i in range(count)]),
+                           ('dicts', [dict(dicts[i % len(dicts)]) for i in range(count)])):
+        def naive():
+            groups  = {}
+            for host, record in enumerate(records):
+                fields  = record if isinstance(record, dict) else record.toDict()
+                key     = '\x1f'.join(str(fields[f]).lower() for f in ('type', 'flavor', 'distrobase', 'version', 'kernel', 'machine', 'isWsl'))
+                groups.setdefault(hashlib.blake2b(key.encode(), digest_size=16).hexdigest(), []).append(host)
+            return groups
+        hosts   = list(enumerate(records))
+        for name, func in (('hash each record', naive), ('groupProfiles()', lambda: OsInfo.groupProfiles(hosts))):
+            start   = time.perf_counter()
+            groups  = func()
+            print("{0:40} {1:>12.0f} rows/s {2:>4} profiles".format('{}, {}'.format(label, name), count / (time.perf_counter() - start), len(groups)))
+
+def _flavorBundles():
+    """
+    Replay bundles, one per supported flavor, from the distro fixtures
+    """
+    bundles     = {
+        'Windows'   : {'osName': 'nt', 'environ': {'PROCESSOR_IDENTIFIER': 'Intel64 Family 6 Model 158'},
+                       'platformUname': ['Windows', 'pc', '10', '10.0.19045', 'AMD64']},
+        'Cygwin'    : {'osName': 'posix', 'files': {'/proc/cpuinfo': 'model name\t: Intel(R) Core(TM) i7\n'},
+                       'uname': ['CYGWIN_NT-10.0-19045', 'pc', '3.4.9-1.x86_64', '2023-09-06 11:19 UTC', 'x86_64']},
+        'WSL'       : {'osName': 'posix', 'files': {'/proc/cpuinfo': 'model name\t: Intel(R) Core(TM) i7\n',
+                                                    '/etc/os-release': _FIXTURES['Ubuntu'][1].decode('latin-1'),
+                                                    '/etc/debian_version': 'bookworm/sid\n'},
+                       'uname': ['Linux', 'pc', '5.15.133.1-microsoft-standard-WSL2', '#1 SMP Thu Oct 5 21:02:42 UTC 2023', 'x86_64']},
+    }
+    for flavor in ('Debian', 'Ubuntu', 'OpenSUSE', 'CentOS'):
+        unameVersion, osRelease, debianVersion = _FIXTURES[flavor]
+        files   = {'/proc/cpuinfo': 'model name\t: Intel(R) Xeon(R)\n', '/etc/os-release': osRelease.decode('latin-1')}
+        if debianVersion:
+            files['/etc/debian_version']    = debianVersion + '\n'
+        bundles[flavor] = {'osName': 'posix', 'environ': {'XDG_CURRENT_DESKTOP': 'GNOME'}, 'files': files,
+                           'uname': ['Linux', 'host', '5.10.0-21-amd64', unameVersion, 'x86_64']}
+    return bundles
+
+def benchFlavors():
+    """
+    Full detection per supported flavor, replayed from a bundle on this host
+    """
+    count   = 5000
+    for flavor, bundle in _flavorBundles().items():
+        env     = OsInfoEnvReplay(bundle)
+        osi     = OsInfo(env=env)
+        label   = '{} ({})'.format(flavor, osi.flavverflav())
+        _timeit(label, lambda: OsInfo(env=env).detect(), count)
+
+BENCHMARKS = {
+    'current'       : benchCurrent,
+    'lazy'          : benchLazy,
+    'flavors'       : benchFlavors,
+    'osrelease'     : benchOsRelease,
+    'cache'         : benchCache,
+    'kcaps'         : benchKernelCaps,
+    'resources'     : benchResources,
+    'timeout'       : benchTimeout,
+    'chain'         : benchReleaseChain,
+    'rules'         : benchRules,
+    'scanroots'     : benchScanRoots,
+    'image'         : benchImage,
+    'async'         : benchAsync,
+    'snapshot'      : benchSnapshot,
+    'fleet'         : benchFleet,
+    'profiles'      : benchProfiles,
+    'versions'      : benchVersions,
+    'ndjson'        : benchNdjson,
+    'dump'          : benchDump,
+    'hooks'         : benchHooks,
+    'agent'         : benchAgent,
+    'watch'         : benchWatch,
+    'threads'       : benchThreads,
+    'workers'       : benchWorkers,
+}
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print("-- {} --".format(name))
+        BENCHMARKS[name]()
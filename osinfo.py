@@ -11,7 +11,9 @@
 #       Debian          10, 11
 #       Ubuntu          20, 22
 #       CentOS          Linux 8, Stream 8+
-#       OpenSUSE        Tumbleweed
+#       OpenSUSE        Tumbleweed, Leap
+#       Fedora, RHEL, Rocky, Alma, Alpine, Arch
+#       Others          by os-release ID_LIKE, or OsInfo.registerDistro()
 #
 #	Copyrignt: (c) 2023, MHG Squint
 #
@@ -22,9 +24,450 @@
 #
 
 from datetime import datetime
+import array
+import collections
+import ctypes
+import errno
+import functools
+import hashlib
+import importlib
+import itertools
+import json
+import logging
+import math
+import operator
 import os
 import platform
+import posixpath
 import re
+import select
+import signal
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import time
+import weakref
+
+# Modules only some features use (asyncio, tarfile, concurrent.futures, argparse) are
+# imported where they are used, and optional ones (numpy, orjson) through _optional(),
+# so importing osinfo stays cheap for short-lived processes and pool workers.
+
+@functools.lru_cache(maxsize=None)
+def _optional(name):
+    """
+    Optional Import
+
+        Imports an optional module on first use.
+
+    Returns:
+    module: the module, or None if it is not installed
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+def _jsonDumps(obj) -> str:
+    """
+    JSON Dumps
+
+        Compact JSON text, with orjson when it is installed.
+
+    Returns:
+    str: JSON text
+    """
+    lOrjson = _optional('orjson')
+    if lOrjson is not None:
+        return lOrjson.dumps(obj).decode()
+    return json.dumps(obj,separators=(',',':'))
+
+class _DistroData(dict):
+    """
+    Distro Data
+
+        os-release key/value pairs, plus fields already mapped, that distro
+        rule templates are applied to.  Missing keys read as ''; the
+        'debian_version' key reads /etc/debian_version on first use.
+    """
+    __slots__ = ('_osi',)
+
+    def __init__(self,osi,osRelease):
+        dict.__init__(self,osRelease)
+        self._osi   = weakref.ref(osi)              # Weak, so OsInfo objects are not kept in a cycle
+
+    def __missing__(self,key):
+        if key != 'debian_version':
+            return ''
+        lOsi        = self._osi()
+        lOsi._need('debian')
+        value       = lOsi._qnul(lOsi._debianVersion)
+        self[key]   = value
+        return value
+
+class _DistroRule(object):
+    """
+    Distro Rule
+
+        Maps os-release data onto OsInfo fields for one distro.  Each field is
+        a template: literal text, with '{KEY}' naming an os-release key, an
+        earlier field (flavor, release, ...), 'machine' or 'debian_version'.
+        A field may also be a callable taking that data, returning None to
+        leave the field as is.  Templates are compiled when the rule is built.
+    """
+    __slots__ = ('flavor','distrobase','flag','fields','derived','distroSteps','versionSteps')
+
+    _template   = re.compile(r'^\{(\w+)\}$')
+    _defaults   = {
+                    'name'          : '{NAME}',
+                    'prettyname'    : '{PRETTY_NAME}',
+                    'release'       : '{VERSION_ID}',
+                    'codename'      : '{VERSION_CODENAME}',
+                    'flavverflav'   : '{flavor}{release}',
+                    'version'       : '{VERSION_ID}',
+                    'revision'      : '{VERSION}',
+                  }
+    _distroFields   = ('flavor','distrobase','name','prettyname','release','codename','flavverflav')
+    _versionFields  = ('version','revision')
+
+    def __init__(self,flavor,distrobase,flag=None,fields=None,derive=True):
+        unknown         = set(fields or ()) - set(self._defaults)
+        if unknown:
+            raise ValueError('Unknown distro rule fields: {}'.format(', '.join(sorted(unknown))))
+        self.flavor     = flavor
+        self.distrobase = distrobase
+        self.flag       = flag
+        lFields         = dict(self._defaults, flavor=flavor, distrobase=distrobase)
+        lFields.update(fields or ())
+        self.fields     = {field: self._compile(spec) for field, spec in lFields.items()}
+        self.distroSteps    = tuple((field, '_' + field, self.fields[field]) for field in self._distroFields)
+        self.versionSteps   = tuple((field, '_' + field, self.fields[field]) for field in self._versionFields)
+        self.derived    = None
+        if derive:
+            # Rule for distros naming this one in ID_LIKE
+            self.derived    = _DistroRule('{NAME}',distrobase,derive=False)
+
+    @classmethod
+    def _compile(cls,spec):
+        """
+        Compile
+
+        Returns:
+        callable: field value from distro data
+        """
+        if spec is None or callable(spec):
+            return spec or (lambda data: None)
+        match       = cls._template.match(spec)
+        if match:
+            return operator.itemgetter(match.group(1))
+        if '{' in spec:
+            return spec.format_map
+        return lambda data: spec
+
+class _ImageArchive(object):
+    """
+    Image Archive
+
+        A container image: an OCI image layout, or docker save output, as a
+        folder or a tarball.  Lists its layer tarballs, base layer first.
+    """
+
+    def __init__(self,image):
+        import tarfile
+        self._image = image
+        self._tar   = None if os.path.isdir(image) else tarfile.open(image,'r:*')
+
+    def close(self):
+        if self._tar is not None:
+            self._tar.close()
+            self._tar   = None
+
+    def exists(self,name) -> bool:
+        if self._tar is None:
+            return os.path.exists(os.path.join(self._image,name))
+        try:
+            self._tar.getmember(name)
+            return True
+        except KeyError:
+            return False
+
+    def open(self,name):
+        if self._tar is None:
+            return open(os.path.join(self._image,name),'rb')
+        lFile   = self._tar.extractfile(name)
+        if lFile is None:
+            raise OSError("Not a file in image: '{}'".format(name))
+        return lFile
+
+    def json(self,name):
+        with self.open(name) as fh:
+            return json.load(fh)
+
+    def blob(self,digest) -> str:
+        return 'blobs/' + digest.replace(':','/',1)
+
+    def layers(self) -> list:
+        """
+        Layers
+
+            docker save lists layers in manifest.json; an OCI layout goes from
+            index.json to an image manifest, via nested indexes if need be.
+
+        Returns:
+        list: callables opening each layer tarball, base layer first
+        """
+        if self.exists('manifest.json'):
+            lNames      = self.json('manifest.json')[0]['Layers']
+        else:
+            lManifest   = self.json('index.json')
+            while 'manifests' in lManifest:
+                lManifest   = self.json(self.blob(lManifest['manifests'][0]['digest']))
+            lNames      = [self.blob(layer['digest']) for layer in lManifest['layers']]
+        return [lambda name=name: self.open(name) for name in lNames]
+
+class _ImageFiles(object):
+    """
+    Image Files
+
+        Reads files from a stack of layer tarballs, base layer first, as
+        the merged filesystem would show them.  Reads stream layers top
+        layer first, honoring whiteouts and opaque folders, and stop below
+        the layer the file is found in.  Each layer streamed is read whole
+        for every wanted name, and not streamed again, so a detection
+        streams each layer at most once.
+    """
+
+    def __init__(self,layers,names,maxFile,maxLinks):
+        self._layers    = layers                    # Callables opening each layer
+        self._names     = set(name.strip('/') for name in names)
+        self._maxFile   = maxFile
+        self._maxLinks  = maxLinks
+        self._found     = {}                        # path -> bytes, or None if absent
+        self._links     = {}                        # path -> link target path
+        self._scanned   = 0                         # Layers, top first, streamed for every name in _names
+
+    def read(self,name) -> bytes:
+        """
+        Read
+
+        Returns:
+        bytes: file contents (raises FileNotFoundError)
+        """
+        lPath   = name.strip('/')
+        for _ in range(self._maxLinks):
+            if lPath not in self._found and lPath not in self._links:
+                self._scan(lPath)
+            if lPath not in self._links:
+                break
+            lPath   = self._links[lPath]
+        lData   = self._found.get(lPath)
+        if lData is None:
+            raise FileNotFoundError(name)
+        return lData
+
+    def close(self):
+        """
+        Close
+
+            Drops the layers, once the image they come from is closed.  Files
+            not read yet are then absent.
+
+        Returns:
+        none
+        """
+        self._layers    = ()
+
+    def _resolved(self,path) -> bool:
+        return path in self._found or path in self._links
+
+    def _scan(self,target):
+        """
+        Scan
+
+            Streams the layers not scanned yet, top first, until target is
+            found, collecting every wanted name in each layer on the way.  A
+            path whited out in an upper layer is found as None; anything not
+            found in any layer is found as None.  A target not in the wanted
+            names (a symlink's target) is added to them, and the layers are
+            scanned again from the top.
+
+        Returns:
+        none
+        """
+        import tarfile
+        if target not in self._names:
+            self._names.add(target)
+            self._scanned   = 0
+        lPending    = set(path for path in self._names if not self._resolved(path))
+        lLayers     = self._layers[::-1]
+        while self._scanned < len(lLayers) and lPending:
+            opener          = lLayers[self._scanned]
+            self._scanned  += 1
+            lHidden     = []                        # Whiteouts: (path, path prefix)
+            try:
+                with opener() as fh, tarfile.open(fileobj=fh,mode='r|*') as tar:
+                    for member in tar:
+                        lName   = posixpath.normpath(member.name.lstrip('/'))
+                        lBase   = posixpath.basename(lName)
+                        if lBase.startswith('.wh.'):
+                            lDir    = posixpath.dirname(lName)
+                            if lBase == '.wh..wh..opq':
+                                lHidden.append((None, lDir + '/' if lDir else ''))
+                            else:
+                                lPath   = posixpath.join(lDir,lBase[4:])
+                                lHidden.append((lPath, lPath + '/'))
+                            continue
+                        if lName not in lPending:
+                            continue
+                        lPending.discard(lName)
+                        if member.isfile():
+                            self._found[lName]  = tar.extractfile(member).read(self._maxFile)
+                        elif member.issym():
+                            self._links[lName]  = posixpath.normpath(posixpath.join(posixpath.dirname(lName),member.linkname)).lstrip('/')
+                        elif member.islnk():
+                            self._links[lName]  = posixpath.normpath(member.linkname.lstrip('/'))
+                        else:
+                            self._found[lName]  = None
+                        if not lPending:
+                            return
+            except (OSError, tarfile.TarError) as e:
+                print("Error: Could not read image layer: {0}".format(e))
+            for path in list(lPending):
+                for hidden, prefix in lHidden:
+                    if path == hidden or path.startswith(prefix):
+                        self._found[path]   = None
+                        lPending.discard(path)
+                        break
+            if self._resolved(target):
+                return
+        for path in lPending:
+            self._found[path]   = None
+
+class _ProbeWorker(object):
+    """
+    Probe Worker
+
+        Runs the probes of an OsInfo with a timeout (see _needBounded()) on
+        a copy of it, on one daemon thread reused for each batch.  Each
+        probe gets its own timeout, from when it starts.  A worker whose
+        probe hangs is stranded: its thread ends when the probe returns, if
+        ever.  At most _strandedMax are left per process; past that, no new
+        worker is started.  An idle thread ends after _idle seconds, and is
+        started again for the next batch.
+    """
+
+    _countLock      = threading.Lock()              # Held changing _stranded
+    _stranded       = 0                             # Stranded workers whose probe has not returned
+    _strandedMax    = 8                             # Most stranded workers, process wide
+    _idle           = 5.0                           # Seconds an idle thread waits for a batch
+
+    def __init__(self,osi):
+        lClone          = object.__new__(type(osi))
+        lClone.__dict__.update(osi.__dict__)
+        lClone._probed  = set(osi._probed)
+        lClone._timings = {}
+        lClone._lock    = threading.RLock()
+        lClone._timeout = None
+        lClone._status  = {}
+        lClone.__dict__.pop('_probeWorker',None)
+        self.owner      = weakref.ref(osi)          # OsInfo this worker probes for
+        self.clone      = lClone                    # Copy of it the probes run on
+        self._cond      = threading.Condition(threading.Lock())
+        self._task      = None                      # Batch not yet taken by the thread
+        self._current   = None                      # (probe, time.monotonic() it started)
+        self._running   = False                     # Whether the thread is running
+        self._abandoned = False                     # Whether a probe outlived its timeout
+
+    @classmethod
+    def start(cls,osi) -> '_ProbeWorker':
+        """
+        Start
+
+        Returns:
+        _ProbeWorker: new worker for osi, None if _strandedMax are stranded
+        """
+        with cls._countLock:
+            if cls._stranded >= cls._strandedMax:
+                return None
+        return cls(osi)
+
+    def run(self,probes,inputs,status,timeout) -> dict:
+        """
+        Run
+
+            Runs probes in order, each given timeout seconds.  A probe with
+            an input (see inputs) in status, or that failed or timed out
+            here, is not run, and takes its status.  On a timeout the worker
+            is stranded, and the probes after that one are left unrun.
+
+        Returns:
+        dict: probe -> 'done', 'failed', or 'timeout', for each probe resolved, in order
+        """
+        lTask       = {'probes': probes, 'inputs': inputs, 'status': status, 'results': {}, 'done': False}
+        with self._cond:
+            self._task      = lTask
+            self._current   = (probes[0], time.monotonic())
+            if not self._running:
+                self._running   = True
+                threading.Thread(target=self._loop,name='osinfo-probes',daemon=True).start()
+            self._cond.notify_all()
+            while not lTask['done']:
+                lProbe, lStart  = self._current
+                lLeft   = lStart + timeout - time.monotonic()
+                if lLeft <= 0:
+                    self._abandoned = True
+                    with _ProbeWorker._countLock:
+                        _ProbeWorker._stranded += 1
+                    return dict(lTask['results'],**{lProbe: 'timeout'})
+                self._cond.wait(lLeft)
+        return lTask['results']
+
+    def _loop(self):
+        """
+        Loop
+
+            The worker thread: runs each batch handed over, until idle or
+            stranded.
+
+        Returns:
+        none
+        """
+        while True:
+            with self._cond:
+                if self._task is None:
+                    self._cond.wait(self._idle)
+                lTask, self._task   = self._task, None
+                if lTask is None:
+                    self._running   = False
+                    return
+            lStatus     = dict(lTask['status'])
+            for probe in lTask['probes']:
+                with self._cond:
+                    if self._abandoned:
+                        break
+                    self._current   = (probe, time.monotonic())
+                lInputs     = [lStatus[source] for source in lTask['inputs'][probe] if source in lStatus]
+                if lInputs:
+                    lResult = 'timeout' if 'timeout' in lInputs else 'failed'
+                else:
+                    try:
+                        self.clone._need(probe)
+                        lResult = 'done'
+                    except Exception:
+                        lResult = 'failed'
+                if lResult != 'done':
+                    lStatus[probe]  = lResult
+                lTask['results'][probe] = lResult
+            with self._cond:
+                lTask['done']   = True
+                self._cond.notify_all()
+                if self._abandoned:
+                    self._running   = False
+                    with _ProbeWorker._countLock:
+                        _ProbeWorker._stranded -= 1
+                    return
 
 class OsInfo(object):
     """
@@ -41,12 +484,20 @@ class OsInfo(object):
 
     _initialized        = False
     _debug              = False                     
+    _snapshot           = None                      # Published OsInfoSnapshot, see snapshot()
+    _hooks              = ()                        # Trace hooks.  See addHook()
+    _hooksLock          = threading.Lock()
+    _stage              = None                      # Probe running, for debug events
+    _timeout            = None                      # Probe deadline, seconds.  See __init__()
+    _probeWorker        = None                      # _ProbeWorker running probes with a timeout
+    _env                = None                      # OsInfoEnv raw inputs come from; the host's by default
+    _status             = {}                        # Probes that timed out or failed.  See fieldStatus()
 
     # OS Information Properties
                                                     # Desc                                                      Example
                                                     # --------------------------------------------------------- -------------------------------------
     _type               = 'Unknown'                 # OS type                                                   posix, nt, os2, ce, java, riscos
-    _kernel             = 'Unknown'                 # Kernel version
+    _kernel             = ()                        # Kernel version numbers                                    (6,1,0)
     _machine            = 'Unknown'                 # Machine type                                              x86_64
     _distrobase         = 'Unknown'                 # Disto base                                                Windows, Debian, Redhat
     _codename           = 'Unknown'                 # Internal codename                                         skeletor
@@ -57,6 +508,7 @@ class OsInfo(object):
     _version            = 'Unknown'                 # Major/minor version                                       20.04
     _revision           = 'Unknown'                 # Complete version id                                       20.04.6 LTS
     _flavverflav        = 'Unknown'                 # Flavor, Major version, and Minor version, no spaces       Ubuntu20.04
+    _versionKey         = ()                        # Version numbers, for compares                             (20,4,6)
     _desktop            = 'Unknown'                 # Desktop framework                                         Gnome, XFCE, KDE, Windows
 
     _title              = ''                        # Title for reporting header
@@ -74,7 +526,7 @@ class OsInfo(object):
 
     _logEnable          = True                      # Log enable
     _logFile            = None                      # Log file name.  Default={flavverflav}.tct
-    _logChan            = None                      # Log file handle
+    _logLock            = threading.Lock()          # Serializes log writes
 
     # DEBUG DATA
     # Values returned from os.uname
@@ -85,7 +537,7 @@ class OsInfo(object):
     _uname_machine      = 'Unknown'                 # 
     _uname_processor    = 'Unknown'                 # 
     
-    # Values returned from platform.uname
+    # Values returned from platform.uname (os.uname on posix)
     _platform_sysname   = 'Unknown'                 #
     _platform_nodename  = 'Unknown'                 #
     _platform_release   = 'Unknown'                 #
@@ -93,774 +545,4351 @@ class OsInfo(object):
     _platform_machine   = 'Unknown'                 #
     _platform_processor = 'Unknown'                 #
 
+    # Shared instance cache (see current()); stamped on _releaseFiles
+    _currentLock        = threading.Lock()
+    _currentInfo        = None                      # Shared OsInfo instance
+    _currentStamp       = None                      # (pid, release file stats) current instance was built from
+    _currentCheck       = 1.0                       # Seconds current() trusts the shared instance between stamp checks
+    _currentUntil       = 0.0                       # time.monotonic() the shared instance is trusted until
+    _instances          = weakref.WeakSet()         # Every OsInfo, for _afterFork() to replace their locks
+
+    # Async detections in flight (see detectAsync()): (loop, root) -> future
+    _asyncInflight      = {}
+
+    # Persistent cache (see fromCache())
+    _cacheProbes        = ('uname','platform','processor','kernel','system','osrelease','distro','version')
+    _cacheRecord        = ()                        # Fields of a cache record, in order; set below the class
+    _cacheLayout        = ''                        # Digest of _cacheRecord, in the cache key
+    _cacheName          = 'osinfo-cache.json'
+    _bootIdFile         = '/proc/sys/kernel/random/boot_id'
+    _bootIdValue        = None                      # This boot's id, once read
+
+    # Agent (see startAgent(), fromAgent())
+    _agentName          = 'osinfo.sock'
+    _agentPoll          = 1.0                       # Seconds between release file checks
+    _agentTimeout       = 0.5                       # Client connect/reply timeout, seconds
+    _agentRetry         = 0.02                      # Seconds between retries while the agent is not ready
+
+    # Watching (see watch()): what re-running a probe redoes; _fileProbes, below _releaseSources,
+    # maps each release file to the probes reading it
+    _probeDependents    = {
+                            'osrelease' : ('distro','version'),
+                            'debian'    : ('distro','version'),
+                          }
+    _probeState         = {
+                            'debian'    : ('_debianVersion',),
+                            'distro'    : ('_distroRule','_distroData'),
+                          }
+
     
+    # Detection probes, run on first use of a field they set.  probe -> (method, prerequisite probes)
+    _probes             = {
+                            'uname'     : ('_probeUname',       ()),
+                            'platform'  : ('_probePlatform',    ()),
+                            'processor' : ('_probeProcessor',   ()),
+                            'kernel'    : ('_probeKernel',      ('uname','platform')),
+                            'osrelease' : ('_probeOsRelease',   ('system',)),
+                            'debian'    : ('_probeDebian',      ()),
+                            'system'    : ('_probeSystem',      ('uname',)),
+                            'desktop'   : ('_probeDesktop',     ('system',)),
+                            'distro'    : ('_probeDistro',      ('system',)),
+                            'version'   : ('_probeVersion',     ('distro',)),
+                          }
+
+    # Field -> probe that sets it
+    _fieldProbes        = {
+                            '_type'             : 'system',
+                            '_kernel'           : 'kernel',
+                            '_isWindows'        : 'system',
+                            '_isWsl'            : 'system',
+                            '_isPosix'          : 'system',
+                            '_isLinux'          : 'system',
+                            '_isCygwin'         : 'system',
+                            '_machine'          : 'distro',
+                            '_distrobase'       : 'distro',
+                            '_codename'         : 'distro',
+                            '_name'             : 'distro',
+                            '_prettyname'       : 'distro',
+                            '_flavor'           : 'distro',
+                            '_release'          : 'distro',
+                            '_flavverflav'      : 'distro',
+                            '_isDebian'         : 'distro',
+                            '_isUbuntu'         : 'distro',
+                            '_isOpenSuse'       : 'distro',
+                            '_isRedhat'         : 'distro',
+                            '_isCentOS'         : 'distro',
+                            '_version'          : 'version',
+                            '_revision'         : 'version',
+                            '_versionKey'       : 'version',
+                            '_desktop'          : 'desktop',
+                            '_uname_sysname'    : 'uname',
+                            '_uname_nodename'   : 'uname',
+                            '_uname_release'    : 'uname',
+                            '_uname_version'    : 'uname',
+                            '_uname_machine'    : 'uname',
+                            '_uname_processor'  : 'uname',
+                            '_platform_sysname' : 'platform',
+                            '_platform_nodename': 'platform',
+                            '_platform_release' : 'platform',
+                            '_platform_version' : 'platform',
+                            '_platform_machine' : 'platform',
+                            '_platform_processor': 'processor',
+                            '_osRelease'        : 'osrelease',
+                            '_osReleaseFile'    : 'osrelease',
+                            '_osReleaseSources' : 'osrelease',
+                          }
+    _detectProbes       = tuple(sorted(set(_fieldProbes.values()) - {'processor'}))    # detect(): all snapshot() needs; not the processor
+
+    # Raw probe data
+    _root               = None                      # Root filesystem folder, None for the host
+    _rootMaxLinks       = 40                        # Symlinks followed resolving a path under root
+    _files              = None                      # Release files read from an image (_ImageFiles)
+    _imageMaxFile       = 65536                     # Most bytes kept of a file read from an image
+    _osRelease          = None                      # os-release key/value pairs
+    _osReleaseFile      = None                      # Release file that was read first
+    _osReleaseSources   = {}                        # os-release key -> release file it came from
+    _osReleaseFiles     = ('/etc/os-release','/usr/lib/os-release')
+    # Release data sources, most complete first: (file, parser to os-release keys).  Read in order until
+    # _releaseRequired keys are known; later sources only add keys still missing, and only for the same
+    # ID.  Sources sharing a parser are alternatives: only the first found is read.  See _readOsRelease()
+    _releaseSources     = (
+                            ('/etc/os-release',     '_parseOsRelease'),
+                            ('/usr/lib/os-release', '_parseOsRelease'),
+                            ('/etc/lsb-release',    '_parseLsbRelease'),
+                            ('/etc/redhat-release', '_parseRedhatRelease'),
+                            ('/etc/alpine-release', '_parseAlpineRelease'),
+                            ('/etc/SuSE-release',   '_parseSuseRelease'),
+                            ('/etc/debian_version', '_parseDebianVersion'),
+                          )
+    _releaseFiles       = tuple(fileName for fileName, _ in _releaseSources)    # Stamped by current(), the cache, and the agent
+    _fileProbes         = {fileName: ('osrelease','debian') if parser == '_parseDebianVersion' else ('osrelease',)
+                           for fileName, parser in _releaseSources}                 # Every source feeds the release chain
+    _releaseRequired    = ('ID','NAME',('VERSION_ID','BUILD_ID'))   # Tuples are alternatives: rolling distros have BUILD_ID
+    _redhatIds          = (('Red Hat','rhel'),('CentOS','centos'),('Rocky','rocky'),('AlmaLinux','almalinux'),
+                           ('Fedora','fedora'),('Oracle','ol'))
+    _osReleaseLine      = re.compile(rb'^[ \t]*([A-Za-z_][A-Za-z0-9_]*)=(?:"([^"\\\r\n]*)"|([^"\'\\\s][^"\'\\\r\n]*?|)|(.*?))[ \t]*\r?$',re.M)
+    _osReleaseToken     = re.compile(rb'"((?:[^"\\]|\\.)*)"|\'([^\']*)\'|\\(.)|([^"\'\\]+)',re.DOTALL)
+    _osReleaseEscape    = re.compile(rb'\\([$"`\\])')
+    _debianVersion      = None                      # /etc/debian_version contents
+    _cpuinfoKeys        = (b'model name',b'Processor',b'cpu model',b'cpu')    # /proc/cpuinfo keys naming the processor
+
+    # Distro rules: os-release ID -> _DistroRule.  See registerDistro()
+    _distroRules        = {}
+    _distroRule         = None                      # Rule the distro was mapped by
+    _distroData         = None                      # Data the rule was applied to
+
     # OsInfo Constructor
-    def __init__(self):
+    def __init__(self,root=None,timeout=None,env=None):
         """
         OsInfo Object Constructor
 
-            Creates an OsInfo object.
+            Creates an OsInfo object.  Nothing is detected until a property
+            is read; each property runs only the probes it depends on.
+
+            With timeout (seconds), each probe gets that long: probes run on
+            a reused daemon thread, and those not done in time (a hung NFS
+            /etc, say) leave their fields at their defaults, as do the
+            probes needing them.  A read waits at most timeout for each
+            probe it runs.  See fieldStatus().
+
+            With env, raw inputs (os.name, uname, environment variables,
+            files) come from that OsInfoEnv rather than the running host;
+            see OsInfoEnvCapture and OsInfoEnvReplay.
+
+            With root, describes the Linux root filesystem (chroot, mounted
+            disk, unpacked container) under that folder instead of the host:
+            release files are read under root, and host-only data (uname,
+            platform, processor, desktop) is 'n/a'.
+
+            An OsInfo can be shared between threads: each probe runs once,
+            under the object's lock, and its fields are only read by others
+            once it is done.
 
         Returns:
         none
         """
 
         self._initialized       = True
+        self._root              = os.path.abspath(root) if root else None
+        self._probed            = set()             # Probes that have run
+        self._timings           = {}                # Probe -> nanoseconds it took
+        self._lock              = threading.RLock() # Held running probes
+        self._instances.add(self)
+        self._timeout           = timeout           # Seconds a read may wait on probes, None for no limit
+        self._status            = {}                # Probe -> 'timeout' or 'failed', for probes that did not resolve
+        if env is not None:
+            self._env           = env               # Raw inputs, if not the host's
 
-        self._type              = os.name
+    #
+    # Detection Probes
+    #
 
-        # Windows
-        if self._type == 'nt':
+    def _need(self,*probes):
+        """
+        Need
 
-            self._isWindows = True
-            self._type      = 'Windows'
-            self._release   = platform.release()
-            lVersion        = platform.version()
-            match           = re.match(r'^([0-9]+[.][0-9]+).[0-9]+.*',lVersion)
-            if match:
-                self._version   = match.group(1)
-            else:
-                self._version   = lVersion
-        
-            l_uname                     = platform.uname()
-            # os.uname does not exist on Windows python
-            self._uname_sysname         = 'n/a'
-            self._uname_nodename        = 'n/a'
-            self._uname_release         = 'n/a'
-            self._uname_version         = 'n/a'
-            self._uname_machine         = 'n/a'
-            self._uname_processor       = 'n/a'
+            Runs the given probes, and their prerequisites, if they have not
+            run yet.  Probes run under the object's lock, so concurrent
+            callers run each probe once; a probe is marked as run only once
+            all its fields are set, so probes already run need no lock.
 
-            self._platform_sysname     = l_uname.system
-            self._platform_nodename    = l_uname.node
-            self._platform_release     = l_uname.release
-            self._platform_version     = l_uname.version
-            self._platform_machine     = l_uname.machine
-            self._platform_processor   = l_uname.processor
+        Returns:
+        none
+        """
+        if self._timeout is not None:
+            return self._needBounded(probes)
+        for probe in probes:
+            if probe in self._probed:
+                continue
+            with self._lock:
+                if probe in self._probed:
+                    continue
+                method, prereqs = self._probes[probe]
+                self._need(*prereqs)
+                if self._hooks:
+                    self._runHooked(probe,method)
+                else:
+                    lStart  = time.perf_counter_ns()
+                    getattr(self,method)()
+                    self._timings[probe] = time.perf_counter_ns() - lStart
+                self._probed.add(probe)
 
-            self._machine               = self._platform_machine
-            self._name                  = 'Windows'
-            self._distrobase            = 'Windows'
-            self._flavor                = 'Windows'
-            self._revision              = self._platform_version
-            self._flavverflav           = '{0}{1}'.format(self._name,self._release)
-            self._prettyname            = '{0} {1}'.format(self._name,self._version)
+    def _needBounded(self,probes):
+        """
+        Need Bounded
 
-            self._desktop               = 'Windows'
+            _need() with a timeout.  The probes not run yet, prerequisites
+            and the probes they read (see _probeDependents) first, run one at
+            a time on this object's _ProbeWorker, each given timeout seconds;
+            the fields of each probe done are set here.  A probe not done in
+            time keeps its defaults and is marked timed out, as are the
+            probes needing it; its worker is stranded, and later probes get a
+            new one.  A probe that raises, and the
+            probes needing it, are marked failed.  Either way they are not
+            run again.
 
-        # Linux
-        elif self._type == 'posix':
+        Returns:
+        none
+        """
+        lOrder      = []
+        lInputs     = {}                            # probe -> probes it needs or reads
+        def add(probe):
+            if probe not in self._probed and probe not in lOrder:
+                lInputs[probe]  = self._probes[probe][1] + tuple(source for source, dependents
+                                                                 in self._probeDependents.items() if probe in dependents)
+                for prereq in lInputs[probe]:
+                    add(prereq)
+                lOrder.append(probe)
+        for probe in probes:
+            add(probe)
+        if not lOrder or not self._lock.acquire(timeout=self._timeout):
+            return
+        try:
+            lPending    = [probe for probe in lOrder if probe not in self._probed]
+            while lPending:
+                lWorker     = self._probeWorker
+                if lWorker is None or lWorker.owner() is not self:
+                    lWorker     = self._probeWorker = _ProbeWorker.start(self)
+                if lWorker is None:
+                    lResults    = dict.fromkeys(lPending,'timeout')
+                else:
+                    lResults    = lWorker.run(lPending,lInputs,self._status,self._timeout)
+                for probe, result in lResults.items():
+                    if result == 'done':
+                        self._adoptProbe(lWorker.clone,probe)
+                    else:
+                        self._status    = dict(self._status,**{probe: result})
+                    self._probed.add(probe)
+                    if result == 'timeout':
+                        self._probeWorker   = None
+                lPending    = lPending[len(lResults):]
+        finally:
+            self._lock.release()
 
-            self._barfd('Is POSIX')
-            self._isPosix               = True
+    def _adoptProbe(self,clone,probe):
+        """
+        Adopt Probe
 
-            (self._uname_sysname, self._uname_nodename, self._uname_release, self._uname_version, self._uname_machine) = os.uname()
-            l_uname         = platform.uname()
-            self._platform_sysname     = l_uname.system
-            self._platform_nodename    = l_uname.node
-            self._platform_release     = l_uname.release
-            self._platform_version     = l_uname.version
-            self._platform_machine     = l_uname.machine
-            self._platform_processor   = l_uname.processor
+            Sets the fields, and timing, of a probe run on clone here.
 
-            self._uname_sysname     = self._uname_sysname.lower()
+        Returns:
+        none
+        """
+        lFields     = [field for field, fieldProbe in self._fieldProbes.items() if fieldProbe == probe]
+        lFields.extend(self._probeState.get(probe,()))
+        for field in lFields:
+            setattr(self,field,getattr(clone,field))
+        if isinstance(self._distroData,_DistroData):
+            self._distroData._osi   = weakref.ref(self)
+        if probe in clone._timings:
+            self._timings[probe]    = clone._timings[probe]
 
-            # Cygwin
-            if self._uname_sysname.startswith('cygwin'):
-                self._barfd('Is CYGWIN')
-                self._isCygwin      = True
-                self._type          = 'Linux'
-                self._flavor        = 'Cygwin'
-                self._name          = 'Cygwin'
-                self._distrobase    = 'Cygwin'
-                self._machine       = self._uname_machine
-                match           = re.match(r'^([0-9]+).([0-9]+).([0-9.]+)[^0-9.].*$',self._uname_release)
-                if match:
-                    self._release   = match.group(1) + '.' + match.group(2)
-                    self._version   = match.group(1) + '.' + match.group(2) + '.' + match.group(3)
-                    self._revision  = self._version
-                    self._prettyname    = "{0} {1}".format(self._name,self._version)
-                    self._flavverflav   = "{0}{1}".format(self._name,self._release)
-                self._desktop       = 'None'
+    def fieldStatus(self) -> dict:
+        """
+        Field Status
 
-            # Linux
-            elif self._uname_sysname.startswith('linux'):
-                self._barfd('Is LINUX')
-                self._isLinux   = True
-                self._type      = 'Linux'
+            Whether each field (as in snapshot()) was resolved, or left at its
+            default because its probe timed out (see timeout) or failed; or
+            is pending, its probe not yet run.
 
-                self._desktop   = self._getLinuxDesktop()
+        Returns:
+        dict: field -> 'resolved', 'timeout', 'failed', or 'pending'
+        """
+        lStatus     = {}
+        for field in OsInfoSnapshot._fields:
+            probe   = self._fieldProbes['_' + field]
+            lStatus[field]  = self._status.get(probe) or ('resolved' if probe in self._probed else 'pending')
+        return lStatus
 
-                # WSL
-                match = re.match(r'.*WSL.*',self._uname_release)
-                matched = False
-                if match:
-                    self._barfd('Is LINUX WSL')
-                    self._isWsl         = True
-                    self._type          = 'Linux WSL'
-                    lOsRelease          = self._readOsRelease()
-                    self._machine       = self._uname_machine
-                    self._prettyname    = self._qnul(lOsRelease['PRETTY_NAME'])
-                    self._name          = self._qnul(lOsRelease['NAME'])
-                    self._flavor        = self._qnul(lOsRelease['NAME'])
-                    self._release       = self._qnul(lOsRelease['VERSION_ID'])
-                    self._version       = self._qnul(lOsRelease['VERSION'])
-                    self._revision      = self._qnul(lOsRelease['VERSION'])
-                    self._codename      = self._qnul(lOsRelease['VERSION_CODENAME'])
-                    self._distrobase    = self._qnul(lOsRelease['ID_LIKE'])
-                    match2      = re.match(r'^([^()]+) +[(].*',self._version)
-                    if match2:
-                        self._version   = match2.group(1)
-                    self._flavverflav   = '{0}{1}'.format(self._name,self._release)
-                    self._desktop       = 'None'
-                    matched             = True
-
-                # Debian
-                #   > cat /etc/os-release
-                #       PRETTY_NAME="Debian GNU/Linux 11 (bullseye)"
-                #       NAME="Debian GNU/Linux"
-                #       VERSION_ID="11"
-                #       VERSION="11 (bullseye)"
-                #       VERSION_CODENAME=bullseye
-                #       ID=debian
-                #       HOME_URL="https://www.debian.org/"
-                #       SUPPORT_URL="https://www.debian.org/support"
-                #       BUG_REPORT_URL="https://bugs.debian.org/"
-                if not matched:
-                    match = re.match(r'.*Debian.*',self._uname_version)
-                    if match:
-                        self._isDebian      = True
-                        self._barfd('Is LINUX DEBIAN')
-                        lOsRelease      = self._readOsRelease()
-                        self._machine       = self._uname_machine
-                        self._prettyname    = self._qnul(lOsRelease['PRETTY_NAME'])
-                        self._name          = self._qnul(lOsRelease['NAME'])
-                        self._flavor        = 'Debian'
-                        self._release       = self._qnul(lOsRelease['VERSION_ID'])
-                        self._version       = self._qnul(self._readDebianRelease())
-                        self._revision      = self._version
-                        self._codename      = self._qnul(lOsRelease['VERSION_CODENAME'])
-                        self._distrobase    = 'Debian'
-                        self._flavverflav   = '{0}{1}'.format(self._flavor,self._version)
-                        matched             = True
-
-                # Ubuntu
-                #   > cat /etc/os-release
-                #       NAME="Ubuntu"
-                #       VERSION="20.04.6 LTS (Focal Fossa)"
-                #       ID=ubuntu
-                #       ID_LIKE=debian
-                #       PRETTY_NAME="Ubuntu 20.04.6 LTS"
-                #       VERSION_ID="20.04"
-                #       HOME_URL="https://www.ubuntu.com/"
-                #       SUPPORT_URL="https://help.ubuntu.com/"
-                #       BUG_REPORT_URL="https://bugs.launchpad.net/ubuntu/"
-                #       PRIVACY_POLICY_URL="https://www.ubuntu.com/legal/terms-and-policies/privacy-policy"
-                #       VERSION_CODENAME=focal
-                #       UBUNTU_CODENAME=focal
-
-                if not matched:
-                    match = re.match(r'.*Ubuntu.*',self._uname_version)
-                    if match:
-                        self._barfd('Is LINUX UBUNTU')
-                        self._isUbuntu      = True
-                        lOsRelease          = self._readOsRelease()
-                        self._machine       = self._uname_machine
-                        self._prettyname    = self._qnul(lOsRelease['PRETTY_NAME'])
-                        self._name          = self._qnul(lOsRelease['NAME'])
-                        self._flavor        = 'Ubuntu'
-                        self._release       = self._qnul(lOsRelease['VERSION_ID'])
-                        self._version       = self._qnul(self._readDebianRelease())
-                        self._revision      = self._qnul(lOsRelease['VERSION'])
-                        self._codename      = self._qnul(lOsRelease['VERSION_CODENAME'])
-                        self._distrobase    = 'Debian'
-                        self._flavverflav   = '{0}{1}'.format(self._name,self._release)
-                        matched             = True
-
-                # OpenSUSE Tumbleweed 2023.04.11
-                #   > cat /etc/os-release
-                #       NAME="openSUSE Tumbleweed"
-                #       # VERSION="20230411"
-                #       ID="opensuse-tumbleweed"
-                #       ID_LIKE="opensuse suse"
-                #       VERSION_ID="20230411"
-                #       PRETTY_NAME="openSUSE Tumbleweed"
-                #       ANSI_COLOR="0;32"
-                #       CPE_NAME="cpe:/o:opensuse:tumbleweed:20230411"
-                #       BUG_REPORT_URL="https://bugzilla.opensuse.org"
-                #       SUPPORT_URL="https://bugs.opensuse.org"
-                #       HOME_URL="https://www.opensuse.org"
-                #       DOCUMENTATION_URL="https://en.opensuse.org/Portal:Tumbleweed"
-                #       LOGO="distributor-logo-Tumbleweed"
-                if not matched:
-                    lOsRelease      = self._readOsRelease()
-                    if lOsRelease['NAME'].startswith('openSUSE'):
-                        self._barfd('Is LINUX SUSE')
-                        self._isOpenSuse    = True
-                        self._machine       = self._platform_machine
-                        self._distrobase    = 'OpenSUSE'
-                        self._codename      = 'n/a'
-                        self._name          = self._qnul(lOsRelease['NAME'])
-                        self._flavor        = 'OpenSUSE'
-                        match = re.match(r'^openSUSE ([A-Za-z]+)$',self._name)
-                        if match:
-                            self._release       = match.group(1)
-                        self._version       = self._qnul(lOsRelease['VERSION_ID'])
-                        self._revision      = self._qnul(lOsRelease['VERSION_ID'])                      
-                        self._flavverflav   = '{0}{1}'.format(self._flavor,self._release)
-                        self._prettyname    = '{0} {1}'.format(self._qnul(lOsRelease['PRETTY_NAME']),self._version)
-                        matched             = True               
-                        
-                # Unknown Linux, based on uname.  Try using /etc/os-release only...
-                if not matched:
-                    lOsRelease          = self._readOsRelease()
-                    
-                    # CENTOS
-                    #
-                    # cat /etc/os-release
-                    #       NAME="CentOS Stream"
-                    #       VERSION="8"
-                    #       ID="centos"
-                    #       ID_LIKE="rhel fedora"
-                    #       VERSION_ID="8"
-                    #       PLATFORM_ID="platform:el8"
-                    #       PRETTY_NAME="CentOS Stream 8"
-                    #       ANSI_COLOR="0;31"
-                    #       CPE_NAME="cpe:/o:centos:centos:8"
-                    #       HOME_URL="https://centos.org/"
-                    #       BUG_REPORT_URL="https://bugzilla.redhat.com/"
-                    #       REDHAT_SUPPORT_PRODUCT="Red Hat Enterprise Linux 8"
-                    #       REDHAT_SUPPORT_PRODUCT_VERSION="CentOS Stream"
-                    if self._qnul(lOsRelease['ID']) == 'centos':
-                        self._isCentOS      = True
-                        self._machine       = self._uname_machine
-                        self._prettyname    = self._qnul(lOsRelease['PRETTY_NAME'])
-                        self._name          = self._qnul(lOsRelease['NAME'])
-                        self._flavor        = 'CentOS'
-                        self._release       = self._qnul(lOsRelease['VERSION_ID'])
-                        self._version       = self._qnul(lOsRelease['VERSION'])
-                        self._revision      = self._qnul(lOsRelease['VERSION'])
-                        self._codename      = 'n/a'
-                        self._distrobase    = 'Redhat'
-                        self._flavverflav   = '{0}{1}'.format(self._flavor,self._release)
-                        matched             = True
-
-                if not matched:
-                    print('Unknown flavor of linux! {}'.format())
-       
+    def _runHooked(self,probe,method):
+        """
+        Run Hooked
 
-            # Unknown flavor Linux
-            else:
-                #platform_version      #1 SMP Debian 5.10.92-1 (2022-01-18)
+            Runs a probe, timed, with start and stop events sent to the hooks.
 
-                print('osInfo: Cannot map sysname={}'.format(self._uname_sysname))
+        Returns:
+        none
+        """
+        lOuter      = self._stage
+        self._stage = probe
+        self._emit('start',probe,None)
+        lStart      = time.perf_counter_ns()
+        try:
+            getattr(self,method)()
+        finally:
+            lElapsed                = time.perf_counter_ns() - lStart
+            self._timings[probe]    = lElapsed
+            self._stage             = lOuter
+            self._emit('stop',probe,lElapsed)
 
-    #
-    # Private Methods
-    #
-   
-    def _logInit(self):
+    def _emit(self,event,stage,value):
         """
-        Log Init
+        Emit
 
-            Initialize Log file
+            Sends an event to each hook.  A failing hook does not stop detection.
 
         Returns:
         none
         """
-        if self._logEnable:
+        for hook in self._hooks:
             try:
-                self._logChan   = open(self.logFile(),'w')
-
-            except FileNotFoundError:
-                print("Error: Log File '{0}' not found.".format(self._logFile))
-            except IOError:
-                print("Error: Could not open Log file '{0}'.".format(self._logFile))        
+                hook(event,self,stage,value)
+            except Exception as e:
+                print("Error: OsInfo hook {0!r} failed: {1}".format(hook,e))
 
-    def _logOpen(self):
+    def timings(self) -> dict:
         """
-        Log Open
+        Timings
 
-            Open log file for writing, if it isn't already
+            Time each probe that has run took, in nanoseconds, from the
+            monotonic high resolution clock.  A probe's time includes any
+            probe it needed part way through; prerequisites run first are
+            timed on their own.  Probes loaded from the cache are not listed.
 
         Returns:
-        none
+        dict: probe -> nanoseconds
         """
-        if self._logEnable and self._logChan is None:
-            self._logChan     = open(self.logFile(),"a")
+        return dict(self._timings)
 
-    def _logClose(self):
+    @classmethod
+    def addHook(cls,hook):
         """
-        Log Close
+        Add Hook
+
+            Registers a trace hook for every OsInfo, called as
+            hook(event, osi, stage, value) with events:
+
+                'start'     probe stage is starting                 value None
+                'stop'      probe stage is done                     value nanoseconds taken
+                'debug'     debug message from stage (or None)      value message text
 
-            Close log file
+            See OsInfoLogHook and OsInfoSpanHook.  With no hooks, probes are
+            only timed.
 
         Returns:
         none
         """
-        if self._logChan:
-            self._logChan.close()
-            self._logChan   = None
+        with OsInfo._hooksLock:
+            OsInfo._hooks   = OsInfo._hooks + (hook,)
 
-    def _logWrite(self,text):
+    @classmethod
+    def removeHook(cls,hook):
         """
-        Log Write 
-
-            Write text to log file
+        Remove Hook
 
         Returns:
         none
-        """ 
-        if self._logEnable:
-            self._logChan.write(text + "\n")
+        """
+        with OsInfo._hooksLock:
+            OsInfo._hooks   = tuple(h for h in OsInfo._hooks if h is not hook)
 
-    def _barf(self,text):
+    def _field(self,field):
         """
-        Barf 
+        Field
 
-            Print and log text
+            Returns the value of a field, running its probe first if needed.
 
         Returns:
-        none
+        any: field value
         """
-        print(text)
-        self._logWrite(text)
+        probe   = self._fieldProbes.get(field)
+        if probe is not None and probe not in self._probed:
+            self._need(probe)
+        return getattr(self,field)
 
-    def _barfd(self,text):
+    def _probeUname(self):
         """
-        Barf Debug
+        Probe Uname
 
-            Print text, if debug is enabled
+            Collects os.uname values.  os.uname does not exist on Windows python.
 
         Returns:
         none
         """
-        if self._debug:
-            print("#DEBUG# {}".format(text))
+        if self._root or self._env.osName() == 'nt':
+            self._uname_sysname         = 'n/a'
+            self._uname_nodename        = 'n/a'
+            self._uname_release         = 'n/a'
+            self._uname_version         = 'n/a'
+            self._uname_machine         = 'n/a'
+            self._uname_processor       = 'n/a'
+        else:
+            (self._uname_sysname, self._uname_nodename, self._uname_release, self._uname_version, self._uname_machine) = self._env.uname()
+            self._uname_sysname         = self._uname_sysname.lower()
 
-    def _readOsRelease(self) -> dict:
+    def _probePlatform(self):
         """
-        Read OS Release File
+        Probe Platform
 
-            Reads os-relase file in etc folder to get relase data, as a
-            dictionary of key/value pairs.
+            Collects platform.uname values.  On posix these are the os.uname
+            values; platform.uname is not used there as some Pythons run a
+            'uname -p' subprocess for it.
 
         Returns:
-        dictionary: releaseInfo    key-value pairs
+        none
         """
-        lDict       = {}
-        try:
-            releaseFile = '/etc/os-release'
-            with open(releaseFile,'r') as fh:
-                for line in fh:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    key, value = line.split('=',1)
-                    lDict[key]  = value.replace('"','')
-        except FileNotFoundError:
-            print("Error: File '{0}' not found.".format(releaseFile))
-        except IOError:
-            print("Error: Could not open file '{0}'.".format(releaseFile))
-
-        return lDict
+        if self._root:
+            self._platform_sysname  = 'n/a'
+            self._platform_nodename = 'n/a'
+            self._platform_release  = 'n/a'
+            self._platform_version  = 'n/a'
+            self._platform_machine  = 'n/a'
+        else:
+            l_uname                 = self._env.uname() if self._env.osName() == 'posix' else self._env.platformUname()
+            (self._platform_sysname, self._platform_nodename, self._platform_release,
+             self._platform_version, self._platform_machine) = l_uname
 
-    def _readDebianRelease(self) -> str:
+    def _probeProcessor(self):
         """
-        Read Debian Release
+        Probe Processor
 
-            Reads debian_version file in etc folder to determine release number
+            Determines processor name without a subprocess: PROCESSOR_IDENTIFIER
+            on Windows, /proc/cpuinfo on Linux, else the machine type.
 
         Returns:
-        str: Debian release number
+        none
         """
-        retval  = 'Unknown'
-        releaseFile = '/etc/debian_version'
-        try:
-            with open(releaseFile,'r') as fh:
-                retval = fh.readline().strip()
-        except FileNotFoundError:
-            print("Error: File '{0}' not found.".format(releaseFile))
-        except IOError:
-            print("Error: Could not open file '{0}'.".format(releaseFile))
-
-        return retval
+        lProcessor  = ''
+        if self._root:
+            lProcessor  = 'n/a'
+        elif self._env.osName() == 'nt':
+            lProcessor  = self._env.getenv('PROCESSOR_IDENTIFIER') or ''
+        else:
+            try:
+                lLine       = self._cpuinfoLine(self._env.readFile('/proc/cpuinfo',self._cpuinfoNames))
+                lProcessor  = lLine.partition(b':')[2].decode('utf-8','replace').strip()
+            except OSError:
+                pass
+            if not lProcessor:
+                lProcessor  = self._env.uname()[4]
+        self._platform_processor    = lProcessor
 
-    def _getLinuxDesktop(self) -> str:
+    @classmethod
+    def _cpuinfoLine(cls,data) -> bytes:
         """
-        Get Linux Desktop
+        Cpuinfo Line
 
-            Determines what Linux Desktop is being used
+            The first /proc/cpuinfo line naming the processor.
 
         Returns:
-        str: Type of Desktop (Gnome,XFCE,KDE,etc), or 'Unknown'
+        bytes: line, with its newline, or b''
         """
-        retval          = 'Unknown'
-        xdgDesktop      = os.environ.get('XDG_CURRENT_DESKTOP')
-        if xdgDesktop:
-            if (re.match(r'.*GNOME.*',xdgDesktop)):
-                retval      = 'Gnome'
-            if (re.match(r'.*XFCE.*',xdgDesktop)):
-                retval      = 'XFCE'
-            if (re.match(r'.*KDE.*',xdgDesktop)):
-                retval      = 'KDE'
-        return retval
-
-    def _qnul(self,value) -> str:
-        retval = value
-        if not retval:
-            retval  = ''
-        return retval
+        for line in data.splitlines():
+            if cls._cpuinfoNames(line):
+                return line + b'\n'
+        return b''
 
-    #
-    # Public Properties - Getters
-    #
-    def type(self) -> str:
+    @classmethod
+    def _cpuinfoNames(cls,line) -> bool:
         """
-        OS Type
-        
+        Cpuinfo Names
+
         Returns:
-        str:    OS type         (ex:posix, nt, os2, ce, java, riscos,default:Unknown)
+        bool: True if a /proc/cpuinfo line names the processor
         """
-        return self._type
+        key, sep, value = line.partition(b':')
+        return bool(sep) and key.strip() in cls._cpuinfoKeys
 
-    def kernel(self) -> str:
+    def _probeKernel(self):
         """
-        OS Kernel
-        
+        Probe Kernel
+
+            Parses the kernel release, from os.uname (platform version on
+            Windows), into numbers: '6.1.0-18-amd64' -> (6,1,0).  Root
+            filesystems have no running kernel, and are left empty.
+
         Returns:
-        str:    OS kernel       (as reported by ???,default:Unknown)
+        none
         """
-        return self._kernel
-        
-    def machine(self) -> str:
+        if not self._root:
+            self._kernel    = _parseVersion(self._platform_version if self._env.osName() == 'nt' else self._uname_release)
+
+    def _probeOsRelease(self):
         """
-        Machine Type
-        
+        Probe OS Release
+
+            Reads release data, once per detection.  Only Linux has any.
+
         Returns:
-        str:    Machine type    (ex:_x86_64,default:Unknown)
+        none
         """
-        return self._machine
-        
-    def distrobase(self) -> str:
+        if self._isLinux:
+            (self._osReleaseFile, self._osRelease, self._osReleaseSources) = self._readOsRelease()
+        else:
+            self._osRelease     = {}
+
+    def _probeDebian(self):
         """
-        OS Distro Base
-   
+        Probe Debian
+
+            Reads /etc/debian_version, once per detection.
+
         Returns:
-        str:    OS distro base  (ex:Debian,Redhat,default:Unknown)
+        none
         """
-        return self._distrobase
-        
-    def codename(self) -> str:
+        self._debianVersion = self._readDebianRelease()
+
+    def _probeSystem(self):
         """
-        OS Codename
-   
+        Probe System
+
+            Determines OS type: Windows, Cygwin, Linux, or Linux WSL.
+
         Returns:
-        str:    OS codename     (ex:Buster,Sid,Focal,default:Unknown)
+        none
         """
-        return self._codename
+        self._type              = self._env.osName()
 
-    def name(self) -> str:
+        # Root filesystem
+        if self._root:
+            self._barfd('Is ROOT {}'.format(self._root))
+            self._isPosix       = True
+            self._isLinux       = True
+            self._type          = 'Linux'
+
+        # Windows
+        elif self._type == 'nt':
+            self._isWindows     = True
+            self._type          = 'Windows'
+
+        # Posix
+        elif self._type == 'posix':
+            self._barfd('Is POSIX')
+            self._isPosix       = True
+
+            # Cygwin
+            if self._uname_sysname.startswith('cygwin'):
+                self._barfd('Is CYGWIN')
+                self._isCygwin  = True
+                self._type      = 'Linux'
+
+            # Linux
+            elif self._uname_sysname.startswith('linux'):
+                self._barfd('Is LINUX')
+                self._isLinux   = True
+                self._type      = 'Linux'
+
+                # WSL
+                match = re.match(r'.*WSL.*',self._uname_release)
+                if match:
+                    self._barfd('Is LINUX WSL')
+                    self._isWsl = True
+                    self._type  = 'Linux WSL'
+
+            # Unknown flavor Linux
+            else:
+                #platform_version      #1 SMP Debian 5.10.92-1 (2022-01-18)
+
+                print('osInfo: Cannot map sysname={}'.format(self._uname_sysname))
+
+    def _probeDesktop(self):
         """
-        OS Name
+        Probe Desktop
+
+            Determines the desktop framework.
 
-           OS name as reported by OS.
-        
         Returns:
-        str:    OS name         (ex:Debian,Ubuntu,Windows,default:Unknown)
+        none
         """
-        return self._flavor
+        if self._root:
+            self._desktop   = 'n/a'
+        elif self._isWindows:
+            self._desktop   = 'Windows'
+        elif self._isCygwin or self._isWsl:
+            self._desktop   = 'None'
+        elif self._isLinux:
+            self._desktop   = self._getLinuxDesktop()
 
-    def flavor(self) -> str:
+    def _probeDistro(self):
         """
-        OS Flavor
+        Probe Distro
+
+            Determines the distribution: name, flavor, release, codename, etc.
 
-           OS name for use in compares, simple and consistent
-        
         Returns:
-        str:    OS flavor       (Debian,Ubuntu,default:Unknown)
+        none
         """
-        return self._flavor
-        
-     
-    def release(self) -> str:
+
+        # Windows
+        if self._isWindows:
+
+            self._need('platform')
+            self._release   = self._platform_release
+            lVersion        = self._platform_version
+            match           = re.match(r'^([0-9]+[.][0-9]+).[0-9]+.*',lVersion)
+            if match:
+                self._version   = match.group(1)
+            else:
+                self._version   = lVersion
+
+            self._machine               = self._platform_machine
+            self._name                  = 'Windows'
+            self._distrobase            = 'Windows'
+            self._flavor                = 'Windows'
+            self._revision              = self._platform_version
+            self._flavverflav           = '{0}{1}'.format(self._name,self._release)
+            self._prettyname            = '{0} {1}'.format(self._name,self._version)
+
+        # Cygwin
+        elif self._isCygwin:
+            self._flavor        = 'Cygwin'
+            self._name          = 'Cygwin'
+            self._distrobase    = 'Cygwin'
+            self._machine       = self._uname_machine
+            match           = re.match(r'^([0-9]+).([0-9]+).([0-9.]+)[^0-9.].*$',self._uname_release)
+            if match:
+                self._release   = match.group(1) + '.' + match.group(2)
+                self._version   = match.group(1) + '.' + match.group(2) + '.' + match.group(3)
+                self._revision  = self._version
+                self._prettyname    = "{0} {1}".format(self._name,self._version)
+                self._flavverflav   = "{0}{1}".format(self._name,self._release)
+
+        # WSL
+        elif self._isWsl:
+            self._need('osrelease')
+            self._applyDistroRule(self._wslRule)
+
+        # Linux
+        #   Mapped by os-release ID through the distro rule table; see
+        #   registerDistro() and the rules at the end of this file.
+        elif self._isLinux:
+            self._need('osrelease')
+            lId             = self._osRelease.get('ID','')
+            lRule           = self._distroRules.get(lId)
+            if lRule is None:
+                lRule       = self._genericRule
+                for like in self._osRelease.get('ID_LIKE','').split():
+                    lParent = self._distroRules.get(like)
+                    if lParent is not None:
+                        lRule   = lParent.derived
+                        break
+                if not lId:
+                    print('Unknown flavor of linux! {}'.format(self._uname_version))
+            if self._debug or self._hooks:
+                self._barfd('Is LINUX {} by os-release ID={}'.format(lRule.flavor,lId))
+            self._applyDistroRule(lRule)
+
+    def _applyDistroRule(self,rule,version=False):
         """
-        OS Release
+        Apply Distro Rule
+
+            Sets the distro fields, or with version the version fields, from a
+            distro rule's compiled templates.  Rule flags are set with the
+            distro fields.
 
-           OS major version ID for use in compares, simple and consistent
-        
         Returns:
-        str:    OS release      (11,default:Unknown)
+        none
         """
-        return self._release
+        if self._distroRule is not rule:
+            self._distroRule    = rule
+            self._distroData    = _DistroData(self,self._osRelease)
+            self._distroData['machine'] = self._uname_machine
+            self._machine       = self._uname_machine
+            if rule.flag:
+                setattr(self,rule.flag,True)
+        lData           = self._distroData
+        for field, attr, get in (rule.versionSteps if version else rule.distroSteps):
+            value       = get(lData)
+            if value is not None:
+                setattr(self,attr,value)
+                lData[field]    = value
 
-    def version(self) -> str:
+    def _probeVersion(self):
         """
-        OS Version
+        Probe Version
+
+            Determines version and revision.  For Linux these come from the
+            distro rule, and may read /etc/debian_version; the rest are set by
+            the distro probe.
 
-           OS major and minor version ID for use in compares, simple and consistent
-        
         Returns:
-        str:    OS version      (11.2,default:Unknown)
+        none
         """
-        return self._version
-                
-    def revision(self) -> str:
+        if self._distroRule is not None:
+            self._applyDistroRule(self._distroRule,True)
+        self._versionKey    = _versionKey(self._release,self._version,self._revision)
+
+    def detect(self) -> 'OsInfo':
         """
-        OS Revision
+        Detect
+
+            Runs every probe snapshot() needs now, rather than on first use.
+            The processor name, which snapshots do not keep, is still read
+            on first use.
 
-           OS complete major,minor, and revision ID
-        
         Returns:
-        str:    OS revision     (20.04 LTS,10.0.32412,default:Unknown)
+        object: OsInfo          self
         """
-        return self._revision
-        
-    def flavverflav(self) -> str:
+        self._need(*self._detectProbes)
+        return self
+
+    def snapshot(self) -> 'OsInfoSnapshot':
         """
-        OS Flavaflav (Yo!)
+        Snapshot
+
+            Detects every field, and returns them as an immutable record.
+            The record is made once, and shared; safe to hand to other
+            threads.
 
-           OS name, major, and minor versions, sans spaces, for use in compares,
-           simple and consistent
-        
         Returns:
-        str:    OS flavaflav    (Debian11.0,Ubuntu20.04,Windows10.0,default:Unknown)
+        object: OsInfoSnapshot  OS Information Snapshot
         """
-        return self._flavverflav
+        lSnapshot   = self._snapshot
+        if lSnapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self.detect()
+                    self._snapshot  = OsInfoSnapshot(tuple(getattr(self,'_' + field) for field in OsInfoSnapshot._fields))
+                lSnapshot   = self._snapshot
+        return lSnapshot
 
-    def desktop(self) -> str:
+    @classmethod
+    def registerDistro(cls,id,flavor,distrobase,flag=None,**fields):
         """
-        OS Desktop
+        Register Distro
+
+            Adds, or replaces, the rule mapping a distro's os-release data onto
+            OsInfo fields.  Distros are looked up by os-release ID; distros
+            with no rule of their own use the first rule named in ID_LIKE, but
+            keep their own NAME as flavor.
+
+            Fields (name, prettyname, release, codename, flavverflav, version,
+            revision) are templates like '{VERSION_ID}', or callables taking
+            the os-release data.  See _DistroRule.
+
+            ex: OsInfo.registerDistro('amzn','Amazon','Redhat',codename='n/a')
 
-           For systems that are not headless, the kind of desktop environment
-           being used.
-        
         Returns:
-        str:    OS desktop      (ex:Gnome,XFCE,KDE,Windows,default:Unknown)
+        none
         """
-        return self._desktop
-      
-    def title(self) -> str:
+        if flag is not None and (not flag.startswith('_is') or cls._fieldProbes.get(flag) != 'distro'):
+            raise ValueError('Not a distro flag: {}'.format(flag))
+        cls._distroRules[id]    = _DistroRule(flavor,distrobase,flag,fields)
+
+    def __getstate__(self) -> dict:
         """
-        Title
+        Get State
+
+            Pickle support.  Detects every field first, as the distro rule
+            used to map them, and any image being read, are not sent along.
 
-           Title to be used for output header.  Default={prettyname}
-        
         Returns:
-        str:    Title           
+        dict: object state
         """
-        if not self._title:
-            self._title     = self._prettyname
-        return self._title
+        self.detect()
+        lState  = dict(self.__dict__)
+        lState.pop('_distroRule',None)
+        lState.pop('_distroData',None)
+        lState.pop('_files',None)
+        lState.pop('_lock',None)
+        lState.pop('_probeWorker',None)
+        return lState
 
-    def logFile(self) -> str:
+    def __setstate__(self,state):
         """
-        Log File 
+        Set State
 
-            Log File Name
+            Pickle support.
 
         Returns:
         none
         """
-        if self._logFile is None:
-            default_folder  = '.testout'
-            self._logFile   = '.'
-            if os.path.exists(default_folder):
-                self._logFile   = default_folder
-            self._logFile   = self._logFile + '/osinfo-testout-' + self._flavverflav + '.txt'
+        self.__dict__.update(state)
+        self._lock  = threading.RLock()
+        self._instances.add(self)
 
-        return self._logFile
+    #
+    # Container Images
+    #
 
-    # Logical Properties
+    @classmethod
+    def fromImage(cls,image) -> 'OsInfo':
+        """
+        From Image
 
-    def isWindows(self) -> bool:
+            Describes the base OS of a container image, without extracting it.
+            image is an OCI image layout (folder or tarball), or a docker save
+            tarball.  Layer tarballs are streamed top layer first, gzip or not,
+            honoring whiteouts, and reading stops once the release files
+            needed have been found.  Only release files are kept in memory.
+            Detection is done before returning, while the image is open.
+
+        Returns:
+        object: OsInfo          OS Information Object, as with OsInfo(root=image)
         """
-        Is Windows
+        lArchive    = _ImageArchive(image)
+        lInfo       = None
+        try:
+            lInfo   = cls.fromLayers(lArchive.layers(),root=image).detect()
+            return lInfo
+        finally:
+            if lInfo is not None:
+                lInfo._files.close()
+            lArchive.close()
+
+    @classmethod
+    def fromLayers(cls,layers,root=None) -> 'OsInfo':
+        """
+        From Layers
+
+            Describes the OS of a stack of layer tarballs, base layer first.
+            Each layer is a path, or a callable returning an open binary file.
+            Layers are read as release files are needed.
 
         Returns:
-        bool:   isWindows       (true/false)
+        object: OsInfo          OS Information Object, as with OsInfo(root=...)
         """
-        return self._isWindows
+        lOpeners    = [layer if callable(layer) else (lambda path=layer: open(path,'rb')) for layer in layers]
+        lInfo       = cls(root=root or '<layers>')
+        lInfo._files    = _ImageFiles(lOpeners,cls._releaseFiles,cls._imageMaxFile,cls._rootMaxLinks)
+        return lInfo
 
-    def isWsl(self) -> bool:
+    #
+    # Root Filesystem Scanning
+    #
+
+    @classmethod
+    def scanRoots(cls,roots,workers=8,processes=False):
         """
-        Is Windows Subystem for Linux
+        Scan Roots
+
+            Detects the OS of many root filesystems (see OsInfo(root=...)),
+            on a pool of worker threads, or processes.  Results are yielded as
+            they complete, not in input order, and roots are fed to the pool a
+            few at a time, so roots can be a generator of any length.
 
         Returns:
-        bool:   isWsl           (true/false)
+        iterator: (root, OsInfo) tuples
         """
-        return self._isWsl
+        import concurrent.futures
+        lPoolClass  = concurrent.futures.ProcessPoolExecutor if processes else concurrent.futures.ThreadPoolExecutor
+        lRoots      = iter(roots)
+        lWindow     = max(1,workers) * 4
+        with lPoolClass(max_workers=max(1,workers)) as pool:
+            lPending    = set()
+            while True:
+                for root in lRoots:
+                    lPending.add(pool.submit(_scanRoot,cls,root))
+                    if len(lPending) >= lWindow:
+                        break
+                if not lPending:
+                    break
+                lDone, lPending = concurrent.futures.wait(lPending,return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in lDone:
+                    yield future.result()
 
-    def isPosix(self) -> bool:
+    #
+    # Asyncio
+    #
+
+    @classmethod
+    async def detectAsync(cls,root=None) -> 'OsInfo':
         """
-        Is Posix (Linux or Unix)
+        Detect Async
+
+            Detects off the event loop, on the loop's default executor, so
+            file reads do not stall it.  Concurrent callers for the same root
+            share one detection.  With no root, detects the shared host
+            object (see current()).
 
         Returns:
-        bool:   isPosix         (true/false)
+        object: OsInfo          OS Information Object, fully detected
         """
-        return self.isPosix
+        import asyncio
+        lLoop       = asyncio.get_running_loop()
+        lKey        = (lLoop, os.path.abspath(root) if root else None)
+        lFuture     = cls._asyncInflight.get(lKey)
+        if lFuture is None:
+            lFuture = lLoop.run_in_executor(None,_detectRoot,cls,root)
+            cls._asyncInflight[lKey]    = lFuture
+            lFuture.add_done_callback(lambda future: cls._asyncInflight.pop(lKey,None))
+        # Shielded, so one caller being cancelled does not cancel the others
+        return await asyncio.shield(lFuture)
 
-    def isLinux(self) -> bool:
+    @classmethod
+    async def detectManyAsync(cls,roots,limit=8) -> list:
         """
-        Is Linux
+        Detect Many Async
+
+            Detects many roots (see OsInfo(root=...)) with detectAsync, at
+            most limit at a time.
 
         Returns:
-        bool:   isLinux         (true/false)
+        list: OsInfo objects, in roots order
         """
-        return self.isLinux
+        import asyncio
+        lLimit      = asyncio.Semaphore(max(1,limit))
+        async def detect(root):
+            async with lLimit:
+                return await cls.detectAsync(root)
+        return await asyncio.gather(*(detect(root) for root in roots))
 
-    def isCygwyn(self) -> bool:
+    #
+    # Shared Instance
+    #
+
+    @classmethod
+    def current(cls,persist=False) -> 'OsInfo':
         """
-        Is Cygwin
+        Current OsInfo
+
+            Returns the process-wide shared OsInfo object, detecting only on
+            first use.  The shared object is rebuilt when a release file has
+            changed (mtime/inode), checked at most every _currentCheck
+            seconds; refresh() rebuilds it now.  A forked child keeps it (see
+            _afterFork()); pool workers can be handed it (see initWorker()).
+            With persist, it is built from the on-disk cache (see
+            fromCache()).
 
         Returns:
-        bool:   isCygwin        (true/false)
+        object: OsInfo          Shared OS Information Object
         """
-        return self._isCygwin
+        lInfo       = cls._currentInfo
+        if lInfo is not None and time.monotonic() < cls._currentUntil:
+            return lInfo
+        lStamp      = cls._stamp()
+        with cls._currentLock:
+            if cls._currentInfo is None or cls._currentStamp != lStamp:
+                cls._currentInfo    = cls._cacheGet(None,lStamp) if persist else cls()
+                cls._currentStamp   = lStamp
+            cls._currentUntil   = time.monotonic() + cls._currentCheck
+            return cls._currentInfo
 
-    def isDebian(self) -> bool:
+    @classmethod
+    def refresh(cls) -> 'OsInfo':
         """
-        Is Debian
+        Refresh
+
+            Discards the shared OsInfo object and detects again.
 
         Returns:
-        bool:   isDebian        (true/false)
+        object: OsInfo          Shared OS Information Object
         """
-        return self._isDebian
-    
-    def isUbuntu(self) -> bool:
+        with cls._currentLock:
+            cls._currentInfo    = None
+            cls._currentStamp   = None
+            cls._currentUntil   = 0.0
+        return cls.current()
+
+    @classmethod
+    def _stamp(cls) -> tuple:
         """
-        Is Ubuntu
+        Stamp
+
+            Identifies the inputs of a detection: the process id, and the
+            inode/mtime of each release file.
 
         Returns:
-        bool:   isUbuntu        (true/false)
+        tuple: stamp            (pid, ((inode,mtime) or None, ...))
         """
-        return self._isUbuntu
+        lStats      = []
+        for releaseFile in cls._releaseFiles:
+            try:
+                st  = os.stat(releaseFile)
+                lStats.append((st.st_ino, st.st_mtime_ns))
+            except OSError:
+                lStats.append(None)
+        return (os.getpid(), tuple(lStats))
 
-    def isOpenSuse(self) -> bool:
+    @classmethod
+    def workerState(cls) -> bytes:
         """
-        Is OpenSUSE
+        Worker State
+
+            The shared object's detection (see current()), compact, with the
+            release file stats it was made from, for handing to worker
+            processes through initWorker().
 
         Returns:
-        bool:   isOpenSuse      (true/false)
+        bytes: worker state
         """
-        return self._isOpenSuse
+        lRecord     = cls.current()._cacheFields()
+        return _jsonDumps([cls._cacheKey()] + lRecord).encode()
 
-    def isRedhat(self) -> bool:
+    @classmethod
+    def initWorker(cls,state):
         """
-        Is Redhat
+        Init Worker
+
+            Pool initializer: makes the parent's detection (workerState())
+            this process's shared object, so current() need not probe.  If
+            a release file has changed since, state is ignored and current()
+            detects as usual.
+
+            ex: ProcessPoolExecutor(initializer=OsInfo.initWorker,initargs=(OsInfo.workerState(),))
+                ProcessPoolExecutor(**OsInfo.poolArgs())
 
         Returns:
-        bool:   isRedhat       (true/false)
+        none
         """
-        return self._isRedhat
+        try:
+            lState  = json.loads(state)
+            lStamp  = cls._stamp()
+            if lState[0] != cls._cacheKey(lStamp):
+                return
+            lInfo   = cls._fromCacheFields(lState[1:])
+        except (ValueError, IndexError, KeyError, TypeError):
+            return
+        if lInfo is not None:
+            with cls._currentLock:
+                cls._currentInfo    = lInfo
+                cls._currentStamp   = lStamp
 
-    def isCentOS(self) -> bool:
+    @classmethod
+    def poolArgs(cls) -> dict:
         """
-        Is CentOS
+        Pool Args
+
+            Initializer arguments for a ProcessPoolExecutor or
+            multiprocessing.Pool, handing workers this process's detection.
+
+            ex: ProcessPoolExecutor(max_workers=8,**OsInfo.poolArgs())
 
         Returns:
-        bool:   isCentOS       (true/false)
+        dict: initializer, initargs
         """
-        return self._isCentOS
+        return {'initializer': cls.initWorker, 'initargs': (cls.workerState(),)}
 
-    #
-    # Public Properties - Setters
-    #
-    def setTitle(self,title):
+    @staticmethod
+    def _afterFork():
         """
-        Set Title
-        
+        After Fork
+
+            Runs in a forked child.  Class locks, and the lock of every
+            OsInfo, which another thread of the parent may have held, are
+            replaced; async detections in flight belong to the parent's loop,
+            and probe workers to its threads, and are dropped.  The shared object is kept, restamped for this
+            process, so current() goes on using it unless a release file has
+            changed.
+
         Returns:
         none
         """
-        self._title     = title
-
+        OsInfo._currentLock     = threading.Lock()
+        OsInfo._logLock         = threading.Lock()
+        OsInfo._hooksLock       = threading.Lock()
+        OsInfo._asyncInflight   = {}
+        _ProbeWorker._countLock = threading.Lock()
+        _ProbeWorker._stranded  = 0
+        for lInfo in list(OsInfo._instances):
+            lInfo._lock             = threading.RLock()
+            lInfo.__dict__.pop('_probeWorker',None)
+        if OsInfo._currentInfo is not None:
+            OsInfo._currentStamp    = (os.getpid(),) + OsInfo._currentStamp[1:]
 
     #
-    # Public Methods
+    # Persistent Cache
     #
 
-    def Dump(self):
+    @classmethod
+    def fromCache(cls,folder=None) -> 'OsInfo':
         """
-        Dump
+        From Cache
+
+            Returns an OsInfo object loaded from the on-disk cache, for fast
+            startup of short-lived tools.  On a miss, detects and stores the
+            result.  Entries are keyed by boot id, kernel release, and release
+            file mtimes; anything that does not match, or does not parse, is
+            ignored.  Desktop is not cached, as it comes from the environment.
 
-          Print values of all public properties
+            Default folder: $XDG_CACHE_HOME/osinfo, or ~/.cache/osinfo
 
         Returns:
-        none
+        object: OsInfo          OS Information Object
         """
-       
-        self._logInit()
+        return cls._cacheGet(folder,cls._stamp())
 
-        outfmt="{0:21} {1:30}"
-        dashes=outfmt.format("-"*21,"-"*30)
-        print("="*80)
-        print('{}'.format(self._qnul(self.title())))
-        print("="*80)
-        print("OS INFO")
-        print(dashes)
-        print(outfmt.format("currdate",datetime.now().strftime("%Y.%m.%d")))
-        print(outfmt.format("type",self._type))
-        print(outfmt.format("kernel",self._kernel))
-        print(outfmt.format("machine",self._machine))
-        print(outfmt.format("distrobase",self._distrobase))
-        print(outfmt.format("codename",self._codename))
-        print(outfmt.format("name",self._name))
-        print(outfmt.format("prettyname",self._prettyname))
-        print(outfmt.format("flavor",self._flavor))
-        print(outfmt.format("release",self._release))
-        print(outfmt.format("version",self._version))
-        print(outfmt.format("revision",self._revision))
-        print(outfmt.format("flaverflav",self._flavverflav))
-        print(outfmt.format("desktop",self._desktop))
-        outfmt="{0:21} {1}"                                         # :30 causes bools to print as ints, and not T/F ?
-        print(outfmt.format("isWindows",self._isWindows))
-        print(outfmt.format("isWsl",self._isWsl))
-        print(outfmt.format("isPosix",self._isPosix))
-        print(outfmt.format("isLinux",self._isLinux))
-        print(outfmt.format("isCygwin",self._isCygwin))
-        print(outfmt.format("isDebian",self._isDebian))
-        print(outfmt.format("isUbuntu",self._isUbuntu))
-        print(outfmt.format("isOpenSuse",self._isOpenSuse))
-        print(outfmt.format("isRedhat",self._isRedhat))
-        print(outfmt.format("isCentOS",self._isCentOS))
-
-        self._logClose()
-
-    def DumpDebugVars(self):
+    @classmethod
+    def _cacheGet(cls,folder,stamp) -> 'OsInfo':
         """
-        Dump Debug Variables
+        Cache Get
 
-          Print values of all debug data
+            fromCache(), for release file stats already taken.
 
         Returns:
-        none
+        object: OsInfo          OS Information Object
         """
-        outfmt="{0:21} {1:30}"
-        print("-- debug data---")
-        print(outfmt.format("uname_sysname",self._uname_sysname))
-        print(outfmt.format("uname_nodename",self._uname_nodename))
-        print(outfmt.format("uname_release",self._uname_release))
-        print(outfmt.format("uname_version",self._uname_version))
-        print(outfmt.format("uname_machine",self._uname_machine))
-        print(outfmt.format("uname_processor",self._uname_processor))
-        print(outfmt.format("platform_sysname",self._platform_sysname))
-        print(outfmt.format("platform_nodename",self._platform_nodename))
-        print(outfmt.format("platform_release",self._platform_release))
-        print(outfmt.format("platform_version",self._platform_version))
-        print(outfmt.format("platform_machine",self._platform_machine))
-        print(outfmt.format("platform_processor",self._platform_processor))
+        lFile       = os.path.join(folder or cls._cacheFolder(), cls._cacheName)
+        lKey        = cls._cacheKey(stamp)
+        lInfo       = cls._cacheLoad(lFile,lKey)
+        if lInfo is None:
+            lInfo   = cls()
+            lInfo._need(*cls._cacheProbes)
+            lInfo._cacheStore(lFile,lKey)
+        return lInfo
 
-        if self._isLinux:
+    @classmethod
+    def _cacheFolder(cls) -> str:
+        """
+        Cache Folder
+
+        Returns:
+        str: default persistent cache folder
+        """
+        lBase       = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'),'.cache')
+        return os.path.join(lBase,'osinfo')
+
+    @classmethod
+    def _cacheKey(cls,stamp=None) -> str:
+        """
+        Cache Key
+
+            Identifies the inputs of a cached detection: the record layout,
+            boot id, kernel release, and release file stats (of stamp, a
+            _stamp(), or taken now).
+
+        Returns:
+        str: cache key
+        """
+        lRelease    = os.uname().release if hasattr(os,'uname') else platform.release()
+        return '{} {} {} {!r}'.format(cls._cacheLayout,cls._bootId(),lRelease,(stamp or cls._stamp())[1])
+
+    @classmethod
+    def _bootId(cls) -> str:
+        """
+        Boot Id
+
+        Returns:
+        str: this boot's id, or '' where there is none
+        """
+        lBootId     = OsInfo._bootIdValue
+        if lBootId is None:
             try:
-                print('-- /etc/os-release --')
-                releaseFile = '/etc/os-release'
-                with open(releaseFile,'r') as fh:
-                    for line in fh:
-                        print(line.strip())
-            except FileNotFoundError:
-                print("Error: File '{0}' not found.".format(releaseFile))
-            except IOError:
-                print("Error: Could not open file '{0}'.".format(releaseFile))
+                with open(cls._bootIdFile,'r') as fh:
+                    lBootId = fh.read().strip()
+            except OSError:
+                lBootId = ''
+            OsInfo._bootIdValue = lBootId
+        return lBootId
+
+    @classmethod
+    def _cacheLoad(cls,fileName,key) -> 'OsInfo':
+        """
+        Cache Load
+
+        Returns:
+        object: OsInfo          OS Information Object, or None if no usable entry
+        """
+        try:
+            with open(fileName,'rb') as fh:
+                lEntry  = json.loads(fh.read())
+            if lEntry[0] != key:
+                return None
+            return cls._fromCacheFields(lEntry[1:])
+        except (OSError, ValueError, IndexError, KeyError, TypeError):
+            # Missing or corrupt entry: detect instead
+            return None
+
+    @classmethod
+    def _fromCacheFields(cls,record) -> 'OsInfo':
+        """
+        From Cache Fields
+
+            OsInfo from a _cacheFields() record, with the cached probes
+            marked as run.  The record is the whole state: it is set
+            directly, without __init__().
+
+        Returns:
+        object: OsInfo          OS Information Object, or None if record is not a whole record
+        """
+        if type(record) is not list or len(record) != len(cls._cacheRecord):
+            return None
+        lInfo   = object.__new__(cls)
+        lInfo.__dict__.update(zip(cls._cacheRecord,[tuple(value) if type(value) is list else value for value in record]))
+        lInfo.__dict__.update(_initialized=True,_probed=set(cls._cacheProbes),_timings={},_lock=threading.RLock())
+        cls._instances.add(lInfo)
+        return lInfo
+
+    def _cacheFields(self) -> list:
+        """
+        Cache Fields
+
+            The fields set by the cached probes, running them if needed, as
+            a record: values in _cacheRecord order.
+
+        Returns:
+        list: field values
+        """
+        self._need(*self._cacheProbes)
+        return [getattr(self,field) for field in self._cacheRecord]
+
+    def _cacheStore(self,fileName,key):
+        """
+        Cache Store
+
+            Writes this object's detected fields to the cache.  Written to a
+            temp file and renamed into place, so concurrent writers and readers
+            only ever see whole entries.
+
+        Returns:
+        none
+        """
+        self._cacheWrite(fileName,[key] + self._cacheFields())
+
+    @classmethod
+    def _cacheWrite(cls,fileName,entry):
+        """
+        Cache Write
+
+            Writes a cache entry as JSON, best effort.
+
+        Returns:
+        none
+        """
+        lTemp       = None
+        try:
+            lFolder = os.path.dirname(fileName)
+            os.makedirs(lFolder,exist_ok=True)
+            fd, lTemp = tempfile.mkstemp(prefix='.osinfo-',dir=lFolder)
+            with os.fdopen(fd,'w') as fh:
+                json.dump(entry,fh,separators=(',',':'))
+            os.replace(lTemp,fileName)
+            lTemp   = None
+        except OSError:
+            # Cache is best effort
+            pass
+        finally:
+            if lTemp is not None:
+                try:
+                    os.unlink(lTemp)
+                except OSError:
+                    pass
+
+    #
+    # Agent
+    #
+
+    @classmethod
+    def agentSocket(cls) -> str:
+        """
+        Agent Socket
+
+            Default agent socket: $XDG_RUNTIME_DIR/osinfo.sock, or
+            /tmp/osinfo-{uid}.sock
+
+        Returns:
+        str: socket path
+        """
+        lFolder     = os.environ.get('XDG_RUNTIME_DIR')
+        if lFolder:
+            return os.path.join(lFolder,cls._agentName)
+        return os.path.join(tempfile.gettempdir(),'osinfo-{}.sock'.format(os.getuid() if hasattr(os,'getuid') else 0))
+
+    @classmethod
+    async def startAgent(cls,path=None) -> 'asyncio.AbstractServer':
+        """
+        Start Agent
+
+            Starts serving this host's OsInfo on a Unix socket, for
+            fromAgent() and queryAgent() clients.  Detects once, and again
+            when a release file changes (checked at most every _agentPoll
+            seconds, when asked, off the event loop).  The socket is made
+            owner only (0600).  Each request is one JSON line, answered with
+            one JSON line:
+
+                {}                                      snapshot: toDict() of every field
+                {"op":"fields","fields":["flavor",...]} just those fields
+                {"op":"state"}                          probe data, as fromAgent() loads
+
+            Errors reply {"status":...,"error":...}: status 'not-ready' while
+            the agent is still detecting (clients retry), 'unknown-field',
+            or 'bad-request'.
+
+            Desktop is the agent's own; fromAgent() detects it locally.
+
+        Returns:
+        object: asyncio.AbstractServer  server, serving
+        """
+        lPath       = path or cls.agentSocket()
+        if os.path.lexists(lPath):
+            if not cls._agentTrusted(lPath):
+                raise OSError(errno.EEXIST,'Not a socket of this user, leaving it be',lPath)
+            with socket.socket(socket.AF_UNIX,socket.SOCK_STREAM) as sock:
+                try:
+                    sock.connect(lPath)
+                except ConnectionRefusedError:
+                    # Stale socket from an agent that is gone
+                    os.unlink(lPath)
+                else:
+                    raise OSError('An OsInfo agent is already serving {}'.format(lPath))
+        import asyncio
+        lLoop       = asyncio.get_running_loop()
+        lAgent      = _Agent(cls,cls._agentPoll,lLoop)
+        await lAgent.check()
+        lSock       = socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)
+        try:
+            lUmask  = os.umask(0o177)
+            try:
+                lSock.bind(lPath)
+            finally:
+                os.umask(lUmask)
+            return await lLoop.create_unix_server(lambda: _AgentProtocol(lAgent),sock=lSock)
+        except BaseException:
+            lSock.close()
+            raise
+
+    @classmethod
+    async def serveAgent(cls,path=None):
+        """
+        Serve Agent
+
+            Runs an agent (see startAgent()) until cancelled.  This is what
+            'python -m osinfo serve' runs.
+
+        Returns:
+        none
+        """
+        lPath       = path or cls.agentSocket()
+        lServer     = await cls.startAgent(lPath)
+        try:
+            async with lServer:
+                await lServer.serve_forever()
+        finally:
+            try:
+                os.unlink(lPath)
+            except OSError:
+                pass
+
+    @classmethod
+    def fromAgent(cls,path=None,timeout=None) -> 'OsInfo':
+        """
+        From Agent
+
+            Returns an OsInfo object loaded from a running agent (see
+            startAgent()), so short-lived processes need not probe.  If no
+            agent answers, detects locally instead.
+
+        Returns:
+        object: OsInfo          OS Information Object
+        """
+        lRecord     = cls._agentRequest({'op': 'state'},path,timeout)
+        lInfo       = cls._fromCacheFields(lRecord)
+        return lInfo if lInfo is not None else cls()
+
+    @classmethod
+    def queryAgent(cls,fields=None,path=None,timeout=None) -> dict:
+        """
+        Query Agent
+
+            Asks a running agent for some fields (default all), as in
+            toDict().  If no agent answers, detects locally instead.
+
+            ex: OsInfo.queryAgent(['flavor','version'])
+
+        Returns:
+        dict: field name -> value (raises ValueError for unknown fields)
+        """
+        if fields is not None:
+            fields  = list(fields)
+            lUnknown    = [field for field in fields if '_' + str(field) not in cls._fieldProbes]
+            if lUnknown:
+                raise ValueError('Unknown OsInfo field(s): {}'.format(', '.join(map(str,lUnknown))))
+        lRequest    = {'op': 'fields', 'fields': fields} if fields is not None else {}
+        lReply      = cls._agentRequest(lRequest,path,timeout)
+        if isinstance(lReply,dict) and 'error' not in lReply:
+            return lReply
+        lDict       = cls.current().toDict()
+        return lDict if fields is None else {field: lDict[field] for field in fields}
+
+    @classmethod
+    def _agentRequest(cls,request,path,timeout):
+        """
+        Agent Request
+
+            Sends one request to the agent, and reads its reply.  An agent
+            still detecting replies 'not-ready'; the request is retried
+            until timeout.
+
+        Returns:
+        any: reply, or None if no agent answered
+        """
+        lPath       = path or cls.agentSocket()
+        if not hasattr(socket,'AF_UNIX') or not cls._agentTrusted(lPath):
+            return None
+        lTimeout    = cls._agentTimeout if timeout is None else timeout
+        lDeadline   = time.monotonic() + lTimeout
+        while True:
+            lReply  = cls._agentSend(request,lPath,lTimeout)
+            if not (isinstance(lReply,dict) and lReply.get('status') == 'not-ready'):
+                return lReply
+            if time.monotonic() + cls._agentRetry >= lDeadline:
+                return None
+            time.sleep(cls._agentRetry)
+
+    @classmethod
+    def _agentSend(cls,request,path,timeout):
+        """
+        Agent Send
+
+            One round trip to the agent.
+
+        Returns:
+        any: reply, or None if no agent answered
+        """
+        try:
+            with socket.socket(socket.AF_UNIX,socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout)
+                sock.connect(path)
+                sock.sendall(json.dumps(request).encode() + b'\n')
+                lChunks = []
+                while True:
+                    lChunk  = sock.recv(65536)
+                    if not lChunk:
+                        break
+                    lChunks.append(lChunk)
+                    if lChunk.endswith(b'\n'):
+                        break
+            return json.loads(b''.join(lChunks))
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def _agentTrusted(cls,path) -> bool:
+        """
+        Agent Trusted
+
+            Whether path is a socket of this user's.  The default socket may
+            be in a shared /tmp, where another user could serve forged
+            state from it first; the sticky bit keeps others from replacing
+            a socket of ours once checked.
+
+        Returns:
+        bool: True if path is a socket owned by this user
+        """
+        try:
+            st  = os.lstat(path)
+        except OSError:
+            return False
+        return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+    #
+    # Watching
+    #
+
+    def watch(self,callback=None,interval=2.0,inotify=True) -> 'OsInfoWatcher':
+        """
+        Watch
+
+            Keeps this object current while a long running process holds it.
+            A daemon thread watches the release files the probes read (with
+            inotify where there is one, else by polling their stats every
+            interval seconds).  When one changes, only the probes depending on
+            it are run again, and subscribers are called with the fields that
+            changed: callback(osi, {field: (old, new)}).
+
+            ex: osi.watch(lambda osi, changed: log.info('OS changed: %s', changed))
+
+        Returns:
+        object: OsInfoWatcher   watcher; stop() it when done
+        """
+        if self._files is not None:
+            raise ValueError('Cannot watch an image')
+        lWatcher    = OsInfoWatcher(self,interval,inotify)
+        if callback is not None:
+            lWatcher.subscribe(callback)
+        lWatcher.start()
+        return lWatcher
+
+    def _watchFiles(self) -> dict:
+        """
+        Watch Files
+
+        Returns:
+        dict: host path -> probes reading it
+        """
+        if not self._root:
+            return dict(self._fileProbes)
+        return {os.path.join(self._root,name.lstrip('/')): probes for name, probes in self._fileProbes.items()}
+
+    def _reprobe(self,probes) -> dict:
+        """
+        Reprobe
+
+            Runs probes, and the probes depending on them, again, if they had
+            run.  They are run on a copy, and the new fields (and snapshot, if
+            one was made) are then published here in one __dict__ update.  A
+            getter reads one field, so a reader calling several getters can
+            still straddle a reprobe; snapshot() gives a consistent view.
+
+        Returns:
+        dict: field -> (old, new), for fields that changed
+        """
+        lProbes     = set()
+        for probe in probes:
+            lProbes.add(probe)
+            lProbes.update(self._probeDependents.get(probe,()))
+        lProbes    &= self._probed
+        if not lProbes:
+            return {}
+
+        lFields     = [field for field, probe in self._fieldProbes.items() if probe in lProbes]
+        for probe in lProbes:
+            lFields.extend(self._probeState.get(probe,()))
+        lNew        = object.__new__(type(self))
+        lNew.__dict__.update(self.__dict__)
+        for field in lFields:
+            lNew.__dict__.pop(field,None)
+        lNew._probed    = self._probed - lProbes
+        lNew._timings   = dict(self._timings)
+        lNew._snapshot  = None
+        lNew._lock      = threading.RLock()
+        lNew._need(*sorted(lProbes))
+
+        lChanged    = {}
+        with self._lock:
+            lValues     = {}
+            for field in lFields:
+                lOld, lValue = getattr(self,field), getattr(lNew,field)
+                if field not in ('_distroRule','_distroData') and lOld != lValue:
+                    lChanged[field.lstrip('_')] = (lOld,lValue)
+                lValues[field]  = lValue
+            lValues['_timings']     = dict(self._timings,**lNew._timings)
+            lValues['_snapshot']    = None if self._snapshot is None else lNew.snapshot()
+            lValues['_probeWorker'] = None
+            self.__dict__.update(lValues)
+            if isinstance(self._distroData,_DistroData):
+                self._distroData._osi   = weakref.ref(self)
+        return lChanged
+
+    #
+    # Kernel Capabilities
+    #
+
+    # cap -> (first kernel with it, probe method, probe args).  Probes return True/False, or None
+    # when they cannot tell (old Python, unknown syscall numbers), leaving the version check to decide
+    _kernelCapChecks    = {
+                            'io_uring'              : ((5,1),       '_capIoUring'),
+                            'pidfd_open'            : ((5,3),       '_capPidfdOpen'),
+                            'copy_file_range'       : ((4,5),       '_capCopyFileRange'),
+                            'sendfile_file'         : ((2,6,33),    '_capSendfileFile'),        # file to file
+                            'madv_hugepage'         : ((2,6,38),    '_capMadvise',      14),
+                            'madv_free'             : ((4,5),       '_capMadvise',      8),
+                            'madv_cold'             : ((5,4),       '_capMadvise',      20),
+                            'madv_pageout'          : ((5,4),       '_capMadvise',      21),
+                            'madv_populate_read'    : ((5,14),      '_capMadvise',      22),
+                            'madv_populate_write'   : ((5,14),      '_capMadvise',      23),
+                          }
+    _capSyscallMachines = ('x86_64','aarch64','armv7l','armv8l','i686','i386','riscv64','ppc64le','ppc64','s390x')
+    _capName            = 'osinfo-kcaps.json'
+    _kernelCaps         = None                      # cap -> bool, see kernelCaps()
+
+    def kernelCaps(self,persist=True,folder=None) -> dict:
+        """
+        Kernel Capabilities
+
+            Which fast I/O paths this Linux kernel offers this process: the
+            kernel version must be new enough, and a one-shot probe (a
+            syscall on a throwaway fd, file, or page) must not be refused,
+            so seccomp filters and sysctls (io_uring_disabled) are seen.
+            False for every cap off Linux, and for root filesystems.
+
+            Made once per object.  With persist, kept in the cache folder
+            (default as fromCache()), keyed by boot id and kernel release, so
+            later processes of the same boot do not probe again.
+
+            ex: if osi.kernelCaps()['copy_file_range']: ...
+
+        Returns:
+        dict: cap -> bool  (io_uring, pidfd_open, copy_file_range, sendfile_file, madv_*)
+        """
+        lCaps   = self._kernelCaps
+        if lCaps is None:
+            with self._lock:
+                if self._kernelCaps is None:
+                    self._kernelCaps    = self._kernelCapsLoad(persist,folder)
+                lCaps   = self._kernelCaps
+        return dict(lCaps)
+
+    def _kernelCapsLoad(self,persist,folder) -> dict:
+        """
+        Kernel Capabilities Load
+
+            Kernel capabilities from the cache, or else probed, and stored
+            in the cache.
+
+        Returns:
+        dict: cap -> bool
+        """
+        self._need('kernel','system')
+        if self._root or not self._isLinux or os.name != 'posix' or not self._kernel:
+            return {cap: False for cap in self._kernelCapChecks}
+        lFile   = os.path.join(folder or self._cacheFolder(),self._capName)
+        lKey    = [self._bootId(), self._uname_release, sorted(self._kernelCapChecks)]
+        if persist:
+            try:
+                with open(lFile,'r') as fh:
+                    lEntry  = json.load(fh)
+                if lEntry['key'] == lKey and all(type(value) is bool for value in lEntry['caps'].values()):
+                    return lEntry['caps']
+            except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                # Missing or corrupt entry: probe instead
+                pass
+        lCaps   = {}
+        for cap, (minimum, probe, *args) in self._kernelCapChecks.items():
+            lCaps[cap]  = self._kernel >= minimum
+            if lCaps[cap]:
+                lProbed = getattr(self,probe)(*args)
+                if lProbed is not None:
+                    lCaps[cap]  = lProbed
+        if persist:
+            self._cacheWrite(lFile,{'key': lKey, 'caps': lCaps})
+        return lCaps
+
+    @staticmethod
+    def _capRefused(error) -> bool:
+        return error in (errno.ENOSYS, errno.EPERM, errno.EACCES, errno.EOPNOTSUPP, errno.EINVAL, errno.EXDEV)
+
+    def _capSyscall(self,number,*args) -> bool:
+        """
+        Cap Syscall
+
+            Calls syscall number with valid arguments, expecting an fd, which
+            is closed.  Syscall numbers past 424 are the same on the machines
+            in _capSyscallMachines.  Only ENOSYS (or a seccomp EPERM/EACCES)
+            says the syscall is unusable; any other error says nothing.
+
+        Returns:
+        bool: True if the syscall worked, False if absent or blocked, None if it could not tell
+        """
+        if self._uname_machine not in self._capSyscallMachines:
+            return None
+        try:
+            lSyscall    = ctypes.CDLL(None,use_errno=True).syscall
+        except (OSError, AttributeError, TypeError):
+            return None
+        lResult     = lSyscall(ctypes.c_long(number),*args)
+        if lResult >= 0:
+            os.close(lResult)
+            return True
+        if ctypes.get_errno() in (errno.ENOSYS, errno.EPERM, errno.EACCES):
+            return False
+        return None
+
+    def _capIoUring(self) -> bool:
+        lParams     = ctypes.create_string_buffer(120)              # struct io_uring_params, zeroed
+        return self._capSyscall(425,ctypes.c_long(1),lParams)     # io_uring_setup(1, params)
+
+    def _capPidfdOpen(self) -> bool:
+        if not hasattr(os,'pidfd_open'):
+            return self._capSyscall(434,ctypes.c_long(os.getpid()),ctypes.c_long(0))    # pidfd_open(pid, 0)
+        try:
+            os.close(os.pidfd_open(os.getpid()))
+            return True
+        except OSError as e:
+            return not self._capRefused(e.errno)
+
+    def _capFiles(self,copy) -> bool:
+        """
+        Cap Files
+
+            Copies a byte between two temp files with copy(dst, src).
+
+        Returns:
+        bool: False if the kernel refused
+        """
+        try:
+            with tempfile.TemporaryFile() as src, tempfile.TemporaryFile() as dst:
+                src.write(b'x')
+                src.flush()
+                return copy(dst.fileno(),src.fileno()) == 1
+        except OSError as e:
+            return False if e.errno is None else not self._capRefused(e.errno)
+
+    def _capCopyFileRange(self) -> bool:
+        if not hasattr(os,'copy_file_range'):
+            return None
+        return self._capFiles(lambda dst, src: os.copy_file_range(src,dst,1,0,0))
+
+    def _capSendfileFile(self) -> bool:
+        if not hasattr(os,'sendfile'):
+            return None
+        return self._capFiles(lambda dst, src: os.sendfile(dst,src,0,1))
+
+    def _capMadvise(self,advice) -> bool:
+        """
+        Cap Madvise
+
+            madvise(advice) on a page of private anonymous memory.
+
+        Returns:
+        bool: False if the kernel refused the advice, None without mmap.madvise
+        """
+        import mmap
+        lMap    = mmap.mmap(-1,mmap.PAGESIZE,flags=mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS)
+        try:
+            if not hasattr(lMap,'madvise'):
+                return None
+            lMap.madvise(advice)
+            return True
+        except OSError as e:
+            return not self._capRefused(e.errno)
+        finally:
+            lMap.close()
+
+    #
+    # Resources
+    #
+
+    _resourcesInfo      = None                      # (pid, resources()) of this process, per class
+    _memoryUnlimited    = 1 << 60                   # cgroup v1 reports no limit as about 2^63
+
+    def resources(self,refresh=False) -> dict:
+        """
+        Resources
+
+            CPU and memory this process can actually use: the sched affinity
+            mask, the cgroup (v1 or v2) CPU quota and memory limit, of its own
+            cgroup and each parent, MemTotal, and the NUMA nodes with allowed
+            CPUs.  Read once per process (a forked child reads again); with
+            refresh, read again now.  Off Linux, only the CPU count is known.
+            See recommendedWorkers().
+
+        Returns:
+        dict: cpuCount      CPUs in the machine (os.cpu_count())
+              affinity      CPUs this process may run on
+              cpuQuota      CPUs worth of cgroup CPU quota, or None
+              cpus          CPUs usable: the least of affinity and cpuQuota
+              memoryLimit   cgroup memory limit, bytes, or None
+              memoryTotal   MemTotal, bytes, or None
+              memory        memory usable, bytes, or None
+              numaNodes     NUMA nodes with allowed CPUs
+              cgroup        cgroup version, 1 or 2, or None
+        """
+        if self._root:
+            raise ValueError('A root filesystem has no running process')
+        lClass  = type(self)
+        lInfo   = lClass.__dict__.get('_resourcesInfo')
+        if refresh or lInfo is None or lInfo[0] != os.getpid():
+            lInfo   = lClass._resourcesInfo = (os.getpid(), self._readResources())
+        return dict(lInfo[1])
+
+    def recommendedWorkers(self,kind='cpu',memoryPerWorker=None) -> int:
+        """
+        Recommended Workers
+
+            Pool size for this process, from resources(): 'cpu' is one worker
+            per usable CPU, rounded up so a 1.5 CPU quota keeps its half CPU
+            busy; 'io' is that plus 4, up to 32, as ThreadPoolExecutor does
+            with os.cpu_count().  With memoryPerWorker (bytes), no more
+            workers than fit in usable memory.  Always at least 1.
+
+            ex: ProcessPoolExecutor(osi.recommendedWorkers('cpu'))
+
+        Returns:
+        int: workers
+        """
+        lResources  = self.resources()
+        lCpus       = max(1,math.ceil(lResources['cpus']))
+        if kind == 'cpu':
+            lWorkers    = lCpus
+        elif kind == 'io':
+            lWorkers    = min(32,lCpus + 4)
+        else:
+            raise ValueError("Worker kind must be 'cpu' or 'io', not {!r}".format(kind))
+        if memoryPerWorker and lResources['memory']:
+            lWorkers    = min(lWorkers,lResources['memory'] // memoryPerWorker)
+        return max(1,lWorkers)
+
+    def _readResources(self) -> dict:
+        """
+        Read Resources
+
+        Returns:
+        dict: see resources()
+        """
+        lCount      = os.cpu_count() or 1
+        lResources  = {'cpuCount': lCount, 'affinity': lCount, 'cpuQuota': None, 'cpus': lCount,
+                       'memoryLimit': None, 'memoryTotal': None, 'memory': None, 'numaNodes': 1, 'cgroup': None}
+        if hasattr(os,'process_cpu_count'):
+            lResources['affinity']  = os.process_cpu_count() or lCount
+        lAllowed    = None
+        if hasattr(os,'sched_getaffinity'):
+            try:
+                lAllowed    = os.sched_getaffinity(0)
+                lResources['affinity']  = len(lAllowed)
+            except OSError:
+                pass
+        if sys.platform.startswith('linux'):
+            lResources.update(self._readCgroups())
+            lResources['memoryTotal']   = self._readMemTotal()
+            lResources['numaNodes']     = self._readNumaNodes(lAllowed)
+        lQuota      = lResources['cpuQuota']
+        lResources['cpus']      = lResources['affinity'] if lQuota is None else min(lResources['affinity'],lQuota)
+        lMemory     = [value for value in (lResources['memoryLimit'],lResources['memoryTotal']) if value]
+        lResources['memory']    = min(lMemory) if lMemory else None
+        return lResources
+
+    def _readResourceFile(self,fileName) -> str:
+        try:
+            with open(fileName,'r') as fh:
+                return fh.read().strip()
+        except OSError:
+            return None
+
+    def _listResourceFolder(self,folder) -> list:
+        try:
+            return os.listdir(folder)
+        except OSError:
+            return None
+
+    def _readCgroups(self) -> dict:
+        """
+        Read Cgroups
+
+            CPU quota and memory limit of this process's cgroup, and its
+            parents up to the cgroup mount, the least of each.  Paths come
+            from /proc/self/cgroup, relative to the mounts in
+            /proc/self/mountinfo.
+
+        Returns:
+        dict: cpuQuota, memoryLimit, cgroup
+        """
+        lResult     = {}
+        lGroups     = {}                            # controller ('' for v2) -> cgroup path
+        for line in (self._readResourceFile('/proc/self/cgroup') or '').splitlines():
+            lParts  = line.split(':',2)
+            if len(lParts) != 3:
+                continue
+            _, lControllers, lPath = lParts
+            for controller in (lControllers.split(',') if lControllers else ('',)):
+                lGroups[controller] = lPath
+        lMounts     = {}                            # controller ('' for v2) -> (mount root, mount point)
+        for line in (self._readResourceFile('/proc/self/mountinfo') or '').splitlines():
+            lFields, _, lSuper  = line.partition(' - ')
+            lFields     = lFields.split()
+            lSuper      = lSuper.split()
+            if len(lFields) < 5 or len(lSuper) < 3:
+                continue
+            if lSuper[0] == 'cgroup2':
+                lMounts.setdefault('',(lFields[3],lFields[4]))
+            elif lSuper[0] == 'cgroup':
+                for option in lSuper[2].split(','):
+                    if option in ('cpu','memory'):
+                        lMounts.setdefault(option,(lFields[3],lFields[4]))
+
+        if '' in lMounts and '' in lGroups and not ('cpu' in lMounts or 'memory' in lMounts):
+            lResult['cgroup']   = 2
+            lCpu    = [self._parseCpuMax(text) for text in self._readCgroupFiles(lMounts[''],lGroups[''],'cpu.max')]
+            lMemory = [self._parseMemory(text) for text in self._readCgroupFiles(lMounts[''],lGroups[''],'memory.max')]
+        elif 'cpu' in lMounts or 'memory' in lMounts:
+            lResult['cgroup']   = 1
+            lCpu    = []
+            if 'cpu' in lMounts and 'cpu' in lGroups:
+                lQuotas     = self._readCgroupFiles(lMounts['cpu'],lGroups['cpu'],'cpu.cfs_quota_us')
+                lPeriods    = self._readCgroupFiles(lMounts['cpu'],lGroups['cpu'],'cpu.cfs_period_us')
+                lCpu        = [self._parseCpuMax('{} {}'.format(quota,period)) for quota, period in zip(lQuotas,lPeriods)]
+            lMemory = []
+            if 'memory' in lMounts and 'memory' in lGroups:
+                lMemory     = [self._parseMemory(text) for text in self._readCgroupFiles(lMounts['memory'],lGroups['memory'],'memory.limit_in_bytes')]
+        else:
+            return lResult
+        lCpu        = [value for value in lCpu if value is not None]
+        lMemory     = [value for value in lMemory if value is not None]
+        lResult['cpuQuota']     = min(lCpu) if lCpu else None
+        lResult['memoryLimit']  = min(lMemory) if lMemory else None
+        return lResult
+
+    def _readCgroupFiles(self,mount,path,fileName) -> list:
+        """
+        Read Cgroup Files
+
+            A cgroup file of path's cgroup and each parent cgroup below the
+            mount.
+
+        Returns:
+        list: file contents, that could be read
+        """
+        lRoot, lPoint   = mount
+        if lRoot != '/' and (path == lRoot or path.startswith(lRoot + '/')):
+            path    = path[len(lRoot):]
+        lTexts      = []
+        lPath       = posixpath.normpath('/' + path.lstrip('/'))
+        while True:
+            lText   = self._readResourceFile(posixpath.join(lPoint,lPath.lstrip('/'),fileName))
+            if lText is not None:
+                lTexts.append(lText)
+            if lPath == '/':
+                return lTexts
+            lPath   = posixpath.dirname(lPath)
+
+    def _parseCpuMax(self,text) -> float:
+        """
+        Parse CPU Max
+
+        Returns:
+        float: CPUs of quota, from 'quota period' (v2 cpu.max, or v1 quota and period), None if no quota
+        """
+        try:
+            lQuota, lPeriod = text.split()
+            if lQuota == 'max' or int(lQuota) < 0 or int(lPeriod) <= 0:
+                return None
+            return int(lQuota) / int(lPeriod)
+        except ValueError:
+            return None
+
+    def _parseMemory(self,text) -> int:
+        """
+        Parse Memory
+
+        Returns:
+        int: bytes of memory limit, None if no limit
+        """
+        try:
+            lLimit  = int(text)
+        except ValueError:
+            return None
+        return lLimit if 0 < lLimit < self._memoryUnlimited else None
+
+    def _readMemTotal(self) -> int:
+        for line in (self._readResourceFile('/proc/meminfo') or '').splitlines():
+            if line.startswith('MemTotal:'):
+                try:
+                    return int(line.split()[1]) * 1024
+                except (IndexError, ValueError):
+                    return None
+        return None
+
+    def _readNumaNodes(self,allowed) -> int:
+        """
+        Read NUMA Nodes
+
+            NUMA nodes, from /sys/devices/system/node, with a CPU in allowed.
+
+        Returns:
+        int: nodes, at least 1
+        """
+        lNames      = self._listResourceFolder('/sys/devices/system/node')
+        if lNames is None:
+            return 1
+        lNodes      = [name for name in lNames if re.match(r'node[0-9]+$',name)]
+        lCount      = 0
+        for node in lNodes:
+            lCpus   = set()
+            for part in (self._readResourceFile('/sys/devices/system/node/{}/cpulist'.format(node)) or '').split(','):
+                lFirst, _, lLast    = part.partition('-')
+                if lFirst.isdigit() and (not lLast or lLast.isdigit()):
+                    lCpus.update(range(int(lFirst),int(lLast or lFirst) + 1))
+            if lCpus and (allowed is None or lCpus & allowed):
+                lCount  += 1
+        return max(1,lCount)
+
+    #
+    # Fingerprints
+    #
+
+    _profileFields      = ('type','flavor','distrobase','release','version','revision',
+                           'kernel','machine','isWsl')     # toDict() fields fingerprints are made from
+
+    @classmethod
+    def groupProfiles(cls,records) -> dict:
+        """
+        Group Profiles
+
+            Collapses host records into distinct OS profiles, by fingerprint.
+            records are OsInfo objects, snapshots, toDict() dicts (as read
+            from NDJSON), or (host, record) pairs; hosts are the pair's host,
+            or else the record's position.  Each distinct record is
+            fingerprinted once; repeats are a dict lookup.
+
+            ex: for fp, (snap, hosts) in OsInfo.groupProfiles(scanRoots(roots)).items(): ...
+
+        Returns:
+        dict: fingerprint -> (OsInfoSnapshot, list of hosts)
+        """
+        lProfiles   = {}
+        for host, (fingerprint, snapshot) in cls._profileBuckets(records):
+            lProfile    = lProfiles.get(fingerprint)
+            if lProfile is None:
+                lProfile    = lProfiles[fingerprint] = (snapshot, [])
+            lProfile[1].append(host)
+        return lProfiles
+
+    @classmethod
+    def dedupe(cls,records) -> dict:
+        """
+        Dedupe
+
+            The distinct OS profiles among records (as groupProfiles()), each
+            the first snapshot seen with its fingerprint.
+
+        Returns:
+        dict: fingerprint -> OsInfoSnapshot
+        """
+        lProfiles   = {}
+        for _, profile in cls._profileBuckets(records):
+            lProfiles.setdefault(*profile)
+        return lProfiles
+
+    @classmethod
+    def _profileBuckets(cls,records):
+        """
+        Profile Buckets
+
+            (host, (fingerprint, snapshot)) per record.  Records are bucketed
+            by snapshot, or by their field values for dicts, so each distinct
+            record is converted and hashed once.
+
+        Returns:
+        generator: (host, (fingerprint, OsInfoSnapshot))
+        """
+        lBuckets    = {}                            # snapshot or dict values -> (fingerprint, snapshot)
+        lGet        = operator.itemgetter(*cls._profileFields)
+        lKernelAt   = cls._profileFields.index('kernel')
+        for index, record in enumerate(records):
+            host    = index
+            if type(record) is tuple:
+                host, record    = record
+            if isinstance(record,OsInfo):
+                record  = record.snapshot()
+            if isinstance(record,dict):
+                try:
+                    lKey    = lGet(record)
+                except KeyError:
+                    lKey    = tuple(record.get(f) for f in cls._profileFields)
+                if type(lKey[lKernelAt]) is list:      # JSON loaded: kernel is a list
+                    lKey    = lKey[:lKernelAt] + (tuple(lKey[lKernelAt]),) + lKey[lKernelAt+1:]
+            else:
+                lKey    = record
+            lProfile    = lBuckets.get(lKey)
+            if lProfile is None:
+                lSnapshot   = OsInfoSnapshot.fromDict(record) if isinstance(record,dict) else record
+                lProfile    = lBuckets[lKey] = (lSnapshot.fingerprint(), lSnapshot)
+            yield host, lProfile
+
+    #
+    # Serialization
+    #
+
+    _debugFields        = ('_uname_sysname','_uname_nodename','_uname_release','_uname_version','_uname_machine','_uname_processor',
+                           '_platform_sysname','_platform_nodename','_platform_release','_platform_version',
+                           '_platform_machine','_platform_processor','_osReleaseFile','_osRelease','_debianVersion')
+    _ndjsonChunk        = 256                       # Records per write
+
+    def toDict(self,debug=False) -> dict:
+        """
+        To Dict
+
+            Every field, as OsInfoSnapshot.toDict().  With debug, adds a
+            'debug' dict of the raw uname, platform, and release file data.
+
+        Returns:
+        dict: field name -> value
+        """
+        lDict   = self.snapshot().toDict()
+        if debug:
+            self._need('debian','processor')
+            lDict['debug']  = {field.lstrip('_'): getattr(self,field) for field in self._debugFields}
+        return lDict
+
+    def toJson(self,debug=False) -> str:
+        """
+        To JSON
+
+        Returns:
+        str: JSON object of toDict(debug)
+        """
+        return _jsonDumps(self.toDict(debug))
+
+    @classmethod
+    def writeNdjson(cls,fh,records,debug=False) -> int:
+        """
+        Write NDJSON
+
+            Streams records to a text file, one JSON object per line.  A
+            record is an OsInfo, an OsInfoSnapshot, or a (root, record) pair
+            as yielded by scanRoots(), which adds a 'root' field.  debug adds
+            the raw data of OsInfo records.  Records are read as written, so
+            generators are not held in memory.
+
+            ex: OsInfo.writeNdjson(sys.stdout, OsInfo.scanRoots(roots))
+
+        Returns:
+        int: records written
+        """
+        lCount  = 0
+        lLines  = []
+        for record in records:
+            lRoot   = None
+            if isinstance(record,tuple):
+                lRoot, record = record
+            lDict   = record.toDict(debug) if isinstance(record,OsInfo) else record.toDict()
+            if lRoot is not None:
+                lDict['root']   = lRoot
+            lLines.append(_jsonDumps(lDict))
+            lCount += 1
+            if len(lLines) >= cls._ndjsonChunk:
+                lLines.append('')
+                fh.write('\n'.join(lLines))
+                lLines  = []
+        if lLines:
+            lLines.append('')
+            fh.write('\n'.join(lLines))
+        return lCount
+
+    #
+    # Private Methods
+    #
+   
+    def _logOpen(self,mode='a'):
+        """
+        Log Open
+
+            Opens the log file for one write.  Each write gets its own
+            channel, so threads never share a handle.
+
+        Returns:
+        file: log channel, or None if it could not be opened
+        """
+        try:
+            return open(self.logFile(),mode)
+        except FileNotFoundError:
+            print("Error: Log File '{0}' not found.".format(self.logFile()))
+        except IOError:
+            print("Error: Could not open Log file '{0}'.".format(self.logFile()))
+        return None
+
+    def _logWrite(self,text,mode='a'):
+        """
+        Log Write 
+
+            Write text to log file, in one write.  mode 'w' replaces the log.
+            Log writes are serialized, so reports from threads do not mix.
+
+        Returns:
+        none
+        """ 
+        if not self._logEnable:
+            return
+        with self._logLock:
+            lChan   = self._logOpen(mode)
+            if lChan is not None:
+                with lChan:
+                    lChan.write(text + "\n")
+
+    def _barf(self,text,mode='a'):
+        """
+        Barf 
+
+            Print and log text, with one write to each
+
+        Returns:
+        none
+        """
+        sys.stdout.write(text + "\n")
+        self._logWrite(text,mode)
+
+    def _barfd(self,text):
+        """
+        Barf Debug
+
+            Print text, if debug is enabled, and send it to any trace hooks
+
+        Returns:
+        none
+        """
+        if self._debug:
+            print("#DEBUG# {}".format(text))
+        if self._hooks:
+            self._emit('debug',self._stage,text)
+
+    def _readOsRelease(self) -> tuple:
+        """
+        Read OS Release File
+
+            Reads release data, as os-release key/value pairs, from the
+            _releaseSources chain: /etc/os-release, or /usr/lib/os-release if
+            there is none, and then, only while ID, NAME, or VERSION_ID (or
+            BUILD_ID) is missing, the older distro specific files.  Most hosts read one
+            file.
+
+        Returns:
+        tuple: (releaseFile, releaseInfo, sources)  first file read (None if none), key-value pairs,
+                                                    key -> file it came from
+        """
+        lFirst      = None
+        lData       = {}
+        lSources    = {}
+        lParsers    = set()
+        for releaseFile, parser in self._releaseSources:
+            if parser in lParsers:
+                continue
+            try:
+                lRaw    = self._readBytes(releaseFile)
+            except FileNotFoundError:
+                continue
+            except IOError:
+                print("Error: Could not open file '{0}'.".format(self._path(releaseFile)))
+                continue
+            lParsers.add(parser)
+            lNew    = getattr(self,parser)(lRaw)
+            if 'ID' in lData and lNew.get('ID',lData['ID']) != lData['ID']:
+                continue
+            lFirst  = lFirst or releaseFile
+            for key, value in lNew.items():
+                if key not in lData:
+                    lData[key]      = value
+                    lSources[key]   = releaseFile
+            if all(any(lData.get(k) for k in (key if isinstance(key,tuple) else (key,))) for key in self._releaseRequired):
+                break
+        if lFirst is None:
+            print("Error: File '{0}' not found.".format(self._path(self._osReleaseFiles[0])))
+        return (lFirst, lData, lSources)
+
+    @classmethod
+    def _parseLsbRelease(cls,data) -> dict:
+        """
+        Parse LSB Release
+
+            /etc/lsb-release DISTRIB_* keys, as os-release keys.
+
+        Returns:
+        dictionary: releaseInfo    key-value pairs
+        """
+        lLsb        = cls._parseOsRelease(data)
+        lDict       = {}
+        lId         = lLsb.get('DISTRIB_ID','')
+        if lId:
+            lDict['ID']     = lId.lower()
+            lDict['NAME']   = lId
+        for key, lsbKey in (('VERSION_ID','DISTRIB_RELEASE'),('VERSION_CODENAME','DISTRIB_CODENAME'),('PRETTY_NAME','DISTRIB_DESCRIPTION')):
+            if lLsb.get(lsbKey):
+                lDict[key]  = lLsb[lsbKey]
+        lPretty     = lDict.get('PRETTY_NAME','')
+        if lId and lPretty.startswith(lId + ' '):
+            lDict['VERSION']    = lPretty[len(lId) + 1:]
+        return lDict
+
+    @classmethod
+    def _parseRedhatRelease(cls,data) -> dict:
+        """
+        Parse Redhat Release
+
+            /etc/redhat-release, 'CentOS Linux release 7.9.2009 (Core)', as
+            os-release keys.
+
+        Returns:
+        dictionary: releaseInfo    key-value pairs
+        """
+        lLine       = data.decode('utf-8','replace').strip().split('\n')[0].strip()
+        match       = re.match(r'^(.+?) release ([0-9][0-9.]*)[^(]*(?:\((.*)\))?',lLine)
+        if not match:
+            return {'PRETTY_NAME': lLine} if lLine else {}
+        lName, lVersion, lCode  = match.groups()
+        lDict       = {'NAME': lName, 'VERSION_ID': lVersion, 'PRETTY_NAME': lLine,
+                       'VERSION': '{} ({})'.format(lVersion,lCode) if lCode else lVersion}
+        for prefix, id in cls._redhatIds:
+            if lName.startswith(prefix):
+                lDict['ID']         = id
+                if id != 'fedora':
+                    lDict['ID_LIKE']    = 'rhel fedora'
+                break
+        return lDict
+
+    @classmethod
+    def _parseAlpineRelease(cls,data) -> dict:
+        """
+        Parse Alpine Release
+
+            /etc/alpine-release, '3.18.4', as os-release keys.
+
+        Returns:
+        dictionary: releaseInfo    key-value pairs
+        """
+        lVersion    = data.decode('utf-8','replace').strip()
+        if not lVersion:
+            return {}
+        return {'ID': 'alpine', 'NAME': 'Alpine Linux', 'VERSION_ID': lVersion,
+                'PRETTY_NAME': 'Alpine Linux v{}'.format('.'.join(lVersion.split('.')[:2]))}
+
+    @classmethod
+    def _parseSuseRelease(cls,data) -> dict:
+        """
+        Parse SuSE Release
+
+            /etc/SuSE-release, as os-release keys:
+
+                openSUSE 13.2 (x86_64)
+                VERSION = 13.2
+                CODENAME = Harlequin
+
+        Returns:
+        dictionary: releaseInfo    key-value pairs
+        """
+        lLines      = data.decode('utf-8','replace').strip().splitlines()
+        if not lLines:
+            return {}
+        lPretty     = re.sub(r'\s*\([^()]*\)\s*$','',lLines[0].strip())
+        lKeys       = {}
+        for line in lLines[1:]:
+            key, sep, value = line.partition('=')
+            if sep:
+                lKeys[key.strip()]  = value.strip()
+        lName       = re.split(r'\s+[0-9]',lPretty,1)[0]
+        lDict       = {'NAME': lName, 'PRETTY_NAME': lPretty, 'ID_LIKE': 'suse',
+                       'ID': 'opensuse' if lName.lower().startswith('opensuse') else 'sles'}
+        if lKeys.get('VERSION'):
+            lDict['VERSION_ID'] = lKeys['VERSION'] + ('.' + lKeys['PATCHLEVEL'] if lKeys.get('PATCHLEVEL','0') != '0' else '')
+        if lKeys.get('CODENAME'):
+            lDict['VERSION_CODENAME']   = lKeys['CODENAME']
+        return lDict
+
+    @classmethod
+    def _parseDebianVersion(cls,data) -> dict:
+        """
+        Parse Debian Version
+
+            /etc/debian_version, '11.6' (or 'bookworm/sid' on testing), as
+            os-release keys.
+
+        Returns:
+        dictionary: releaseInfo    key-value pairs
+        """
+        lVersion    = data.decode('utf-8','replace').strip()
+        lDict       = {'ID': 'debian', 'NAME': 'Debian GNU/Linux'}
+        match       = re.match(r'^([0-9]+)',lVersion)
+        if match:
+            lDict['VERSION_ID']     = match.group(1)
+            lDict['PRETTY_NAME']    = 'Debian GNU/Linux {}'.format(match.group(1))
+        return lDict
+
+    @classmethod
+    def _parseOsRelease(cls,data) -> dict:
+        """
+        Parse OS Release
+
+            Parses os-release data per the freedesktop.org spec, in one regex
+            pass over the bytes: KEY=value lines, with '#' comments, single or
+            double quoting, and backslash escapes.  Other lines are skipped.
+
+        Returns:
+        dictionary: releaseInfo    key-value pairs
+        """
+        lDict       = {}
+        for key, dquoted, plain, quoted in cls._osReleaseLine.findall(data):
+            if quoted:
+                plain   = b''.join(cls._unquoteOsRelease(m) for m in cls._osReleaseToken.finditer(quoted))
+            lDict[key.decode('ascii')] = (dquoted or plain).decode('utf-8','replace')
+        return lDict
+
+    @classmethod
+    def _unquoteOsRelease(cls,match) -> bytes:
+        """
+        Unquote OS Release
+
+            Unquotes one token of an os-release value.
+
+        Returns:
+        bytes: token value
+        """
+        dquoted, squoted, escaped, plain = match.groups()
+        if dquoted is not None:
+            return cls._osReleaseEscape.sub(rb'\1',dquoted)
+        if squoted is not None:
+            return squoted
+        if escaped is not None:
+            return escaped
+        return plain
+
+    def _readDebianRelease(self) -> str:
+        """
+        Read Debian Release
+
+            Reads debian_version file in etc folder to determine release number
+
+        Returns:
+        str: Debian release number
+        """
+        retval  = 'Unknown'
+        releaseFile = '/etc/debian_version'
+        try:
+            lLines  = self._readBytes(releaseFile).decode('utf-8','replace').splitlines()
+            retval  = lLines[0].strip() if lLines else ''
+        except FileNotFoundError:
+            print("Error: File '{0}' not found.".format(self._path(releaseFile)))
+        except IOError:
+            print("Error: Could not open file '{0}'.".format(self._path(releaseFile)))
+
+        return retval
+
+    def _readBytes(self,fileName) -> bytes:
+        """
+        Read Bytes
+
+            Reads a release file, from under root if there is one, or from
+            the files read from an image.  Host files come through the
+            environment (see OsInfoEnv); root and image files are read
+            directly, as they are not the running host's.
+
+        Returns:
+        bytes: file contents (raises OSError)
+        """
+        if self._files is not None:
+            return self._files.read(fileName)
+        if not self._root:
+            return self._env.readFile(fileName)
+        with open(self._path(fileName),'rb') as fh:
+            return fh.read()
+
+    def _path(self,fileName) -> str:
+        """
+        Path
+
+            Resolves an absolute path under root.  Symlinks are followed
+            inside root, so an absolute link like /etc/os-release ->
+            /usr/lib/os-release does not escape to the host.
+
+        Returns:
+        str: host path (raises OSError on a symlink loop)
+        """
+        if not self._root:
+            return fileName
+        lParts  = [p for p in fileName.split('/') if p]
+        lDone   = []
+        lLinks  = 0
+        while lParts:
+            part    = lParts.pop(0)
+            if part == '.':
+                continue
+            if part == '..':
+                if lDone:
+                    lDone.pop()
+                continue
+            lHost   = os.path.join(self._root,*lDone,part)
+            try:
+                lTarget = os.readlink(lHost)
+            except OSError:
+                lDone.append(part)
+                continue
+            lLinks  += 1
+            if lLinks > self._rootMaxLinks:
+                raise OSError(40,'Too many levels of symbolic links',lHost)
+            if lTarget.startswith('/'):
+                lDone   = []
+            lParts  = [p for p in lTarget.split('/') if p] + lParts
+        return os.path.join(self._root,*lDone)
+
+    def _getLinuxDesktop(self) -> str:
+        """
+        Get Linux Desktop
+
+            Determines what Linux Desktop is being used
+
+        Returns:
+        str: Type of Desktop (Gnome,XFCE,KDE,etc), or 'Unknown'
+        """
+        retval          = 'Unknown'
+        xdgDesktop      = self._env.getenv('XDG_CURRENT_DESKTOP')
+        if xdgDesktop:
+            if (re.match(r'.*GNOME.*',xdgDesktop)):
+                retval      = 'Gnome'
+            if (re.match(r'.*XFCE.*',xdgDesktop)):
+                retval      = 'XFCE'
+            if (re.match(r'.*KDE.*',xdgDesktop)):
+                retval      = 'KDE'
+        return retval
+
+    def _qnul(self,value) -> str:
+        retval = value
+        if not retval:
+            retval  = ''
+        return retval
+
+    #
+    # Public Properties - Getters
+    #
+    def type(self) -> str:
+        """
+        OS Type
+        
+        Returns:
+        str:    OS type         (ex:posix, nt, os2, ce, java, riscos,default:Unknown)
+        """
+        return self._field('_type')
+
+    def kernel(self) -> tuple:
+        """
+        OS Kernel
+
+           Kernel release numbers, from os.uname (Windows: platform version).
+           See kernelCaps().
+
+        Returns:
+        tuple:  OS kernel       ((6,1,0),(10,0,19045),default:())
+        """
+        return self._field('_kernel')
+        
+    def machine(self) -> str:
+        """
+        Machine Type
+        
+        Returns:
+        str:    Machine type    (ex:_x86_64,default:Unknown)
+        """
+        return self._field('_machine')
+        
+    def distrobase(self) -> str:
+        """
+        OS Distro Base
+   
+        Returns:
+        str:    OS distro base  (ex:Debian,Redhat,default:Unknown)
+        """
+        return self._field('_distrobase')
+        
+    def codename(self) -> str:
+        """
+        OS Codename
+   
+        Returns:
+        str:    OS codename     (ex:Buster,Sid,Focal,default:Unknown)
+        """
+        return self._field('_codename')
+
+    def osRelease(self) -> dict:
+        """
+        OS Release
+
+           Key/value pairs from os-release, parsed once per detection.  Keys
+           os-release lacks (or all of them, without one) are filled in from
+           older release files: lsb-release, redhat-release, alpine-release,
+           SuSE-release, debian_version.  See releaseSources().
+        
+        Returns:
+        dict:   os-release      (ex:{'ID':'debian','VERSION_ID':'11',...},default:{})
+        """
+        return dict(self._field('_osRelease') or {})
+
+    def releaseSources(self) -> dict:
+        """
+        OS Release Sources
+
+           The release file each osRelease() key came from.
+
+        Returns:
+        dict:   key -> file     (ex:{'ID':'/etc/redhat-release',...},default:{})
+        """
+        return dict(self._field('_osReleaseSources') or {})
+
+    def name(self) -> str:
+        """
+        OS Name
+
+           OS name as reported by OS.
+        
+        Returns:
+        str:    OS name         (ex:Debian,Ubuntu,Windows,default:Unknown)
+        """
+        return self._field('_flavor')
+
+    def flavor(self) -> str:
+        """
+        OS Flavor
+
+           OS name for use in compares, simple and consistent
+        
+        Returns:
+        str:    OS flavor       (Debian,Ubuntu,default:Unknown)
+        """
+        return self._field('_flavor')
+        
+     
+    def release(self) -> str:
+        """
+        OS Release
+
+           OS major version ID for use in compares, simple and consistent
+        
+        Returns:
+        str:    OS release      (11,default:Unknown)
+        """
+        return self._field('_release')
+
+    def version(self) -> str:
+        """
+        OS Version
+
+           OS major and minor version ID for use in compares, simple and consistent
+        
+        Returns:
+        str:    OS version      (11.2,default:Unknown)
+        """
+        return self._field('_version')
+                
+    def revision(self) -> str:
+        """
+        OS Revision
+
+           OS complete major,minor, and revision ID
+        
+        Returns:
+        str:    OS revision     (20.04 LTS,10.0.32412,default:Unknown)
+        """
+        return self._field('_revision')
+        
+    def flavverflav(self) -> str:
+        """
+        OS Flavaflav (Yo!)
+
+           OS name, major, and minor versions, sans spaces, for use in compares,
+           simple and consistent
+        
+        Returns:
+        str:    OS flavaflav    (Debian11.0,Ubuntu20.04,Windows10.0,default:Unknown)
+        """
+        return self._field('_flavverflav')
+
+    def versionKey(self) -> tuple:
+        """
+        OS Version Key
+
+           The most complete of release, version, and revision, as a tuple of
+           numbers, parsed once at detection.  Trailing zeros are dropped, so
+           10.0 == 10.  Empty if there are no version numbers (Arch).
+
+        Returns:
+        tuple:  OS version key  ((20,4,6),(11,6),default:())
+        """
+        return self._field('_versionKey')
+
+    def fingerprint(self) -> str:
+        """
+        OS Fingerprint
+
+           Fixed size hash of the normalized type, flavor, distro base, version
+           key, kernel, machine, and WSL status; equal for hosts with the same
+           OS profile, whatever their name or pretty name strings.  The desktop
+           is left out: it comes from the session's environment, so cron, ssh,
+           and desktop sessions on one host would differ.  Made once, by the
+           snapshot.  See OsInfo.groupProfiles().
+
+        Returns:
+        str:    OS fingerprint  (32 hex digits)
+        """
+        return self.snapshot().fingerprint()
+
+    def matches(self,spec) -> bool:
+        """
+        OS Matches
+
+           True if the OS matches a spec: an optional flavor, then comma
+           separated version compares (== != < <= > >=).  Specs are parsed
+           once and cached, so a match is a string and tuple compare.  An OS
+           without a version key matches no version compare.
+
+           ex: osi.matches('Debian>=10,<12'), osi.matches('>=20.04'), osi.matches('Alpine')
+
+        Returns:
+        bool:   True if matches
+        """
+        lFlavor, lCompares = _versionSpec(spec)
+        if lFlavor is not None and self.flavor().casefold() != lFlavor:
+            return False
+        if not lCompares:
+            return True
+        lKey    = self.versionKey()
+        if not lKey:
+            return False
+        for compare, key in lCompares:
+            if not compare(lKey,key):
+                return False
+        return True
+
+    def atLeast(self,flavor,version) -> bool:
+        """
+        OS At Least
+
+           True if the OS is flavor, at version or later.
+
+           ex: osi.atLeast('Ubuntu','20.04')
+
+        Returns:
+        bool:   True if flavor >= version
+        """
+        return self.matches('{}>={}'.format(flavor,version))
+
+    def desktop(self) -> str:
+        """
+        OS Desktop
+
+           For systems that are not headless, the kind of desktop environment
+           being used.
+        
+        Returns:
+        str:    OS desktop      (ex:Gnome,XFCE,KDE,Windows,default:Unknown)
+        """
+        return self._field('_desktop')
+      
+    def title(self) -> str:
+        """
+        Title
+
+           Title to be used for output header.  Default={prettyname}
+        
+        Returns:
+        str:    Title           
+        """
+        return self._title or self._field('_prettyname')
+
+    def logFile(self) -> str:
+        """
+        Log File 
+
+            Log File Name
+
+        Returns:
+        none
+        """
+        if self._logFile is None:
+            default_folder  = '.testout'
+            lFolder         = '.'
+            if os.path.exists(default_folder):
+                lFolder     = default_folder
+            self._logFile   = lFolder + '/osinfo-testout-' + self.flavverflav() + '.txt'
+
+        return self._logFile
+
+    # Logical Properties
+
+    def isWindows(self) -> bool:
+        """
+        Is Windows
+
+        Returns:
+        bool:   isWindows       (true/false)
+        """
+        return self._field('_isWindows')
+
+    def isWsl(self) -> bool:
+        """
+        Is Windows Subystem for Linux
+
+        Returns:
+        bool:   isWsl           (true/false)
+        """
+        return self._field('_isWsl')
+
+    def isPosix(self) -> bool:
+        """
+        Is Posix (Linux or Unix)
+
+        Returns:
+        bool:   isPosix         (true/false)
+        """
+        return self._field('_isPosix')
+
+    def isLinux(self) -> bool:
+        """
+        Is Linux
+
+        Returns:
+        bool:   isLinux         (true/false)
+        """
+        return self._field('_isLinux')
+
+    def isCygwyn(self) -> bool:
+        """
+        Is Cygwin
+
+        Returns:
+        bool:   isCygwin        (true/false)
+        """
+        return self._field('_isCygwin')
+
+    def isDebian(self) -> bool:
+        """
+        Is Debian
+
+        Returns:
+        bool:   isDebian        (true/false)
+        """
+        return self._field('_isDebian')
+    
+    def isUbuntu(self) -> bool:
+        """
+        Is Ubuntu
+
+        Returns:
+        bool:   isUbuntu        (true/false)
+        """
+        return self._field('_isUbuntu')
+
+    def isOpenSuse(self) -> bool:
+        """
+        Is OpenSUSE
+
+        Returns:
+        bool:   isOpenSuse      (true/false)
+        """
+        return self._field('_isOpenSuse')
+
+    def isRedhat(self) -> bool:
+        """
+        Is Redhat
+
+        Returns:
+        bool:   isRedhat       (true/false)
+        """
+        return self._field('_isRedhat')
+
+    def isCentOS(self) -> bool:
+        """
+        Is CentOS
+
+        Returns:
+        bool:   isCentOS       (true/false)
+        """
+        return self._field('_isCentOS')
+
+    #
+    # Public Properties - Setters
+    #
+    def setTitle(self,title):
+        """
+        Set Title
+        
+        Returns:
+        none
+        """
+        self._title     = title
+
+    def setLogEnable(self,enable):
+        """
+        Set Log Enable
+
+            Turns writing Dump() reports to the log file on or off.
+
+        Returns:
+        none
+        """
+        self._logEnable = enable
+
+    #
+    # Public Methods
+    #
+
+    def Dump(self,fmt='text'):
+        """
+        Dump
+
+          Print values of all public properties, and write them to the log.
+          The report is rendered first, then written once to each.
+
+          fmt: 'text', 'json', or 'kv' (key=value lines)
+
+        Returns:
+        none
+        """
+        lText   = self._renderDump(self.toDict(),self._qnul(self.title()),fmt)
+        self._barf(lText,'w')
+
+    def DumpDebugVars(self,fmt='text'):
+        """
+        Dump Debug Variables
+
+          Print values of all debug data, and append them to the log.
+
+          fmt: 'text', 'json', or 'kv' (key=value lines)
+
+        Returns:
+        none
+        """
+        lText   = self._renderDebug(self.toDict(True),fmt)
+        self._barf(lText)
+
+    @classmethod
+    def dumpMany(cls,records,out=None,fmt='text',debug=False) -> int:
+        """
+        Dump Many
+
+            Dump() of many records into one file, through one buffered
+            writer.  A record is an OsInfo, an OsInfoSnapshot, or a
+            (root, record) pair as yielded by scanRoots().  debug adds the
+            DumpDebugVars() data of OsInfo records.
+
+            out: file name, or open text file (default: stdout)
+
+        Returns:
+        int: records written
+        """
+        if out is None:
+            return cls._dumpRecords(records,sys.stdout,fmt,debug)
+        if not isinstance(out,str):
+            return cls._dumpRecords(records,out,fmt,debug)
+        try:
+            with open(out,'w',buffering=cls._dumpBuffer) as fh:
+                return cls._dumpRecords(records,fh,fmt,debug)
+        except IOError:
+            print("Error: Could not open file '{0}'.".format(out))
+            return 0
+
+    @classmethod
+    def _dumpRecords(cls,records,fh,fmt,debug) -> int:
+        lCount  = 0
+        for record in records:
+            lRoot   = None
+            if isinstance(record,tuple):
+                lRoot, record = record
+            lDebug  = debug and isinstance(record,OsInfo)
+            lDict   = record.toDict(lDebug) if isinstance(record,OsInfo) else record.toDict()
+            lTitle  = record.title() if isinstance(record,OsInfo) else lDict['prettyname']
+            if lRoot is not None:
+                lDict['root']   = lRoot
+                lTitle          = '{} ({})'.format(lTitle,lRoot)
+            if fmt == 'json':
+                fh.write(_jsonDumps(lDict) + '\n')
+            else:
+                fh.write(cls._renderDump(lDict,lTitle,fmt) + '\n')
+                if lDebug:
+                    fh.write(cls._renderDebug(lDict,fmt) + '\n')
+            lCount += 1
+        return lCount
+
+    _dumpBuffer         = 1 << 16                   # dumpMany() file buffer size
+
+    @classmethod
+    def _renderDump(cls,fields,title,fmt='text') -> str:
+        """
+        Render Dump
+
+            Dump() report of toDict() output, without a trailing newline.
+
+        Returns:
+        str: report text
+        """
+        if fmt == 'json':
+            return _jsonDumps(fields)
+        fields  = dict(fields,kernel='.'.join(str(n) for n in fields['kernel']) or 'Unknown')
+        if fmt == 'kv':
+            return cls._renderKv((key,value) for key, value in fields.items() if key != 'debug')
+        if fmt != 'text':
+            raise ValueError("Dump format must be 'text', 'json', or 'kv', not {!r}".format(fmt))
+
+        outfmt="{0:21} {1:30}"
+        boolfmt="{0:21} {1}"                                        # :30 causes bools to print as ints, and not T/F ?
+        lLines  = ["="*80, title, "="*80, "OS INFO", outfmt.format("-"*21,"-"*30),
+                   outfmt.format("currdate",datetime.now().strftime("%Y.%m.%d"))]
+        if 'root' in fields:
+            lLines.append(outfmt.format("root",fields['root']))
+        for field in OsInfoSnapshot._fields:
+            value   = fields[field]
+            label   = 'flaverflav' if field == 'flavverflav' else field
+            lLines.append((boolfmt if isinstance(value,bool) else outfmt).format(label,str(value)))
+        return '\n'.join(lLines)
+
+    @classmethod
+    def _renderDebug(cls,fields,fmt='text') -> str:
+        """
+        Render Debug
+
+            DumpDebugVars() report of toDict(debug=True) output, without a
+            trailing newline.
+
+        Returns:
+        str: report text
+        """
+        lDebug  = fields['debug']
+        if fmt == 'json':
+            return _jsonDumps(lDebug)
+        if fmt == 'kv':
+            return cls._renderKv(itertools.chain(
+                        ((key,value) for key, value in lDebug.items() if key != 'osRelease'),
+                        (('osRelease.' + key,value) for key, value in (lDebug['osRelease'] or {}).items())))
+        if fmt != 'text':
+            raise ValueError("Dump format must be 'text', 'json', or 'kv', not {!r}".format(fmt))
+
+        outfmt="{0:21} {1:30}"
+        lLines  = ["-- debug data---"]
+        for key, value in lDebug.items():
+            if key.startswith(('uname_','platform_')):
+                lLines.append(outfmt.format(key,str(value)))
+        if fields['isLinux']:
+            lLines.append('-- {} --'.format(lDebug['osReleaseFile']))
+            for key, value in (lDebug['osRelease'] or {}).items():
+                lLines.append(outfmt.format(key,value))
+        return '\n'.join(lLines)
+
+    _kvPlain            = re.compile(r'[A-Za-z0-9_.,:/+@%-]*')
+
+    @classmethod
+    def _renderKv(cls,items) -> str:
+        """
+        Render Key/Value
+
+            key=value lines; values other than plain words are JSON quoted,
+            and booleans are true/false.
+
+        Returns:
+        str: key=value lines
+        """
+        lLines  = []
+        for key, value in items:
+            if isinstance(value,bool) or value is None:
+                value   = json.dumps(value)
+            else:
+                value   = str(value)
+                if not cls._kvPlain.fullmatch(value):
+                    value   = json.dumps(value,ensure_ascii=False)
+            lLines.append('{}={}'.format(key,value))
+        return '\n'.join(lLines)
+
+class OsInfoSnapshot(object):
+    """
+    OsInfoSnapshot Object
+
+        Immutable OS information record, from OsInfo.snapshot().  Has the
+        same getters as OsInfo, and is small, hashable, and cheap to compare,
+        for keeping large inventories of hosts.  Strings are interned, so
+        records for the same OS share them.  Round-trips through pickle, and
+        through JSON with toJson()/fromJson().
+
+    Returns:
+    object: OsInfoSnapshot  OS Information Snapshot
+    """
+    __slots__ = ('_values','_hash','_versionKey','_fingerprint')
+
+    _fields     = ('type','kernel','machine','distrobase','codename','name','prettyname','flavor',
+                   'release','version','revision','flavverflav','desktop',
+                   'isWindows','isWsl','isPosix','isLinux','isCygwin','isDebian','isUbuntu',
+                   'isOpenSuse','isRedhat','isCentOS')
+    _defaults   = dict({f: False for f in _fields if f.startswith('is')},kernel=())
+
+    def __init__(self,values):
+        """
+        OsInfoSnapshot Object Constructor
+
+            values: field values, in _fields order
+
+        Returns:
+        none
+        """
+        if len(values) != len(self._fields):
+            raise ValueError('OsInfoSnapshot needs {} values, got {}'.format(len(self._fields),len(values)))
+        object.__setattr__(self,'_values',tuple(sys.intern(v) if type(v) is str else v for v in values))
+        object.__setattr__(self,'_hash',None)
+        object.__setattr__(self,'_versionKey',_versionKey(*self._values[8:11]))
+        object.__setattr__(self,'_fingerprint',None)
+
+    def __setattr__(self,name,value):
+        raise AttributeError('OsInfoSnapshot is immutable')
+
+    def __delattr__(self,name):
+        raise AttributeError('OsInfoSnapshot is immutable')
+
+    def __eq__(self,other):
+        if not isinstance(other,OsInfoSnapshot):
+            return NotImplemented
+        return self._values == other._values
+
+    def __ne__(self,other):
+        if not isinstance(other,OsInfoSnapshot):
+            return NotImplemented
+        return self._values != other._values
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self,'_hash',hash(self._values))
+        return self._hash
+
+    def __reduce__(self):
+        return (OsInfoSnapshot,(self._values,))
+
+    def __repr__(self):
+        return 'OsInfoSnapshot({})'.format(', '.join('{}={!r}'.format(f,v) for f,v in zip(self._fields,self._values)))
+
+    def fingerprint(self) -> str:
+        """
+        OS Fingerprint
+
+            See OsInfo.fingerprint().  Made on first use, and kept.
+
+        Returns:
+        str:    OS fingerprint  (32 hex digits)
+        """
+        if self._fingerprint is None:
+            lValues = self._values
+            object.__setattr__(self,'_fingerprint',_fingerprint(lValues[0],lValues[7],lValues[3],self._versionKey,
+                                                                lValues[1],lValues[2],lValues[14]))
+        return self._fingerprint
+
+    def toDict(self) -> dict:
+        """
+        To Dict
+
+        Returns:
+        dict: field name -> value
+        """
+        return dict(zip(self._fields,self._values))
+
+    @classmethod
+    def fromDict(cls,fields) -> 'OsInfoSnapshot':
+        """
+        From Dict
+
+            Builds a snapshot from toDict() output.  Missing fields are
+            'Unknown', or False for is* flags, or () for kernel.  Lists (as
+            read from JSON) become tuples.
+
+        Returns:
+        object: OsInfoSnapshot  OS Information Snapshot
+        """
+        lValues = (fields.get(f,cls._defaults.get(f,'Unknown')) for f in cls._fields)
+        return cls(tuple(tuple(v) if type(v) is list else v for v in lValues))
+
+    def toJson(self) -> str:
+        """
+        To JSON
+
+        Returns:
+        str: JSON object of toDict()
+        """
+        return _jsonDumps(self.toDict())
+
+    @classmethod
+    def fromJson(cls,text) -> 'OsInfoSnapshot':
+        """
+        From JSON
+
+        Returns:
+        object: OsInfoSnapshot  OS Information Snapshot
+        """
+        return cls.fromDict(json.loads(text))
+
+class OsInfoLogHook(object):
+    """
+    OsInfoLogHook Object
+
+        Trace hook logging each probe's time, and debug messages, to a
+        logging logger.
+
+        ex: OsInfo.addHook(OsInfoLogHook())
+
+    Returns:
+    object: OsInfoLogHook   Log Hook
+    """
+
+    def __init__(self,logger=None,level=logging.DEBUG):
+        self._logger    = logger if logger is not None else logging.getLogger('osinfo')
+        self._level     = level
+
+    def __call__(self,event,osi,stage,value):
+        if not self._logger.isEnabledFor(self._level):
+            return
+        if event == 'stop':
+            self._logger.log(self._level,'osinfo %s: probe %s took %.1f us',osi._root or 'host',stage,value / 1e3)
+        elif event == 'debug':
+            self._logger.log(self._level,'osinfo %s: %s: %s',osi._root or 'host',stage,value)
+
+class OsInfoSpanHook(object):
+    """
+    OsInfoSpanHook Object
+
+        Trace hook opening a span per probe on an OpenTelemetry style tracer:
+        anything with start_span(name) returning a span with set_attribute(),
+        add_event(), and end().  Debug messages become span events.
+
+        ex: OsInfo.addHook(OsInfoSpanHook(opentelemetry.trace.get_tracer('osinfo')))
+
+    Returns:
+    object: OsInfoSpanHook  Span Hook
+    """
+
+    def __init__(self,tracer):
+        self._tracer    = tracer
+        self._spans     = {}                        # (osi id, stage, thread id) -> open span
+
+    def __call__(self,event,osi,stage,value):
+        lKey    = (id(osi),stage,threading.get_ident())
+        if event == 'start':
+            lSpan   = self._tracer.start_span('osinfo.' + stage)
+            lSpan.set_attribute('osinfo.root',osi._root or 'host')
+            self._spans[lKey] = lSpan
+        elif event == 'stop':
+            lSpan   = self._spans.pop(lKey,None)
+            if lSpan is not None:
+                lSpan.set_attribute('osinfo.elapsed_ns',value)
+                lSpan.end()
+        elif event == 'debug':
+            lSpan   = self._spans.get(lKey)
+            if lSpan is not None:
+                lSpan.add_event(value)
+
+class _Agent(object):
+    """
+    Agent
+
+        State of a running agent (see OsInfo.startAgent()): the detected
+        fields, with whole replies encoded once, and rebuilt when a release
+        file changes.  Release files are checked, and detection run, on an
+        executor thread, so a slow /etc never holds up the event loop;
+        replies are served from the state last built.
+    """
+
+    _notReady   = b'{"status":"not-ready","error":"Agent has not finished detecting"}\n'
+
+    def __init__(self,cls,poll,loop):
+        self._cls       = cls
+        self._poll      = poll
+        self._loop      = loop
+        self._stamp     = None
+        self._state     = None                      # (fields, replies), replaced whole
+        self._checked   = 0.0
+        self._checking  = None                      # Check in flight, on the executor
+
+    def _check(self):
+        """
+        Check
+
+            Detects again if a release file changed.  Runs on an executor
+            thread.
+
+        Returns:
+        none
+        """
+        lStamp          = self._cls._stamp()
+        if lStamp == self._stamp:
+            return
+        lInfo           = self._cls().detect()
+        lFields         = lInfo.toDict()
+        self._state     = (lFields,{
+                            'snapshot'  : (_jsonDumps(lFields) + '\n').encode(),
+                            'state'     : (_jsonDumps(lInfo._cacheFields()) + '\n').encode(),
+                          })
+        self._stamp     = lStamp
+
+    def check(self):
+        """
+        Check
+
+            Starts a check on the executor, unless one is in flight.
+
+        Returns:
+        future: the check
+        """
+        if self._checking is None:
+            self._checked   = time.monotonic()
+            self._checking  = self._loop.run_in_executor(None,self._check)
+            self._checking.add_done_callback(self._checkDone)
+        return self._checking
+
+    def _checkDone(self,future):
+        self._checking  = None
+        if not future.cancelled() and future.exception() is not None:
+            print("Error: OsInfo agent could not detect: {}".format(future.exception()))
+
+    def reply(self,line) -> bytes:
+        """
+        Reply
+
+        Returns:
+        bytes: JSON reply line to a JSON request line
+        """
+        if time.monotonic() - self._checked >= self._poll:
+            self.check()
+        lState      = self._state
+        if lState is None:
+            return self._notReady
+        lFields, lReplies = lState
+        try:
+            lRequest    = json.loads(line) if line.strip() else {}
+            lOp         = lRequest.get('op','snapshot')
+            if lOp == 'fields':
+                lUnknown    = [field for field in lRequest['fields'] if field not in lFields]
+                if lUnknown:
+                    return self._error('unknown-field','Unknown field(s): {}'.format(', '.join(map(str,lUnknown))))
+                return (_jsonDumps({field: lFields[field] for field in lRequest['fields']}) + '\n').encode()
+            return lReplies[lOp]
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return self._error('bad-request','Bad request: {!r}'.format(e))
+
+    @staticmethod
+    def _error(status,message) -> bytes:
+        return (_jsonDumps({'status': status, 'error': message}) + '\n').encode()
+
+class _AgentProtocol(object):
+    """
+    Agent Protocol
+
+        One agent client connection: replies to each request line as it
+        arrives.  A plain asyncio protocol, rather than streams, as most
+        clients connect for a single request.  Not derived from
+        asyncio.Protocol, so asyncio is only imported to serve.
+    """
+    _maxLine    = 65536
+
+    def __init__(self,agent):
+        self._agent     = agent
+        self._buffer    = b''
+        self._transport = None
+
+    def connection_made(self,transport):
+        self._transport = transport
+
+    def data_received(self,data):
+        self._buffer   += data
+        if b'\n' not in self._buffer:
+            if len(self._buffer) > self._maxLine:
+                self._transport.close()
+            return
+        *lLines, self._buffer = self._buffer.split(b'\n')
+        self._transport.write(b''.join(self._agent.reply(line) for line in lLines))
+
+    def eof_received(self):
+        return None
+
+    def connection_lost(self,exc):
+        self._transport = None
+
+    def pause_writing(self):
+        pass
+
+    def resume_writing(self):
+        pass
+
+class _Inotify(object):
+    """
+    Inotify
+
+        Linux inotify, through ctypes, watching folders for files being
+        written, created, moved, or deleted.  Raises OSError where there is
+        no inotify.
+    """
+    _mask       = 0x008 | 0x040 | 0x080 | 0x100 | 0x200     # CLOSE_WRITE MOVED_FROM MOVED_TO CREATE DELETE
+    _event      = struct.Struct('iIII')
+
+    def __init__(self,folders):
+        try:
+            lLibc       = ctypes.CDLL(None,use_errno=True)
+            lInit       = lLibc.inotify_init1
+            lAdd        = lLibc.inotify_add_watch
+        except (OSError, AttributeError, TypeError):
+            raise OSError('inotify is not available')
+        lAdd.argtypes   = (ctypes.c_int,ctypes.c_char_p,ctypes.c_uint32)
+        self.fd         = lInit(0o2004000)          # IN_CLOEXEC | IN_NONBLOCK
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(),'inotify_init1 failed')
+        self._folders   = {}                        # watch descriptor -> folder
+        for folder in folders:
+            wd  = lAdd(self.fd,os.fsencode(folder),self._mask)
+            if wd >= 0:
+                self._folders[wd]   = folder
+        if not self._folders:
+            self.close()
+            raise OSError('inotify could not watch {}'.format(', '.join(folders)))
+
+    def read(self) -> set:
+        """
+        Read
+
+        Returns:
+        set: paths of files with events waiting
+        """
+        lPaths  = set()
+        while True:
+            try:
+                lData   = os.read(self.fd,65536)
+            except BlockingIOError:
+                return lPaths
+            lOffset = 0
+            while lOffset + self._event.size <= len(lData):
+                wd, mask, cookie, size = self._event.unpack_from(lData,lOffset)
+                lOffset    += self._event.size
+                lName       = lData[lOffset:lOffset + size].rstrip(b'\0')
+                lOffset    += size
+                if wd in self._folders and lName:
+                    lPaths.add(os.path.join(self._folders[wd],os.fsdecode(lName)))
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class OsInfoWatcher(object):
+    """
+    OsInfoWatcher Object
+
+        Watches an OsInfo's release files on a daemon thread, and re-runs the
+        probes that read a file when it changes.  See OsInfo.watch().
+
+    Returns:
+    object: OsInfoWatcher   Watcher
+    """
+    _settle     = 0.05                              # Seconds to let a burst of changes finish
+
+    def __init__(self,osi,interval=2.0,inotify=True):
+        self._osi           = osi
+        self._interval      = interval
+        self._files         = osi._watchFiles()
+        self._callbacks     = ()
+        self._stopped       = threading.Event()
+        self._thread        = None
+        self._inotify       = None
+        self._wake          = None                  # Pipe stop() writes to; None once closed
+        self._wakeLock      = threading.Lock()
+        if inotify:
+            try:
+                self._inotify   = _Inotify(sorted(set(os.path.dirname(path) for path in self._files)))
+                self._wake      = os.pipe()
+            except OSError:
+                self._inotify   = None
+        self._stats         = self._statFiles()
+
+    def mode(self) -> str:
+        """
+        Mode
+
+        Returns:
+        str: 'inotify' or 'poll'
+        """
+        return 'inotify' if self._inotify is not None else 'poll'
+
+    def subscribe(self,callback):
+        """
+        Subscribe
+
+            Calls callback(osi, {field: (old, new)}) when fields change.
+
+        Returns:
+        none
+        """
+        self._callbacks     = self._callbacks + (callback,)
+
+    def unsubscribe(self,callback):
+        """
+        Unsubscribe
+
+        Returns:
+        none
+        """
+        self._callbacks     = tuple(c for c in self._callbacks if c is not callback)
+
+    def start(self):
+        """
+        Start
+
+            Starts the watcher thread, if it is not running.
+
+        Returns:
+        none
+        """
+        if self._thread is None:
+            self._thread    = threading.Thread(target=self._run,name='osinfo-watcher',daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stop
+
+            Stops the watcher thread, and waits for it.  Stopping again does
+            nothing.
+
+        Returns:
+        none
+        """
+        with self._wakeLock:
+            self._stopped.set()
+            if self._wake is not None:
+                os.write(self._wake[1],b'x')
+        if self._thread is None:
+            self._close()
+        elif self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _close(self):
+        """
+        Close
+
+            Closes the inotify descriptor and wake pipe, once.
+
+        Returns:
+        none
+        """
+        with self._wakeLock:
+            if self._wake is not None:
+                self._inotify.close()
+                os.close(self._wake[0])
+                os.close(self._wake[1])
+                self._wake  = None
+
+    def _statFiles(self) -> dict:
+        lStats  = {}
+        for path in self._files:
+            try:
+                st  = os.stat(path)
+                lStats[path]    = (st.st_ino,st.st_mtime_ns,st.st_size)
+            except OSError:
+                lStats[path]    = None
+        return lStats
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                if self._inotify is not None:
+                    lReady  = select.select([self._inotify.fd,self._wake[0]],[],[])[0]
+                    if self._wake[0] in lReady:
+                        break
+                    self._stopped.wait(self._settle)
+                    lPaths  = self._inotify.read() & set(self._files)
+                    if lPaths:
+                        self._check(lPaths)
+                elif self._stopped.wait(self._interval):
+                    break
+                else:
+                    self._check()
+        finally:
+            self._close()
+
+    def _check(self,paths=None):
+        """
+        Check
+
+            Re-runs the probes of files that changed (paths, or else those
+            whose stats changed), and notifies subscribers of changed fields.
+
+        Returns:
+        none
+        """
+        lStats      = self._statFiles()
+        if paths is None:
+            paths   = [path for path in lStats if lStats[path] != self._stats.get(path)]
+        lProbes     = set(probe for path in paths for probe in self._files[path])
+        self._stats = lStats
+        if not lProbes:
+            return
+        lChanged    = self._osi._reprobe(lProbes)
+        if lChanged:
+            for callback in self._callbacks:
+                try:
+                    callback(self._osi,lChanged)
+                except Exception as e:
+                    print("Error: OsInfo watch callback {0!r} failed: {1}".format(callback,e))
+
+class OsInfoEnv(object):
+    """
+    OsInfoEnv Object
+
+        Where OsInfo gets its raw inputs: os.name, os.uname(),
+        platform.uname(), environment variables, and files.  This one reads
+        the running host; OsInfo(env=...) takes another.  Only detection of
+        the host goes through it: root filesystems and images are read
+        directly, and the cache, agent, resources(), and kernelCaps() are
+        about the running process, and read the host.
+
+    Returns:
+    object: OsInfoEnv       OS Information Environment
+    """
+
+    def osName(self) -> str:
+        return os.name
+
+    def uname(self) -> tuple:
+        return tuple(os.uname())
+
+    def platformUname(self) -> tuple:
+        return tuple(platform.uname())[:5]
+
+    def getenv(self,key) -> str:
+        return os.environ.get(key)
+
+    def readFile(self,fileName,until=None) -> bytes:
+        """
+        Read File
+
+            With until, a callable taking a line, reads lines only up to the
+            first one until() is true for (environments may return more).
+
+        Returns:
+        bytes: file contents (raises OSError)
+        """
+        with open(fileName,'rb') as fh:
+            if until is None:
+                return fh.read()
+            lLines  = []
+            for line in fh:
+                lLines.append(line)
+                if until(line):
+                    break
+            return b''.join(lLines)
+
+class OsInfoEnvCapture(OsInfoEnv):
+    """
+    OsInfoEnvCapture Object
+
+        Environment that passes another's inputs through (the host's by
+        default), recording each one, files not found included, into a
+        bundle that OsInfoEnvReplay can run detection against anywhere.
+        Files detection parses only part of (see _compactFiles) keep just
+        those lines.
+
+        ex: cap = OsInfoEnvCapture()
+            OsInfo(env=cap).detect()
+            cap.save('centos7.json')
+
+    Returns:
+    object: OsInfoEnvCapture    Capturing Environment
+    """
+    _bundleVersion  = 1
+    _compactFiles   = {'/proc/cpuinfo': '_cpuinfoLine'}     # File -> OsInfo method keeping the lines detection parses
+
+    def __init__(self,env=None):
+        self._env       = env or OsInfo._env
+        self._bundle    = {'version': self._bundleVersion, 'environ': {}, 'files': {}}
+
+    def osName(self) -> str:
+        self._bundle['osName']      = value = self._env.osName()
+        return value
+
+    def uname(self) -> tuple:
+        self._bundle['uname']       = value = tuple(self._env.uname())
+        return value
+
+    def platformUname(self) -> tuple:
+        self._bundle['platformUname']   = value = tuple(self._env.platformUname())
+        return value
+
+    def getenv(self,key) -> str:
+        self._bundle['environ'][key]    = value = self._env.getenv(key)
+        return value
+
+    def readFile(self,fileName,until=None) -> bytes:
+        try:
+            value   = self._env.readFile(fileName,until)
+        except FileNotFoundError:
+            self._bundle['files'][fileName] = None
+            raise
+        lCompact    = self._compactFiles.get(fileName)
+        lKept       = value if lCompact is None else getattr(OsInfo,lCompact)(value)
+        self._bundle['files'][fileName] = lKept.decode('latin-1')
+        return value
+
+    def bundle(self) -> dict:
+        """
+        Bundle
+
+            The inputs read so far, JSON ready.  File contents are text,
+            each byte one character (latin-1); files not found are None.
+
+        Returns:
+        dict: bundle
+        """
+        return json.loads(self.toJson())
+
+    def toJson(self) -> str:
+        return _jsonDumps(self._bundle)
+
+    def save(self,fileName):
+        """
+        Save
+
+            Writes the bundle to a JSON file.
+
+        Returns:
+        none
+        """
+        with open(fileName,'w') as fh:
+            fh.write(self.toJson())
+
+class OsInfoEnvReplay(OsInfoEnv):
+    """
+    OsInfoEnvReplay Object
+
+        Environment replaying a bundle (OsInfoEnvCapture.bundle(), its JSON,
+        or a hand written dict of the same shape), so detection sees
+        another host.  Files and environment variables not in the bundle
+        are absent; other inputs not in it raise KeyError.
+
+        ex: OsInfo(env=OsInfoEnvReplay.load('centos7.json')).flavor()
+
+    Returns:
+    object: OsInfoEnvReplay     Replaying Environment
+    """
+
+    def __init__(self,bundle):
+        if isinstance(bundle,(str,bytes)):
+            bundle  = json.loads(bundle)
+        if bundle.get('version',1) != OsInfoEnvCapture._bundleVersion:
+            raise ValueError('Unsupported OsInfoEnv bundle version {}'.format(bundle.get('version')))
+        self._bundle    = bundle
+        self._uname     = tuple(bundle['uname']) if 'uname' in bundle else None
+        self._platform  = tuple(bundle['platformUname']) if 'platformUname' in bundle else None
+        self._environ   = dict(bundle.get('environ') or {})
+        self._files     = {name: None if text is None else text.encode('latin-1') for name, text in (bundle.get('files') or {}).items()}
+
+    @classmethod
+    def load(cls,fileName) -> 'OsInfoEnvReplay':
+        """
+        Load
+
+        Returns:
+        object: OsInfoEnvReplay     Replaying Environment, from a saved bundle
+        """
+        with open(fileName,'r') as fh:
+            return cls(json.load(fh))
+
+    def osName(self) -> str:
+        return self._bundle['osName']
+
+    def uname(self) -> tuple:
+        if self._uname is None:
+            raise KeyError('uname is not in the bundle')
+        return self._uname
+
+    def platformUname(self) -> tuple:
+        if self._platform is None:
+            raise KeyError('platformUname is not in the bundle')
+        return self._platform
+
+    def getenv(self,key) -> str:
+        return self._environ.get(key)
+
+    def readFile(self,fileName,until=None) -> bytes:
+        lData   = self._files.get(fileName)
+        if lData is None:
+            raise FileNotFoundError(fileName)
+        return lData
+
+def _snapshotGetter(index,field):
+    if index is None:
+        def getter(self):
+            return getattr(self,'_' + field)
+    else:
+        def getter(self):
+            return self._values[index]
+    getter.__name__     = field
+    getter.__qualname__ = 'OsInfoSnapshot.' + field
+    getter.__doc__      = OsInfo.__dict__[field].__doc__ if field in OsInfo.__dict__ else None
+    return getter
+
+for _index, _field in enumerate(OsInfoSnapshot._fields):
+    setattr(OsInfoSnapshot,_field,_snapshotGetter(_index,_field))
+OsInfoSnapshot.name         = _snapshotGetter(OsInfoSnapshot._fields.index('flavor'),'name')    # name() is the flavor, as in OsInfo
+OsInfoSnapshot.versionKey   = _snapshotGetter(None,'versionKey')
+OsInfoSnapshot.matches      = OsInfo.matches
+OsInfoSnapshot.atLeast      = OsInfo.atLeast
+
+def _parseVersion(text) -> tuple:
+    """
+    Parse Version
+
+        Leading dot separated numbers of a version string.
+
+        ex: '20.04.6 LTS' -> (20,4,6), '11 (bullseye)' -> (11,), 'rolling' -> ()
+
+    Returns:
+    tuple: version numbers
+    """
+    match   = _versionNumbers.match(text) if isinstance(text,str) else None
+    if not match:
+        return ()
+    return tuple(int(part) for part in match.group(0).split('.'))
+
+_versionNumbers = re.compile(r'[0-9]+(?:\.[0-9]+)*')
+
+def _trimVersion(key) -> tuple:
+    while key and key[-1] == 0:
+        key     = key[:-1]
+    return key
+
+@functools.lru_cache(maxsize=4096)
+def _versionKey(release,version,revision) -> tuple:
+    """
+    Version Key
+
+        The longest of the parsed release, version, and revision that
+        extends the release, without trailing zeros.  Cached, so hosts with
+        the same versions share one tuple.
+
+        ex: ('20.04','bullseye/sid','20.04.6 LTS') -> (20,4,6)
+
+    Returns:
+    tuple: version numbers
+    """
+    lKey    = _parseVersion(release)
+    for text in (version,revision):
+        lNext   = _parseVersion(text)
+        if len(lNext) > len(lKey) and lNext[:len(lKey)] == lKey:
+            lKey    = lNext
+    return _trimVersion(lKey)
+
+_fingerprintVersion = b'osinfo-fp2'
+_machineAliases = {'amd64': 'x86_64', 'x64': 'x86_64', 'arm64': 'aarch64', 'i386': 'x86', 'i686': 'x86'}
+
+@functools.lru_cache(maxsize=4096)
+def _fingerprint(type,flavor,distrobase,versionKey,kernel,machine,isWsl) -> str:
+    """
+    Fingerprint
+
+        blake2b over the normalized profile fields: strings are stripped and
+        lower cased, with 'Unknown' as empty; versions are dotted numbers;
+        machine aliases (AMD64, arm64) are folded.  Prefixed by a format
+        version, so a change in normalization changes every fingerprint.
+
+    Returns:
+    str: 32 hex digits
+    """
+    def norm(value):
+        if isinstance(value,tuple):
+            return '.'.join(str(n) for n in value)
+        if isinstance(value,bool):
+            return '1' if value else '0'
+        value   = str(value).strip().lower()
+        return '' if value == 'unknown' else value
+    lMachine    = norm(machine)
+    lFields     = (norm(type),norm(flavor),norm(distrobase),norm(versionKey),norm(kernel),
+                   _machineAliases.get(lMachine,lMachine),norm(isWsl))
+    return hashlib.blake2b(_fingerprintVersion + b'\0' + '\x1f'.join(lFields).encode(),digest_size=16).hexdigest()
+
+_versionCompare = re.compile(r'\s*(==|!=|<=|>=|<|>)\s*([0-9]+(?:\.[0-9]+)*)\s*$')
+
+@functools.lru_cache(maxsize=1024)
+def _versionSpec(spec) -> tuple:
+    """
+    Version Spec
+
+        Compiles an OsInfo.matches() spec.
+
+        ex: 'Debian>=10,<12' -> ('debian', ((operator.ge,(10,)), (operator.lt,(12,))))
+
+    Returns:
+    tuple: casefolded flavor or None, and (compare, version key) pairs
+    """
+    lStart      = len(spec)
+    for index, char in enumerate(spec):
+        if char in '<>=!':
+            lStart  = index
+            break
+    lFlavor     = spec[:lStart].strip().casefold() or None
+    lCompares   = []
+    if lStart < len(spec):
+        for clause in spec[lStart:].split(','):
+            match   = _versionCompare.match(clause)
+            if not match:
+                raise ValueError('Bad version compare {!r} in spec {!r}'.format(clause,spec))
+            lCompares.append((FleetTable._ops[match.group(1)],_trimVersion(_parseVersion(match.group(2)))))
+    return (lFlavor,tuple(lCompares))
+
+@functools.lru_cache(maxsize=4096)
+def _versionNumber(text) -> float:
+    """
+    Version Number
+
+        A version as one number that orders like the version, for numeric
+        columns: major*1e6 + minor*1e3 + patch.  NaN if there is none.
+
+    Returns:
+    float: version number
+    """
+    lKey    = _parseVersion(text)
+    if not lKey:
+        return float('nan')
+    lKey    = (lKey + (0,0))[:3]
+    return lKey[0] * 1e6 + min(lKey[1],999) * 1e3 + min(lKey[2],999)
+
+class FleetTable(object):
+    """
+    FleetTable Object
+
+        Column store of OS information for many hosts, for counting and
+        grouping.  flavor, distrobase, codename, desktop, and any tag columns
+        (datacenter, ...) are dictionary encoded as integer codes; release
+        and version are numeric (see _versionNumber).  Queries use NumPy when
+        it is installed, and plain Python over the array columns otherwise.
+
+        ex: t = FleetTable(tags=('datacenter',))
+            t.append(snapshot, datacenter='dc1')
+            t.groupCount('datacenter', t.where(flavor='Ubuntu', release=('<','22.04')))
+
+    Returns:
+    object: FleetTable      Fleet Table
+    """
+
+    _codedColumns   = ('flavor','distrobase','codename','desktop')
+    _numericColumns = ('release','version')
+    _ops            = {
+                        '==' : operator.eq,
+                        '!=' : operator.ne,
+                        '<'  : operator.lt,
+                        '<=' : operator.le,
+                        '>'  : operator.gt,
+                        '>=' : operator.ge,
+                      }
+
+    def __init__(self,tags=()):
+        """
+        FleetTable Object Constructor
+
+            tags: names of extra, dictionary encoded, columns
+
+        Returns:
+        none
+        """
+        self._tags      = tuple(tags)
+        self._codes     = {}                        # column -> array('i') of codes
+        self._values    = {}                        # column -> list of values, by code
+        self._lookup    = {}                        # column -> dict of value -> code
+        for column in self._codedColumns + self._tags:
+            self._codes[column]     = array.array('i')
+            self._values[column]    = []
+            self._lookup[column]    = {}
+        self._numbers   = {column: array.array('d') for column in self._numericColumns}
+
+    def __len__(self):
+        return len(self._numbers['version'])
+
+    def columns(self) -> tuple:
+        """
+        Columns
+
+        Returns:
+        tuple: column names
+        """
+        return self._codedColumns + self._tags + self._numericColumns
+
+    def append(self,snapshot,**tags):
+        """
+        Append
+
+            Adds one host: an OsInfoSnapshot (or OsInfo), and its tags.
+
+        Returns:
+        none
+        """
+        self._appendRow(snapshot.flavor(),snapshot.distrobase(),snapshot.codename(),snapshot.desktop(),
+                        snapshot.release(),snapshot.version(),tags)
+
+    def appendDict(self,fields):
+        """
+        Append Dict
+
+            Adds one host from a dict, as OsInfoSnapshot.toDict(), plus tags.
+
+        Returns:
+        none
+        """
+        self._appendRow(fields.get('flavor','Unknown'),fields.get('distrobase','Unknown'),
+                        fields.get('codename','Unknown'),fields.get('desktop','Unknown'),
+                        fields.get('release','Unknown'),fields.get('version','Unknown'),fields)
+
+    @classmethod
+    def fromNdjson(cls,lines,tags=()) -> 'FleetTable':
+        """
+        From NDJSON
+
+            Loads one host per line, as written by OsInfoSnapshot.toJson(),
+            plus any tag fields.  Blank lines are skipped.
+
+        Returns:
+        object: FleetTable      Fleet Table
+        """
+        lTable  = cls(tags)
+        for line in lines:
+            if line.strip():
+                lTable.appendDict(json.loads(line))
+        return lTable
+
+    def _appendRow(self,flavor,distrobase,codename,desktop,release,version,tags):
+        for column, value in zip(self._codedColumns,(flavor,distrobase,codename,desktop)):
+            self._codes[column].append(self._code(column,value))
+        for column in self._tags:
+            self._codes[column].append(self._code(column,tags.get(column,'')))
+        self._numbers['release'].append(_versionNumber(release))
+        self._numbers['version'].append(_versionNumber(version))
+
+    def _code(self,column,value) -> int:
+        lLookup = self._lookup[column]
+        lCode   = lLookup.get(value)
+        if lCode is None:
+            lCode   = lLookup[value] = len(lLookup)
+            self._values[column].append(value)
+        return lCode
+
+    def _column(self,column):
+        """
+        Column
+
+        Returns:
+        array: codes or numbers of a column; a NumPy view when NumPy is installed
+        """
+        lData   = self._codes.get(column)
+        if lData is None:
+            lData   = self._numbers.get(column)
+            if lData is None:
+                raise KeyError('No such column: {}'.format(column))
+        lNumpy  = _optional('numpy')
+        if lNumpy is None:
+            return lData
+        return lNumpy.frombuffer(lData,dtype=lNumpy.int32 if lData.typecode == 'i' else lNumpy.float64)
+
+    def where(self,**conditions):
+        """
+        Where
+
+            Row mask for conditions, all of which must hold.  A condition is a
+            value to match, or (op, value) with op one of == != < <= > >=.
+            Numeric columns take version strings: release=('<','22.04').
+
+            ex: t.where(flavor='Ubuntu', release=('<','22.04'))
+
+        Returns:
+        mask: NumPy bool array, or bytearray of 0/1 without NumPy
+        """
+        lNumpy  = _optional('numpy')
+        lMask   = None
+        for column, condition in conditions.items():
+            op, value   = condition if isinstance(condition,tuple) else ('==', condition)
+            lCompare    = self._ops[op]
+            lData       = self._column(column)
+            if column in self._numbers:
+                lValue  = _versionNumber(value)
+            elif op in ('==','!='):
+                lValue  = self._lookup[column].get(value,-1)
+            else:
+                raise ValueError('Only == and != apply to column {}'.format(column))
+            if lNumpy is not None:
+                lNext   = lCompare(lData,lValue)
+                lMask   = lNext if lMask is None else lMask & lNext
+            elif lMask is None:
+                lMask   = bytearray(lCompare(v,lValue) for v in lData)
+            else:
+                lMask   = bytearray(m and lCompare(v,lValue) for m, v in zip(lMask,lData))
+        if lMask is None:
+            lMask   = lNumpy.ones(len(self),dtype=bool) if lNumpy is not None else bytearray(b'\x01' * len(self))
+        return lMask
+
+    def count(self,mask=None) -> int:
+        """
+        Count
+
+        Returns:
+        int: rows, or rows matching mask
+        """
+        if mask is None:
+            return len(self)
+        lNumpy  = _optional('numpy')
+        return int(lNumpy.count_nonzero(mask)) if lNumpy is not None else sum(mask)
+
+    def groupCount(self,columns,mask=None) -> dict:
+        """
+        Group Count
+
+            Counts rows by the values of one or more dictionary encoded
+            columns, optionally only rows in mask.
+
+        Returns:
+        dict: value (or tuple of values, for several columns) -> count
+        """
+        lColumns    = (columns,) if isinstance(columns,str) else tuple(columns)
+        for column in lColumns:
+            if column not in self._codes:
+                raise ValueError('Cannot group by column {}'.format(column))
+        lSizes      = [max(1,len(self._values[column])) for column in lColumns]
+
+        lNumpy      = _optional('numpy')
+        if lNumpy is not None:
+            lKey    = lNumpy.zeros(len(self),dtype=lNumpy.int64)
+            for column, size in zip(lColumns,lSizes):
+                lKey    = lKey * size + self._column(column)
+            if mask is not None:
+                lKey    = lKey[mask]
+            lCounts = lNumpy.bincount(lKey)
+            lItems  = ((int(key), int(lCounts[key])) for key in lNumpy.flatnonzero(lCounts))
+        else:
+            if len(lColumns) == 1:
+                lKeys   = self._codes[lColumns[0]]
+            else:
+                lKeys   = [0] * len(self)
+                for column, size in zip(lColumns,lSizes):
+                    lKeys   = [key * size + code for key, code in zip(lKeys,self._codes[column])]
+            if mask is not None:
+                lKeys   = itertools.compress(lKeys,mask)
+            lItems  = collections.Counter(lKeys).items()
+
+        lResult     = {}
+        for key, count in lItems:
+            lValues = []
+            for column, size in zip(reversed(lColumns),reversed(lSizes)):
+                key, code   = divmod(key,size)
+                lValues.append(self._values[column][code])
+            lValues.reverse()
+            lResult[lValues[0] if len(lColumns) == 1 else tuple(lValues)] = count
+        return lResult
+
+if hasattr(os,'register_at_fork'):
+    os.register_at_fork(after_in_child=OsInfo._afterFork)
+
+def _scanRoot(cls,root):
+    """
+    Scan Root
+
+        scanRoots() worker.  Module level so process pools can pickle it.
+    """
+    return (root, cls(root=root).detect())
+
+def _detectRoot(cls,root):
+    """
+    Detect Root
+
+        detectAsync() worker: the shared host object, or a root filesystem.
+    """
+    return cls.current().detect() if root is None else cls(root=root).detect()
+
+#
+# Distro Rules
+#
+
+def _versionPart(key,count):
+    """
+    Version Part
+
+        Template callable giving the first count dot separated parts of a key.
+    """
+    def part(data):
+        return '.'.join(data[key].split('.')[:count])
+    return part
+
+def _openSuseRelease(data):
+    match = re.match(r'^openSUSE ([A-Za-z]+)$',data['NAME'])
+    return match.group(1) if match else None
+
+def _wslVersion(data):
+    match = re.match(r'^([^()]+) +[(].*',data['VERSION'])
+    return match.group(1) if match else data['VERSION']
+
+OsInfo._env             = OsInfoEnv()
+OsInfo._cacheRecord     = tuple(field for field, probe in OsInfo._fieldProbes.items() if probe in OsInfo._cacheProbes) + ('_debianVersion',)
+OsInfo._cacheLayout     = hashlib.sha1(' '.join(OsInfo._cacheRecord).encode()).hexdigest()[:12]
+OsInfo._genericRule     = _DistroRule('{NAME}',None,derive=False)
+OsInfo._wslRule         = _DistroRule('{NAME}','{ID_LIKE}',derive=False,fields={
+                            'version'       : _wslVersion,
+                            'flavverflav'   : '{NAME}{release}',
+                          })
+
+# Debian
+#   > cat /etc/os-release
+#       PRETTY_NAME="Debian GNU/Linux 11 (bullseye)"
+#       NAME="Debian GNU/Linux"
+#       VERSION_ID="11"
+#       VERSION="11 (bullseye)"
+#       VERSION_CODENAME=bullseye
+#       ID=debian
+#       HOME_URL="https://www.debian.org/"
+#       SUPPORT_URL="https://www.debian.org/support"
+#       BUG_REPORT_URL="https://bugs.debian.org/"
+OsInfo.registerDistro('debian','Debian','Debian','_isDebian',
+                            version     = '{debian_version}',
+                            revision    = '{debian_version}',
+                            flavverflav = '{flavor}{debian_version}')
+
+# Ubuntu
+#   > cat /etc/os-release
+#       NAME="Ubuntu"
+#       VERSION="20.04.6 LTS (Focal Fossa)"
+#       ID=ubuntu
+#       ID_LIKE=debian
+#       PRETTY_NAME="Ubuntu 20.04.6 LTS"
+#       VERSION_ID="20.04"
+#       HOME_URL="https://www.ubuntu.com/"
+#       SUPPORT_URL="https://help.ubuntu.com/"
+#       BUG_REPORT_URL="https://bugs.launchpad.net/ubuntu/"
+#       PRIVACY_POLICY_URL="https://www.ubuntu.com/legal/terms-and-policies/privacy-policy"
+#       VERSION_CODENAME=focal
+#       UBUNTU_CODENAME=focal
+OsInfo.registerDistro('ubuntu','Ubuntu','Debian','_isUbuntu',
+                            version     = '{debian_version}',
+                            flavverflav = '{NAME}{release}')
+
+# OpenSUSE Tumbleweed 2023.04.11
+#   > cat /etc/os-release
+#       NAME="openSUSE Tumbleweed"
+#       # VERSION="20230411"
+#       ID="opensuse-tumbleweed"
+#       ID_LIKE="opensuse suse"
+#       VERSION_ID="20230411"
+#       PRETTY_NAME="openSUSE Tumbleweed"
+#       ANSI_COLOR="0;32"
+#       CPE_NAME="cpe:/o:opensuse:tumbleweed:20230411"
+#       BUG_REPORT_URL="https://bugzilla.opensuse.org"
+#       SUPPORT_URL="https://bugs.opensuse.org"
+#       HOME_URL="https://www.opensuse.org"
+#       DOCUMENTATION_URL="https://en.opensuse.org/Portal:Tumbleweed"
+#       LOGO="distributor-logo-Tumbleweed"
+for _id in ('opensuse','opensuse-tumbleweed','opensuse-leap','opensuse-microos'):
+    OsInfo.registerDistro(_id,'OpenSUSE','OpenSUSE','_isOpenSuse',
+                            codename    = 'n/a',
+                            release     = _openSuseRelease,
+                            revision    = '{VERSION_ID}',
+                            prettyname  = '{PRETTY_NAME} {VERSION_ID}')
+
+# CENTOS
+#   > cat /etc/os-release
+#       NAME="CentOS Stream"
+#       VERSION="8"
+#       ID="centos"
+#       ID_LIKE="rhel fedora"
+#       VERSION_ID="8"
+#       PLATFORM_ID="platform:el8"
+#       PRETTY_NAME="CentOS Stream 8"
+#       ANSI_COLOR="0;31"
+#       CPE_NAME="cpe:/o:centos:centos:8"
+#       HOME_URL="https://centos.org/"
+#       BUG_REPORT_URL="https://bugzilla.redhat.com/"
+#       REDHAT_SUPPORT_PRODUCT="Red Hat Enterprise Linux 8"
+#       REDHAT_SUPPORT_PRODUCT_VERSION="CentOS Stream"
+OsInfo.registerDistro('centos','CentOS','Redhat','_isCentOS',
+                            codename    = 'n/a',
+                            version     = '{VERSION}')
+
+# Redhat and rebuilds
+#   > cat /etc/os-release
+#       NAME="Rocky Linux"
+#       VERSION="9.2 (Blue Onyx)"
+#       ID="rocky"
+#       ID_LIKE="rhel centos fedora"
+#       VERSION_ID="9.2"
+#       PRETTY_NAME="Rocky Linux 9.2 (Blue Onyx)"
+OsInfo.registerDistro('rhel','RHEL','Redhat','_isRedhat',
+                            codename    = 'n/a',
+                            release     = _versionPart('VERSION_ID',1),
+                            flavverflav = '{flavor}{VERSION_ID}')
+OsInfo.registerDistro('rocky','Rocky','Redhat',
+                            codename    = 'n/a',
+                            release     = _versionPart('VERSION_ID',1),
+                            flavverflav = '{flavor}{VERSION_ID}')
+OsInfo.registerDistro('almalinux','Alma','Redhat',
+                            codename    = 'n/a',
+                            release     = _versionPart('VERSION_ID',1),
+                            flavverflav = '{flavor}{VERSION_ID}')
+
+# Fedora
+#   > cat /etc/os-release
+#       NAME="Fedora Linux"
+#       VERSION="38 (Container Image)"
+#       ID=fedora
+#       VERSION_ID=38
+#       VERSION_CODENAME=""
+#       PRETTY_NAME="Fedora Linux 38 (Container Image)"
+OsInfo.registerDistro('fedora','Fedora','Redhat',
+                            codename    = 'n/a')
+
+# Alpine
+#   > cat /etc/os-release
+#       NAME="Alpine Linux"
+#       ID=alpine
+#       VERSION_ID=3.18.4
+#       PRETTY_NAME="Alpine Linux v3.18"
+OsInfo.registerDistro('alpine','Alpine','Alpine',
+                            codename    = 'n/a',
+                            release     = _versionPart('VERSION_ID',2),
+                            revision    = '{VERSION_ID}')
+
+# Arch (rolling release, no VERSION_ID)
+#   > cat /etc/os-release
+#       NAME="Arch Linux"
+#       PRETTY_NAME="Arch Linux"
+#       ID=arch
+#       BUILD_ID=rolling
+OsInfo.registerDistro('arch','Arch','Arch',
+                            codename    = 'n/a',
+                            release     = 'rolling',
+                            version     = '{BUILD_ID}',
+                            revision    = '{BUILD_ID}',
+                            flavverflav = '{flavor}')
+
+async def _serveMain(path):
+    """
+    Serve Main
+
+        Runs the agent until SIGTERM or SIGINT, removing its socket on the way out.
+
+    Returns:
+    none
+    """
+    import asyncio
+    lTask       = asyncio.current_task()
+    lLoop       = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM,signal.SIGINT):
+        try:
+            lLoop.add_signal_handler(sig,lTask.cancel)
+        except (NotImplementedError, RuntimeError, AttributeError):
+            pass
+    try:
+        await OsInfo.serveAgent(path)
+    except asyncio.CancelledError:
+        pass
+
+def _main(argv) -> int:
+    """
+    Main
+
+        python -m osinfo [dump] [--format text|json|kv]
+        python -m osinfo serve [--socket PATH]
+
+    Returns:
+    int: exit status
+    """
+    import argparse
+    import asyncio
+    lParser     = argparse.ArgumentParser(prog='python -m osinfo',description='Operating system information')
+    lParser.add_argument('command',nargs='?',choices=('dump','serve'),default='dump',
+                         help='dump this host (default), or serve it to fromAgent() clients')
+    lParser.add_argument('--format',choices=('text','json','kv'),default='text',help='dump format')
+    lParser.add_argument('--socket',default=None,help='agent socket (default {})'.format(OsInfo.agentSocket()))
+    lArgs       = lParser.parse_args(argv)
+
+    if lArgs.command == 'serve':
+        print('osinfo agent serving {}'.format(lArgs.socket or OsInfo.agentSocket()),flush=True)
+        try:
+            asyncio.run(_serveMain(lArgs.socket))
+        except KeyboardInterrupt:
+            pass
+        except OSError as e:
+            print('Error: {}'.format(e))
+            return 1
+        return 0
+
+    lInfo       = OsInfo()
+    lInfo.setLogEnable(False)
+    lInfo.Dump(lArgs.format)
+    return 0
 
-        self._logClose()
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit(_main(sys.argv[1:]))
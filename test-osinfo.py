@@ -3,7 +3,10 @@
 #	----------------------------------------------------------------------------------------------------------------------------
 #	Description:
 #
-#		Test harness to check OsInfo class operation.  Dumps all object properties, and debug data.
+#		Test harness to check OsInfo class operation.  Dumps all object properties, and debug data, then runs
+#		the checks below.  The checks can also be run with pytest:
+#
+#		    python3 -m pytest test-osinfo.py
 #
 #	Copyrignt: (c) 2023, MHG Squint
 #
@@ -13,10 +16,959 @@
 #	---------- ----- -------------- --------------------------------------------------------------------------------------------
 #
 
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import logging
+import os
+import pickle
+import re
+import shutil
+import socket
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+
 from osinfo import *
+from osinfo import _Agent, _ProbeWorker
+
+#
+# Checks
+#
+
+_spawnEvents    = ('subprocess.Popen','os.fork','os.forkpty','os.posix_spawn','os.spawn','os.system','os.exec')
+_spawned        = None                          # Spawn audit events seen, None when not watching
+_spawnHooked    = False
+
+def _spawnHook(event, args):
+    if _spawned is not None and event in _spawnEvents:
+        _spawned.append(event)
+
+def testNoChildProcess():
+    """
+    Constructing OsInfo, and reading every property, never creates a child process.
+    """
+    global _spawned, _spawnHooked
+    if not _spawnHooked:
+        sys.addaudithook(_spawnHook)
+        _spawnHooked    = True
+    _spawned    = []
+    try:
+        OsInfo().detect()
+        seen    = _spawned
+    finally:
+        _spawned    = None
+    assert seen == [], 'OsInfo created a child process: {}'.format(seen)
+
+def testParseOsRelease():
+    """
+    os-release parsing handles comments, quoting, and escapes.
+    """
+    data    = (b'NAME="openSUSE Tumbleweed"\n'
+               b'# VERSION="20230411"\n'
+               b"ID_LIKE='opensuse suse'\n"
+               b'VERSION_ID=20230411\n'
+               b'PRETTY_NAME="say \\"hi\\" \\$x"\n'
+               b'not a key/value line\n')
+    assert OsInfo._parseOsRelease(data) == {
+                'NAME'          : 'openSUSE Tumbleweed',
+                'ID_LIKE'       : 'opensuse suse',
+                'VERSION_ID'    : '20230411',
+                'PRETTY_NAME'   : 'say "hi" $x',
+            }
+
+def testCurrent():
+    """
+    current() is shared until a stamped release file changes; refresh() always detects again.
+    """
+    folder  = tempfile.mkdtemp(prefix='osinfo-test-')
+    try:
+        path    = os.path.join(folder, 'os-release')
+        with open(path, 'w') as fh:
+            fh.write('ID=debian\n')
+        class _Stamped(OsInfo):
+            _releaseFiles   = (path,)
+            _currentInfo    = None
+            _currentStamp   = None
+            _currentUntil   = 0.0
+            _currentCheck   = 60.0
+        first   = _Stamped.current()
+        assert _Stamped.current() is first
+        with open(path, 'w') as fh:
+            fh.write('ID=ubuntu\n')
+        st      = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        assert _Stamped.current() is first, 'release files checked before _currentCheck passed'
+        _Stamped._currentUntil  = 0.0
+        second  = _Stamped.current()
+        assert second is not first and _Stamped.current() is second
+        third   = _Stamped.refresh()
+        assert third is not second and _Stamped.current() is third
+        assert OsInfo._currentInfo not in (first, second, third)
+    finally:
+        shutil.rmtree(folder)
+
+def testCacheRoundTrip():
+    """
+    The persistent cache returns what was detected, and ignores a corrupt entry.
+    """
+    folder  = tempfile.mkdtemp(prefix='osinfo-test-')
+    try:
+        cold    = OsInfo.fromCache(folder)
+        warm    = OsInfo.fromCache(folder)
+        assert warm._probed >= set(OsInfo._cacheProbes)
+        assert (warm.type(), warm.flavor(), warm.version(), warm.osRelease()) == (cold.type(), cold.flavor(), cold.version(), cold.osRelease())
+        with open(os.path.join(folder, OsInfo._cacheName)) as fh:
+            entry   = json.load(fh)
+        assert entry[0] == OsInfo._cacheKey() and len(entry) == len(OsInfo._cacheRecord) + 1
+        with open(os.path.join(folder, OsInfo._cacheName), 'w') as fh:
+            json.dump(entry[:-1], fh)
+        assert OsInfo.fromCache(folder).type() == cold.type()
+        with open(os.path.join(folder, OsInfo._cacheName), 'w') as fh:
+            fh.write('["')
+        assert OsInfo.fromCache(folder).type() == cold.type()
+    finally:
+        shutil.rmtree(folder)
+
+def testKernelCaps():
+    """
+    kernel() is parsed from uname; kernelCaps() needs the kernel version, and is kept per boot.
+    """
+    osi     = OsInfo()
+    if not hasattr(os, 'uname') or not osi.isLinux():
+        return
+    assert osi.kernel() and osi.kernel() == tuple(int(n) for n in re.match(r'[0-9.]*[0-9]', os.uname().release).group(0).split('.'))
+    assert re.search(r'^kernel +{} *$'.format(re.escape('.'.join(map(str, osi.kernel())))), osi._renderDump(osi.toDict(), 'title'), re.M)
+
+    old     = OsInfo()
+    old._kernel = (4, 4)
+    old._probed.add('kernel')
+    caps    = old.kernelCaps(persist=False)
+    assert set(caps) == set(OsInfo._kernelCapChecks) and not caps['io_uring'] and not caps['pidfd_open']
+    assert OsInfo(root='/').kernelCaps(persist=False) == {cap: False for cap in OsInfo._kernelCapChecks}
+    if osi.machine() in OsInfo._capSyscallMachines and hasattr(os, 'pidfd_open'):
+        import ctypes
+        raw     = osi._capSyscall(434, ctypes.c_long(os.getpid()), ctypes.c_long(0))
+        assert raw in (None, osi._capPidfdOpen()) and osi._capSyscall(1023) is False
+
+    folder  = tempfile.mkdtemp(prefix='osinfo-test-')
+    try:
+        caps    = osi.kernelCaps(folder=folder)
+        assert all(type(value) is bool for value in caps.values())
+        with open(os.path.join(folder, OsInfo._capName)) as fh:
+            entry   = json.load(fh)
+        entry['caps']   = {cap: True for cap in caps}
+        with open(os.path.join(folder, OsInfo._capName), 'w') as fh:
+            json.dump(entry, fh)
+        assert OsInfo().kernelCaps(folder=folder) == entry['caps']
+    finally:
+        shutil.rmtree(folder)
+
+def _resourceTree(folder, files):
+    for name, text in files.items():
+        path    = os.path.join(folder, name.lstrip('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fh:
+            fh.write(text)
+
+class _RootResources(OsInfo):
+    """
+    OsInfo reading /proc and /sys resource files below a test folder
+    """
+    resourceRoot    = ''
+
+    def _readResourceFile(self, fileName):
+        return OsInfo._readResourceFile(self, self.resourceRoot + fileName)
+
+    def _listResourceFolder(self, folder):
+        return OsInfo._listResourceFolder(self, self.resourceRoot + folder)
+
+def testResources():
+    """
+    resources() takes the least cgroup v1/v2 quota and limit up the hierarchy; workers follow.
+    """
+    if not sys.platform.startswith('linux'):
+        return
+    folder  = tempfile.mkdtemp(prefix='osinfo-test-')
+    osi     = _RootResources()
+    affinity = len(os.sched_getaffinity(0))
+    shared  = OsInfo._resourcesInfo
+    try:
+        osi.resourceRoot = os.path.join(folder, 'v2')
+        _resourceTree(osi.resourceRoot, {
+            '/proc/self/cgroup'     : '0::/user.slice/app\n',
+            '/proc/self/mountinfo'  : '30 24 0:26 / /sys/fs/cgroup rw,nosuid - cgroup2 cgroup2 rw\n',
+            '/proc/meminfo'         : 'MemTotal:        4194304 kB\nMemFree: 1 kB\n',
+            '/sys/fs/cgroup/user.slice/cpu.max'         : 'max 100000\n',
+            '/sys/fs/cgroup/user.slice/memory.max'      : '1073741824\n',
+            '/sys/fs/cgroup/user.slice/app/cpu.max'     : '150000 100000\n',
+            '/sys/fs/cgroup/user.slice/app/memory.max'  : 'max\n',
+            '/sys/devices/system/node/node0/cpulist'    : '0-1023\n',
+            '/sys/devices/system/node/node1/cpulist'    : '4096-4100\n',
+        })
+        res     = osi.resources(refresh=True)
+        assert (res['cgroup'], res['cpuQuota'], res['cpus'], res['memoryLimit'], res['memoryTotal'], res['memory'], res['numaNodes']) == \
+               (2, 1.5, min(affinity, 1.5), 1 << 30, 4 << 30, 1 << 30, 1)
+        workers = 2 if affinity > 1 else 1
+        assert osi.recommendedWorkers('cpu') == workers and osi.recommendedWorkers('io') == workers + 4
+        assert osi.recommendedWorkers('io', memoryPerWorker=512 << 20) == 2
+        assert OsInfo._resourcesInfo is shared
+
+        osi.resourceRoot = os.path.join(folder, 'v1')
+        _resourceTree(osi.resourceRoot, {
+            '/proc/self/cgroup'     : '5:memory:/docker/abc\n4:cpu,cpuacct:/docker/abc\n1:name=systemd:/docker/abc\n',
+            '/proc/self/mountinfo'  : '33 32 0:29 /docker/abc /sys/fs/cgroup/cpu,cpuacct ro - cgroup cgroup rw,cpu,cpuacct\n'
+                                      '36 32 0:32 /docker/abc /sys/fs/cgroup/memory ro - cgroup cgroup rw,memory\n',
+            '/sys/fs/cgroup/cpu,cpuacct/cpu.cfs_quota_us'   : '200000\n',
+            '/sys/fs/cgroup/cpu,cpuacct/cpu.cfs_period_us'  : '100000\n',
+            '/sys/fs/cgroup/memory/memory.limit_in_bytes'   : '9223372036854771712\n',
+        })
+        res     = osi.resources(refresh=True)
+        assert (res['cgroup'], res['cpuQuota'], res['memoryLimit'], res['memoryTotal']) == (1, 2.0, None, None)
+        assert osi.resources() == res
+    finally:
+        shutil.rmtree(folder)
+    assert OsInfo().resources()['cpus'] >= 1
+    try:
+        OsInfo(root=folder).resources()
+        assert False, 'root filesystem has resources'
+    except ValueError:
+        pass
+
+def _linuxInfo(osRelease, debianVersion=None):
+    """
+    OsInfo for a Linux host with the given os-release data
+    """
+    osi                 = OsInfo()
+    osi._uname_sysname  = 'linux'
+    osi._uname_release  = '5.10.0'
+    osi._uname_version  = '#1 SMP'
+    osi._uname_machine  = 'x86_64'
+    osi._osRelease      = OsInfo._parseOsRelease(osRelease)
+    osi._debianVersion  = debianVersion
+    osi._probed.update(('uname','platform','osrelease','debian'))
+    return osi
+
+def testDistroRules():
+    """
+    Distros map by os-release ID, then ID_LIKE; rules can be registered.
+    """
+    osi     = _linuxInfo(b'ID=debian\nNAME="Debian GNU/Linux"\nVERSION_ID="11"\nVERSION_CODENAME=bullseye\n', '11.6')
+    assert (osi.flavor(), osi.release(), osi.version(), osi.flavverflav(), osi.isDebian()) == ('Debian', '11', '11.6', 'Debian11.6', True)
+
+    osi     = _linuxInfo(b'ID=rocky\nID_LIKE="rhel centos fedora"\nNAME="Rocky Linux"\nVERSION_ID="9.2"\n')
+    assert (osi.flavor(), osi.distrobase(), osi.release(), osi.version()) == ('Rocky', 'Redhat', '9', '9.2')
+
+    osi     = _linuxInfo(b'ID=linuxmint\nID_LIKE="ubuntu debian"\nNAME="Linux Mint"\nVERSION_ID="21.2"\n')
+    assert (osi.flavor(), osi.distrobase(), osi.isUbuntu()) == ('Linux Mint', 'Debian', False)
+
+    OsInfo.registerDistro('testos', 'TestOS', 'Redhat', codename='n/a', flavverflav='{flavor}-{VERSION_ID}')
+    try:
+        osi = _linuxInfo(b'ID=testos\nNAME="Test OS"\nVERSION_ID="1.2"\n')
+        assert (osi.flavor(), osi.codename(), osi.flavverflav()) == ('TestOS', 'n/a', 'TestOS-1.2')
+    finally:
+        del OsInfo._distroRules['testos']
+
+def testRoot():
+    """
+    OsInfo(root=...) reads release files under root, following symlinks inside it.
+    """
+    folder  = tempfile.mkdtemp(prefix='osinfo-test-')
+    try:
+        os.makedirs(os.path.join(folder, 'etc'))
+        os.makedirs(os.path.join(folder, 'usr', 'lib'))
+        with open(os.path.join(folder, 'usr', 'lib', 'os-release'), 'w') as fh:
+            fh.write('ID=ubuntu\nNAME="Ubuntu"\nVERSION_ID="22.04"\nVERSION="22.04.3 LTS (Jammy Jellyfish)"\n')
+        with open(os.path.join(folder, 'etc', 'debian_version'), 'w') as fh:
+            fh.write('bookworm/sid\n')
+        os.symlink('/usr/lib/os-release', os.path.join(folder, 'etc', 'os-release'))
+
+        osi     = OsInfo(root=folder)
+        assert (osi.flavor(), osi.release(), osi.version(), osi.machine()) == ('Ubuntu', '22.04', 'bookworm/sid', 'n/a')
+        assert [(root, osi.flavverflav()) for root, osi in OsInfo.scanRoots([folder], workers=2)] == [(folder, 'Ubuntu22.04')]
+    finally:
+        shutil.rmtree(folder)
+
+class _CountingInfo(OsInfo):
+    reads   = []
+
+    def _readBytes(self, fileName):
+        self.reads.append(fileName)
+        return OsInfo._readBytes(self, fileName)
+
+def testReleaseChain():
+    """
+    Without a complete os-release, older release files fill in, by priority, for the same ID only.
+    """
+    cases   = [
+        ({'/etc/redhat-release': 'CentOS Linux release 7.9.2009 (Core)\n'},
+         ('CentOS', '7.9.2009', '7.9.2009 (Core)', '/etc/redhat-release')),
+        ({'/etc/lsb-release': 'DISTRIB_ID=Ubuntu\nDISTRIB_RELEASE=20.04\nDISTRIB_CODENAME=focal\nDISTRIB_DESCRIPTION="Ubuntu 20.04.6 LTS"\n',
+          '/etc/debian_version': 'bullseye/sid\n'},
+         ('Ubuntu', '20.04', 'bullseye/sid', '/etc/lsb-release')),
+        ({'/etc/alpine-release': '3.18.4\n'},
+         ('Alpine', '3.18', '3.18.4', '/etc/alpine-release')),
+        ({'/etc/SuSE-release': 'openSUSE 13.2 (x86_64)\nVERSION = 13.2\nCODENAME = Harlequin\n'},
+         ('OpenSUSE', 'Unknown', '13.2', '/etc/SuSE-release')),
+        ({'/etc/debian_version': '11.6\n'},
+         ('Debian', '11', '11.6', '/etc/debian_version')),
+        ({'/etc/os-release': 'ID=rocky\nNAME="Rocky Linux"\n', '/etc/redhat-release': 'Rocky Linux release 9.2 (Blue Onyx)\n'},
+         ('Rocky', '9', '9.2', '/etc/os-release')),
+        ({'/etc/os-release': 'ID=ubuntu\nNAME="Ubuntu"\n', '/etc/debian_version': '11.6\n'},
+         ('Ubuntu', '', '11.6', '/etc/os-release')),
+    ]
+    folder  = tempfile.mkdtemp(prefix='osinfo-test-')
+    try:
+        for index, (files, expected) in enumerate(cases):
+            root    = os.path.join(folder, str(index))
+            _resourceTree(root, files)
+            osi     = OsInfo(root=root)
+            assert (osi.flavor(), osi.release(), osi.version(), osi.releaseSources()['ID']) == expected, (files, osi.snapshot())
+        rocky   = OsInfo(root=os.path.join(folder, '5'))
+        assert rocky.releaseSources()['VERSION_ID'] == '/etc/redhat-release' and rocky.osRelease()['NAME'] == 'Rocky Linux'
+        assert 'VERSION_ID' not in OsInfo(root=os.path.join(folder, '6')).osRelease()
+
+        _resourceTree(os.path.join(folder, 'full'), {'/etc/os-release': 'ID=centos\nNAME="CentOS Stream"\nVERSION_ID="8"\n',
+                                                     '/etc/redhat-release': 'CentOS Stream release 8\n'})
+        _CountingInfo.reads = []
+        osi     = _CountingInfo(root=os.path.join(folder, 'full'))
+        assert osi.flavor() == 'CentOS' and _CountingInfo.reads == ['/etc/os-release']
+        assert set(osi.releaseSources().values()) == {'/etc/os-release'}
+        assert set(OsInfo._releaseFiles) == {fileName for fileName, _ in OsInfo._releaseSources}
+        assert len(OsInfo._stamp()[1]) == len(OsInfo._releaseFiles)
+    finally:
+        shutil.rmtree(folder)
+
+def _layer(entries, compress=False):
+    """
+    Layer tarball bytes.  entries: name -> bytes for a file, or '->target' for a symlink
+    """
+    buf     = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode='w:gz' if compress else 'w') as tar:
+        for name, data in entries.items():
+            info    = tarfile.TarInfo(name)
+            if isinstance(data, str):
+                info.type, info.linkname = tarfile.SYMTYPE, data[2:]
+                tar.addfile(info)
+            else:
+                info.size   = len(data)
+                tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+def testImage():
+    """
+    Image layers are read top first, with symlinks, whiteouts, and gzip; docker save and OCI layouts both work.
+    """
+    base    = _layer({'etc/os-release'      : b'ID=debian\nNAME="Debian GNU/Linux"\nVERSION_ID="11"\n',
+                      'etc/debian_version'  : b'11.6\n'})
+    top     = _layer({'usr/lib/os-release'  : b'ID=alpine\nNAME="Alpine Linux"\nVERSION_ID=3.18.4\n',
+                      './etc/os-release'    : '->../usr/lib/os-release',
+                      'etc/.wh.debian_version' : b''}, compress=True)
+    folder  = tempfile.mkdtemp(prefix='osinfo-test-')
+    try:
+        # docker save tarball
+        saved   = os.path.join(folder, 'saved.tar')
+        with tarfile.open(saved, 'w') as tar:
+            for name, data in (('manifest.json', json.dumps([{'Layers': ['l0/layer.tar', 'l1/layer.tar']}]).encode()),
+                               ('l0/layer.tar', base), ('l1/layer.tar', top)):
+                info        = tarfile.TarInfo(name)
+                info.size   = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        osi     = OsInfo.fromImage(saved)
+        assert (osi.flavor(), osi.version()) == ('Alpine', '3.18.4')
+        osi     = OsInfo.fromLayers([lambda: io.BytesIO(base), lambda: io.BytesIO(top)])
+        try:
+            osi._files.read('/etc/debian_version')
+            assert False, 'whited out file was read'
+        except FileNotFoundError:
+            pass
+
+        # Each layer is streamed once, for every release file
+        opened  = []
+        def opener(name, data):
+            return lambda: (opened.append(name), io.BytesIO(data))[1]
+        osi     = OsInfo.fromLayers([opener('base', base), opener('top', top)]).detect()
+        for fileName in OsInfo._releaseFiles:
+            try:
+                osi._files.read(fileName)
+            except FileNotFoundError:
+                pass
+        assert osi.flavor() == 'Alpine' and sorted(opened) == ['base', 'top']
+
+        # OCI layout folder
+        layout  = os.path.join(folder, 'layout')
+        def blob(data):
+            digest  = hashlib.sha256(data).hexdigest()
+            os.makedirs(os.path.join(layout, 'blobs', 'sha256'), exist_ok=True)
+            with open(os.path.join(layout, 'blobs', 'sha256', digest), 'wb') as fh:
+                fh.write(data)
+            return {'digest': 'sha256:' + digest}
+        manifest    = blob(json.dumps({'layers': [blob(base)]}).encode())
+        with open(os.path.join(layout, 'index.json'), 'w') as fh:
+            json.dump({'manifests': [manifest]}, fh)
+        osi     = OsInfo.fromImage(layout)
+        assert (osi.flavor(), osi.version()) == ('Debian', '11.6')
+    finally:
+        shutil.rmtree(folder)
+
+def testDetectAsync():
+    """
+    Concurrent detectAsync callers share one detection.
+    """
+    async def main():
+        first, second = await asyncio.gather(OsInfo.detectAsync(), OsInfo.detectAsync())
+        assert first is second
+        assert first._probed >= set(OsInfo._detectProbes)
+        assert OsInfo._asyncInflight == {}
+    asyncio.run(main())
+
+def testSnapshot():
+    """
+    Snapshots are immutable, hashable, and round-trip through pickle and JSON.
+    """
+    osi     = _linuxInfo(b'ID=ubuntu\nNAME="Ubuntu"\nVERSION_ID="20.04"\nVERSION="20.04.6 LTS (Focal Fossa)"\n', 'bullseye/sid')
+    snap    = osi.snapshot()
+    assert (snap.flavor(), snap.release(), snap.version(), snap.isUbuntu()) == ('Ubuntu', '20.04', 'bullseye/sid', True)
+    assert snap.flavor() is sys.intern('Ubuntu')
+    assert pickle.loads(pickle.dumps(snap)) == snap
+    assert OsInfoSnapshot.fromJson(snap.toJson()) == snap
+    assert len({snap, osi.snapshot()}) == 1
+    debian  = _linuxInfo(b'ID=debian\nNAME="Debian GNU/Linux"\nVERSION_ID="11"\n', '11.6')
+    assert debian.name() == debian.snapshot().name() == 'Debian' and debian.toDict()['name'] == 'Debian GNU/Linux'
+    try:
+        snap._values    = ()
+        assert False, 'snapshot was modified'
+    except AttributeError:
+        pass
+
+def testVersionKey():
+    """
+    Version keys are parsed at detection, and specs compare them.
+    """
+    osi     = _linuxInfo(b'ID=ubuntu\nNAME="Ubuntu"\nVERSION_ID="20.04"\nVERSION="20.04.6 LTS (Focal Fossa)"\n', 'bullseye/sid')
+    assert osi.versionKey() == osi.snapshot().versionKey() == (20, 4, 6)
+    assert osi.atLeast('Ubuntu', '20.04') and osi.atLeast('ubuntu', '18.10') and not osi.atLeast('Ubuntu', '22.04')
+    assert osi.matches('Ubuntu>=20,<22') and osi.matches('>=20.04.0') and osi.matches('Ubuntu') and not osi.matches('Debian>=10')
+    debian  = _linuxInfo(b'ID=debian\nNAME="Debian GNU/Linux"\nVERSION_ID="11"\n', '11.6').snapshot()
+    assert debian.versionKey() == (11, 6) and debian.matches('Debian>=10,<12') and not debian.matches('Debian==11')
+    arch    = _linuxInfo(b'ID=arch\nNAME="Arch Linux"\nBUILD_ID=rolling\n').snapshot()
+    assert arch.versionKey() == () and arch.matches('Arch') and not arch.matches('Arch>=1')
+    try:
+        debian.matches('Debian>=ten')
+        assert False, 'bad spec accepted'
+    except ValueError:
+        pass
+
+def testFingerprint():
+    """
+    Fingerprints ignore name strings and machine aliases; groupProfiles() buckets hosts by them.
+    """
+    focal   = b'ID=ubuntu\nNAME="Ubuntu"\nVERSION_ID="20.04"\nVERSION="20.04.6 LTS (Focal Fossa)"\n'
+    snap    = _linuxInfo(focal, 'bullseye/sid').snapshot()
+    fields  = snap.toDict()
+    renamed = OsInfoSnapshot.fromDict(dict(fields, prettyname='Ubuntu Focal', machine=fields['machine'].upper()))
+    jammy   = _linuxInfo(focal.replace(b'20.04.6', b'22.04.3').replace(b'"20.04"', b'"22.04"')).snapshot()
+    assert len(snap.fingerprint()) == 32 and snap.fingerprint() is snap.fingerprint()
+    assert renamed.fingerprint() == snap.fingerprint() != jammy.fingerprint()
+    assert OsInfoSnapshot.fromDict(dict(fields, desktop='Gnome')).fingerprint() == snap.fingerprint()
+    assert pickle.loads(pickle.dumps(snap)).fingerprint() == snap.fingerprint()
+
+    records = [('h1', snap), ('h2', fields), ('h3', jammy), ('h4', renamed), ('h5', dict(fields))]
+    groups  = OsInfo.groupProfiles(records)
+    assert {fp: hosts for fp, (_, hosts) in groups.items()} == {snap.fingerprint(): ['h1', 'h2', 'h4', 'h5'], jammy.fingerprint(): ['h3']}
+    assert OsInfo.dedupe([snap, jammy, renamed]) == {snap.fingerprint(): snap, jammy.fingerprint(): jammy}
+
+    host    = OsInfo().snapshot()
+    out     = io.StringIO()
+    OsInfo.writeNdjson(out, [snap, host, jammy, host])
+    loaded  = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert type(loaded[1]['kernel']) is list
+    groups  = OsInfo.groupProfiles(loaded)
+    assert {fp: hosts for fp, (_, hosts) in groups.items()} == \
+           {snap.fingerprint(): [0], host.fingerprint(): [1, 3], jammy.fingerprint(): [2]}
+    assert OsInfo.dedupe(loaded) == OsInfo.dedupe([snap, host, jammy])
+
+def testNdjson():
+    """
+    writeNdjson streams one JSON record per line, with roots and debug data on request.
+    """
+    osi     = _linuxInfo(b'ID=debian\nNAME="Debian GNU/Linux"\nVERSION_ID="11"\n', '11.6')
+    out     = io.StringIO()
+    assert OsInfo.writeNdjson(out, [osi, ('/mnt/a', osi.snapshot())], debug=True) == 2
+    first, second = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert first['debug']['osRelease']['ID'] == 'debian' and first['debug']['debianVersion'] == '11.6'
+    assert second['root'] == '/mnt/a' and 'debug' not in second
+    assert OsInfoSnapshot.fromDict(second) == osi.snapshot()
+    assert OsInfoSnapshot.fromJson(osi.toJson()) == osi.snapshot()
+
+def testWatch():
+    """
+    Watchers re-run just the release file probes on change, by inotify or polling.
+    """
+    folder  = tempfile.mkdtemp(prefix='osinfo-test-')
+    def write(name, text):
+        temp    = os.path.join(folder, name + '.new')
+        with open(temp, 'w') as fh:
+            fh.write(text)
+        os.replace(temp, os.path.join(folder, name))
+    try:
+        os.makedirs(os.path.join(folder, 'etc'))
+        for inotify, version in ((True, '12'), (False, '13')):
+            write('etc/os-release', 'ID=debian\nNAME="Debian GNU/Linux"\nVERSION_ID="11"\nVERSION_CODENAME=bullseye\n')
+            write('etc/debian_version', '11.6\n')
+            osi     = OsInfo(root=folder)
+            assert (osi.flavverflav(), osi.codename()) == ('Debian11.6', 'bullseye')
+            seen    = []
+            done    = threading.Event()
+            watcher = osi.watch(lambda osi, changed: (seen.append(changed), done.set()), interval=0.02, inotify=inotify)
+            try:
+                assert watcher.mode() == ('inotify' if inotify and sys.platform.startswith('linux') else 'poll')
+                write('etc/os-release', 'ID=debian\nNAME="Debian GNU/Linux"\nVERSION_ID="{}"\nVERSION_CODENAME=next\n'.format(version))
+                write('etc/debian_version', '{}.0\n'.format(version))
+                assert done.wait(5), 'no change seen'
+                deadline = time.time() + 5
+                while osi.version() != version + '.0' and time.time() < deadline:
+                    time.sleep(0.01)
+            finally:
+                watcher.stop()
+            watcher.stop()
+            assert watcher._wake is None and not watcher._thread.is_alive()
+            assert (osi.release(), osi.version(), osi.codename()) == (version, version + '.0', 'next')
+            assert seen[0]['release'] == ('11', version)
+            assert 'desktop' not in osi._probed
+
+        # Reprobes publish a new snapshot with the fields; readers see one version or the other
+        pairs   = []
+        stop    = threading.Event()
+        def read():
+            while not stop.is_set():
+                snap    = osi.snapshot()
+                pairs.append((snap.release(), snap.version()))
+        before  = osi.snapshot()
+        reader  = threading.Thread(target=read)
+        reader.start()
+        try:
+            for version in ('14', '15', '16'):
+                write('etc/os-release', 'ID=debian\nNAME="Debian GNU/Linux"\nVERSION_ID="{}"\n'.format(version))
+                write('etc/debian_version', '{}.0\n'.format(version))
+                osi._reprobe(('osrelease', 'debian'))
+        finally:
+            stop.set()
+            reader.join()
+        assert osi.snapshot() is not before and osi.snapshot().version() == '16.0'
+        assert all(version == release + '.0' for release, version in pairs)
+
+        # Roots with only fallback release files are watched too
+        for name, before, after, release in (('redhat-release', 'CentOS Linux release 7.8.2003 (Core)\n', 'CentOS Stream release 8\n', '8'),
+                                             ('debian_version', '11.6\n', '12.1\n', '12')):
+            legacy  = os.path.join(folder, 'legacy-' + name)
+            os.makedirs(os.path.join(legacy, 'etc'))
+            write('legacy-{}/etc/{}'.format(name, name), before)
+            osi     = OsInfo(root=legacy)
+            osi.detect()
+            done    = threading.Event()
+            watcher = osi.watch(lambda osi, changed: done.set(), interval=0.02, inotify=False)
+            try:
+                write('legacy-{}/etc/{}'.format(name, name), after)
+                assert done.wait(5), 'no change seen'
+            finally:
+                watcher.stop()
+            assert (osi.release(), osi.osRelease()['VERSION_ID']) == (release, release)
+    finally:
+        shutil.rmtree(folder)
+
+def testThreads():
+    """
+    Threads sharing one OsInfo run each probe once, and their dumps never mix or leak handles.
+    """
+    started = []
+    def hook(event, osi, stage, value):
+        if event == 'start':
+            started.append((id(osi), stage))
+    folder  = tempfile.mkdtemp(prefix='osinfo-test-')
+    fds     = len(os.listdir('/proc/self/fd')) if os.path.isdir('/proc/self/fd') else None
+    out     = io.StringIO()
+    OsInfo.addHook(hook)
+    try:
+        for _ in range(5):
+            osi     = OsInfo()
+            osi._logFile    = os.path.join(folder, 'log.txt')
+            barrier = threading.Barrier(32)
+            seen    = []
+            def work():
+                barrier.wait()
+                seen.append(osi.snapshot())
+                osi.Dump()
+            threads = [threading.Thread(target=work) for _ in range(32)]
+            with contextlib.redirect_stdout(out):
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            assert len(seen) == 32 and all(snap is seen[0] for snap in seen)
+            mine    = [stage for key, stage in started if key == id(osi)]
+            assert sorted(mine) == sorted(set(OsInfo._probes) - {'processor'}), mine
+            with open(osi._logFile) as fh:
+                assert fh.read().count('OS INFO') == 1
+    finally:
+        OsInfo.removeHook(hook)
+        shutil.rmtree(folder)
+    reports = out.getvalue().split('=' * 80 + '\n' + seen[0].prettyname() + '\n' + '=' * 80 + '\n')
+    assert len(reports) == 5 * 32 + 1 and all(report.count('isCentOS') == 1 for report in reports[1:])
+    if fds is not None:
+        assert len(os.listdir('/proc/self/fd')) == fds
+
+class _HangingInfo(OsInfo):
+    """
+    Stand-in for a host with a hung /etc mount and a broken desktop probe.
+    """
+    unhang  = threading.Event()
+    threads = []
+
+    def _readOsRelease(self):
+        self.threads.append(threading.current_thread())
+        self.unhang.wait(10)
+        return OsInfo._readOsRelease(self)
+
+    def _probeDesktop(self):
+        self.threads.append(threading.current_thread())
+        raise RuntimeError('no desktop')
+
+def testTimeout():
+    """
+    With a timeout, hung probes cost the caller the timeout, once, and are reported per field.
+    """
+    folder  = tempfile.mkdtemp(prefix='osinfo-test-')
+    try:
+        os.makedirs(os.path.join(folder, 'etc'))
+        with open(os.path.join(folder, 'etc', 'os-release'), 'w') as fh:
+            fh.write('ID=debian\nNAME="Debian GNU/Linux"\nVERSION_ID="12"\n')
+        osi     = _HangingInfo(root=folder, timeout=0.2)
+        start   = time.monotonic()
+        snap    = osi.snapshot()
+        assert time.monotonic() - start < 1.0
+        status  = osi.fieldStatus()
+        assert (status['type'], status['isLinux'], status['desktop'], status['flavor'], status['version']) == \
+               ('resolved', 'resolved', 'failed', 'timeout', 'timeout')
+        assert (snap.type(), snap.flavor(), snap.desktop()) == ('Linux', 'Unknown', 'Unknown')
+        start   = time.monotonic()
+        assert osi.flavor() == 'Unknown' and time.monotonic() - start < 0.1
+        assert _ProbeWorker._stranded == 1
+
+        hung    = [_HangingInfo(root=folder, timeout=0.02) for _ in range(_ProbeWorker._strandedMax + 2)]
+        assert all(info.flavor() == 'Unknown' and info.fieldStatus()['flavor'] == 'timeout' for info in hung)
+        assert _ProbeWorker._stranded == _ProbeWorker._strandedMax
+        assert len(set(_HangingInfo.threads)) == _ProbeWorker._strandedMax
+
+        fresh   = _HangingInfo(root=folder, timeout=0.2)
+        assert fresh.fieldStatus()['flavor'] == 'pending'
+        _HangingInfo.unhang.set()
+        for _ in range(200):
+            if _ProbeWorker._stranded == 0:
+                break
+            time.sleep(0.01)
+        assert _ProbeWorker._stranded == 0
+        del _HangingInfo.threads[:]
+        assert fresh.flavor() == 'Debian' and fresh.fieldStatus()['flavor'] == 'resolved'
+        assert fresh.desktop() == 'Unknown' and fresh.fieldStatus()['desktop'] == 'failed'
+        assert len(_HangingInfo.threads) == 2 and _HangingInfo.threads[0] is _HangingInfo.threads[1]
+        assert OsInfo(root=folder, timeout=5).snapshot() == OsInfo(root=folder).snapshot()
+    finally:
+        _HangingInfo.unhang.set()
+        shutil.rmtree(folder)
+
+def testEnvReplay():
+    """
+    Detection captured on this host replays to the same answer; hand written bundles replay other OSes.
+    """
+    capture = OsInfoEnvCapture()
+    host    = OsInfo(env=capture).snapshot()
+    replay  = OsInfoEnvReplay(capture.toJson())
+    assert OsInfo(env=replay).snapshot() == host == OsInfo().snapshot()
+
+    osRelease   = 'ID=debian\nNAME="Debian GNU/Linux"\nVERSION_ID="12"\nVERSION_CODENAME=bookworm\n'
+    bundle  = {'osName': 'posix', 'environ': {'XDG_CURRENT_DESKTOP': 'KDE'},
+               'uname': ['Linux', 'box', '6.1.0-18-amd64', '#1 SMP PREEMPT_DYNAMIC Debian 6.1.76-1', 'x86_64'],
+               'files': {'/etc/os-release': osRelease, '/etc/debian_version': '12.5\n',
+                         '/proc/cpuinfo': 'processor\t: 0\nvendor_id\t: GenuineIntel\nmodel name\t: Xeon\nflags\t\t: fpu vme\n' * 4}}
+    capture = OsInfoEnvCapture(OsInfoEnvReplay(bundle))
+    debian  = OsInfo(env=capture).detect()
+    debian._need('processor')
+    assert (debian.flavverflav(), debian.kernel(), debian.desktop()) == ('Debian12.5', (6, 1, 0), 'KDE')
+    files   = capture.bundle()['files']
+    assert files['/etc/os-release'] == osRelease and files['/proc/cpuinfo'] == 'model name\t: Xeon\n'
+    assert OsInfo(env=OsInfoEnvReplay(capture.toJson())).snapshot() == debian.snapshot()
+
+    windows = OsInfo(env=OsInfoEnvReplay({'osName': 'nt', 'environ': {'PROCESSOR_IDENTIFIER': 'Intel64 Family 6'},
+                                          'platformUname': ['Windows', 'pc', '10', '10.0.19045', 'AMD64']}))
+    assert (windows.type(), windows.flavverflav(), windows.version(), windows.kernel(), windows.desktop()) == \
+           ('Windows', 'Windows10', '10.0', (10, 0, 19045), 'Windows')
+    cygwin  = OsInfo(env=OsInfoEnvReplay({'osName': 'posix', 'files': {},
+                                          'uname': ['CYGWIN_NT-10.0-19045', 'pc', '3.4.9-1.x86_64', '2023-09-06 11:19 UTC', 'x86_64']}))
+    assert (cygwin.type(), cygwin.flavverflav(), cygwin.version()) == ('Linux', 'Cygwin3.4', '3.4.9')
+
+    # The processor name is read on first use, up to the line naming it
+    assert 'processor' not in OsInfo().detect()._probed
+    with tempfile.NamedTemporaryFile() as fh:
+        fh.write(b'processor\t: 0\nmodel name\t: A\nflags\t: fpu\nprocessor\t: 1\nmodel name\t: A\n')
+        fh.flush()
+        assert OsInfoEnv().readFile(fh.name, OsInfo._cpuinfoNames) == b'processor\t: 0\nmodel name\t: A\n'
+
+def testWorkers():
+    """
+    Workers take the parent's detection from workerState(); forked children keep current().
+    """
+    parent  = OsInfo.current()
+    state   = OsInfo.workerState()
+    saved   = (OsInfo._currentInfo, OsInfo._currentStamp)
+    try:
+        OsInfo._currentInfo = OsInfo._currentStamp = None
+        OsInfo.initWorker(state)
+        worker  = OsInfo.current()
+        assert worker._probed == set(OsInfo._cacheProbes) and worker.snapshot() == parent.snapshot()
+
+        OsInfo._currentInfo = OsInfo._currentStamp = None
+        stale   = json.loads(state)
+        stale[0] = OsInfo._cacheKey((os.getpid(), (None,) * len(OsInfo._releaseFiles)))
+        OsInfo.initWorker(json.dumps(stale))
+        assert OsInfo._currentInfo is None
+    finally:
+        OsInfo._currentInfo, OsInfo._currentStamp = saved
+    assert pickle.loads(pickle.dumps(OsInfo.poolArgs()['initializer'])) == OsInfo.initWorker
+
+    if hasattr(os, 'fork'):
+        other   = OsInfo()
+        held    = threading.Event()
+        done    = threading.Event()
+        def hold():
+            with other._lock:
+                held.set()
+                done.wait(10)
+        holder  = threading.Thread(target=hold)
+        holder.start()
+        held.wait(10)
+        try:
+            pid     = os.fork()
+            if pid == 0:
+                os._exit(0 if OsInfo.current() is parent and not parent._lock._is_owned()
+                              and other._lock.acquire(timeout=2) and other.flavor() == parent.flavor() else 1)
+            assert os.waitpid(pid, 0)[1] == 0
+        finally:
+            done.set()
+            holder.join()
+
+class _SlowStampInfo(OsInfo):
+    """
+    Stand-in for a host whose release files hang once the agent is up.
+    """
+    _agentPoll  = 0.0
+    hang        = threading.Event()
+    unhang      = threading.Event()
+
+    @classmethod
+    def _stamp(cls):
+        if cls.hang.is_set():
+            cls.unhang.wait(10)
+        return OsInfo._stamp.__func__(cls)
+
+def testAgent():
+    """
+    An agent serves snapshots, fields, and probe state; clients fall back when there is none.
+    """
+    folder  = tempfile.mkdtemp(prefix='osinfo-test-')
+    path    = os.path.join(folder, 'osinfo.sock')
+    async def main():
+        stale   = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        server  = await _SlowStampInfo.startAgent(path)
+        loop    = asyncio.get_running_loop()
+        try:
+            assert os.stat(path).st_mode & 0o777 == 0o600
+            osi     = await loop.run_in_executor(None, OsInfo.fromAgent, path)
+            fields  = await loop.run_in_executor(None, OsInfo.queryAgent, ['flavor', 'isLinux'], path)
+            _SlowStampInfo.hang.set()
+            start   = time.monotonic()
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(b'{}\n{"op":"nope"}\n{"op":"fields","fields":["flavor","nope"]}\n')
+            replies = [json.loads(await reader.readline()) for _ in range(3)]
+            assert time.monotonic() - start < 1.0, 'agent waited on release files'
+            writer.close()
+        finally:
+            _SlowStampInfo.unhang.set()
+            server.close()
+            await server.wait_closed()
+        return osi, fields, replies
+    try:
+        osi, fields, replies = asyncio.run(main())
+        plain   = os.path.join(folder, 'plain')
+        with open(plain, 'w') as fh:
+            fh.write('keep')
+        try:
+            asyncio.run(OsInfo.startAgent(plain))
+            assert False, 'served over a regular file'
+        except OSError:
+            pass
+        with open(plain) as fh:
+            assert fh.read() == 'keep'
+        local   = OsInfo()
+        assert osi._probed >= set(OsInfo._cacheProbes) and osi.snapshot() == local.snapshot()
+        assert fields == {'flavor': local.flavor(), 'isLinux': local.isLinux()}
+        assert OsInfoSnapshot.fromDict(replies[0]) == local.snapshot()
+        assert [(reply['status'], 'error' in reply) for reply in replies[1:]] == [('bad-request', True), ('unknown-field', True)]
+        try:
+            OsInfo.queryAgent(['flavor', 'nope'], path)
+            assert False, 'unknown field queried'
+        except ValueError:
+            pass
+
+        # An agent still detecting replies not-ready; clients retry
+        assert json.loads(_Agent(OsInfo, float('inf'), None).reply(b'{}'))['status'] == 'not-ready'
+        early   = os.path.join(folder, 'early.sock')
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(early)
+            sock.listen(2)
+            def serve():
+                for reply in (_Agent._notReady, b'{"flavor":"Early"}\n'):
+                    conn, _ = sock.accept()
+                    with conn:
+                        conn.recv(65536)
+                        conn.sendall(reply)
+            server  = threading.Thread(target=serve)
+            server.start()
+            assert OsInfo.queryAgent(['flavor'], early, timeout=2) == {'flavor': 'Early'}
+            server.join()
+        assert OsInfo.fromAgent(os.path.join(folder, 'none.sock'))._probed == set()
+
+        # Clients only trust sockets of their own user
+        forged  = os.path.join(folder, 'forged.sock')
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(forged)
+            sock.listen(1)
+            assert OsInfo._agentTrusted(forged) and not OsInfo._agentTrusted(plain)
+            if os.getuid() == 0:
+                os.chown(forged, 4242, -1)
+                assert not OsInfo._agentTrusted(forged)
+                assert OsInfo.queryAgent(['flavor'], forged, timeout=0.2) == {'flavor': local.flavor()}
+    finally:
+        shutil.rmtree(folder)
+
+def testDump():
+    """
+    Dump() writes one report to stdout and the log; formats and batch dumps work.
+    """
+    osi     = _linuxInfo(b'ID=debian\nNAME="Debian GNU/Linux"\nVERSION_ID="11"\nPRETTY_NAME="Debian GNU/Linux 11 (bullseye)"\n', '11.6')
+    folder  = tempfile.mkdtemp(prefix='osinfo-test-')
+    try:
+        osi._logFile    = os.path.join(folder, 'log.txt')
+        out     = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            osi.Dump()
+            osi.DumpDebugVars()
+        with open(osi._logFile) as fh:
+            assert fh.read() == out.getvalue()
+        assert 'flaverflav            Debian11.6' in out.getvalue() and 'ID                    debian' in out.getvalue()
+
+        out     = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            osi.Dump('kv')
+            osi.DumpDebugVars('json')
+        lines   = out.getvalue().splitlines()
+        assert 'prettyname="Debian GNU/Linux 11 (bullseye)"' in lines and 'isDebian=true' in lines
+        assert json.loads(lines[-1])['osRelease']['VERSION_ID'] == '11'
+
+        many    = os.path.join(folder, 'many.txt')
+        assert OsInfo.dumpMany([osi, ('/mnt/a', osi.snapshot())], many, fmt='kv') == 2
+        with open(many) as fh:
+            assert fh.read().count('flavverflav=Debian11.6') == 2
+    finally:
+        shutil.rmtree(folder)
+
+def testHooks():
+    """
+    Probes are timed, and trace hooks see start/stop pairs and debug messages.
+    """
+    events  = []
+    def hook(event, osi, stage, value):
+        events.append((event, stage, value if event == 'debug' else None))
+    osi     = _linuxInfo(b'ID=debian\nNAME="Debian GNU/Linux"\nVERSION_ID="11"\n', '11.6')
+    OsInfo.addHook(hook)
+    try:
+        osi.detect()
+    finally:
+        OsInfo.removeHook(hook)
+    assert OsInfo._hooks == ()
+    probes  = set(osi.timings())
+    assert probes == set(OsInfo._detectProbes) - {'uname', 'platform', 'osrelease', 'debian'}
+    assert all(isinstance(ns, int) and ns >= 0 for ns in osi.timings().values())
+    assert [stage for event, stage, _ in events if event == 'start'] == [stage for event, stage, _ in events if event == 'stop']
+    assert set(stage for event, stage, _ in events if event == 'stop') == probes
+    assert ('debug', 'distro', 'Is LINUX Debian by os-release ID=debian') in events
+
+    logger  = logging.getLogger('osinfo-test')
+    logger.setLevel(logging.DEBUG)
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+    OsInfo.addHook(OsInfoLogHook(logger))
+    try:
+        _linuxInfo(b'ID=alpine\nNAME="Alpine Linux"\nVERSION_ID=3.18.4\n').flavor()
+    finally:
+        OsInfo._hooks = ()
+        logger.removeHandler(handler)
+    assert any('probe distro took' in record.getMessage() for record in records)
+
+def testFleetTable():
+    """
+    FleetTable filters and groups snapshots, and loads NDJSON.
+    """
+    debian  = _linuxInfo(b'ID=debian\nNAME="Debian GNU/Linux"\nVERSION_ID="11"\n', '11.6').snapshot()
+    ubuntu  = _linuxInfo(b'ID=ubuntu\nNAME="Ubuntu"\nVERSION_ID="20.04"\n', 'bullseye/sid').snapshot()
+    lines   = []
+    for i, snap in enumerate([debian, ubuntu, ubuntu, debian, ubuntu]):
+        fields  = snap.toDict()
+        fields['datacenter'] = 'dc{}'.format(i % 2)
+        lines.append(json.dumps(fields))
+    table   = FleetTable.fromNdjson(lines, tags=('datacenter',))
+    table.append(ubuntu, datacenter='dc2')
+    assert len(table) == 6
+    assert table.groupCount('flavor') == {'Debian': 2, 'Ubuntu': 4}
+    mask    = table.where(flavor='Ubuntu', release=('<', '22.04'))
+    assert table.count(mask) == 4
+    assert table.groupCount('datacenter', mask) == {'dc0': 2, 'dc1': 1, 'dc2': 1}
+    assert table.groupCount(('flavor', 'datacenter'), table.where(release=('>=', '10.10'))) == {('Ubuntu', 'dc0'): 2, ('Ubuntu', 'dc1'): 1, ('Ubuntu', 'dc2'): 1, ('Debian', 'dc0'): 1, ('Debian', 'dc1'): 1}
+    assert table.count(table.where(flavor='Windows')) == 0
+
+def _runChecks():
+    """
+    Run Checks
+
+        Runs each test* function in this file, reporting PASS/FAIL.
+
+    Returns:
+    bool: True if all checks passed
+    """
+    ok  = True
+    for name, func in sorted(globals().items()):
+        if name.startswith('test') and callable(func):
+            try:
+                func()
+                print('PASS {}'.format(name))
+            except Exception as e:
+                print('FAIL {}: {}'.format(name, e))
+                ok  = False
+    return ok
 
-osi = OsInfo()
+if __name__ == '__main__':
+    osi = OsInfo()
 
-osi.Dump()
-osi.DumpDebugVars()
+    osi.Dump()
+    osi.DumpDebugVars()
 
+    print('-- checks --')
+    sys.exit(0 if _runChecks() else 1)